@@ -1,3 +1,13 @@
 from django.contrib import admin
 
-# Register your models here.
+from core.admin_base import CoreModelAdmin
+
+from .models import SubjectHours
+
+class SubjectHoursAdmin(CoreModelAdmin):
+    list_display = ['subject', 'hours_per_week']
+    search_fields = ['subject__name']
+    list_filter = ['subject__academic_year', 'subject__grade']
+    raw_id_fields = ['subject']
+
+admin.site.register(SubjectHours, SubjectHoursAdmin)
@@ -0,0 +1,67 @@
+import random
+import time
+
+from .timetable import DAYS, SECTIONS, SLOTS, Lesson, Occupancy, check_edits, solve
+
+# In-memory timetable benchmarks at synthetic school sizes; no database involved,
+# so they measure the engine alone.
+
+MAX_TEACHER_LOAD = 18  # Sections a week, leaving teachers a couple of free periods
+
+
+def synthetic_lessons(classes, subjects_per_class, seed=0):
+    """
+    A feasible weekly problem: every class fills the week with ``subjects_per_class``
+    subjects, and each grade-level subject group of classes is dealt to teachers of
+    at most MAX_TEACHER_LOAD sections.
+    """
+    rng = random.Random(seed)
+    base, extra = divmod(len(SLOTS), subjects_per_class)
+    hours = [base + (index < extra) for index in range(subjects_per_class)]
+    lessons = []
+    next_teacher = 0
+    for subject_index, subject_hours in enumerate(hours):
+        per_teacher = max(1, MAX_TEACHER_LOAD // subject_hours)
+        class_ids = list(range(classes))
+        rng.shuffle(class_ids)
+        for start in range(0, classes, per_teacher):
+            for class_id in class_ids[start:start + per_teacher]:
+                lessons.append(Lesson(class_id, subject_index, next_teacher, subject_hours))
+            next_teacher += 1
+    return lessons
+
+
+def benchmark(classes, subjects_per_class, edits=10000, seed=0):
+    lessons = synthetic_lessons(classes, subjects_per_class, seed)
+    teachers = {(lesson.class_id, lesson.subject_id): lesson.teacher_id for lesson in lessons}
+
+    started = time.perf_counter()
+    plan = solve(lessons, seed=seed)
+    solve_seconds = time.perf_counter() - started
+
+    occupancy = Occupancy()
+    for (class_id, slot), subject_id in plan.placements.items():
+        occupancy.place(class_id, slot, subject_id, teachers[(class_id, subject_id)])
+
+    # Random single-slot edits, each validated (and rolled back on conflict) on its own
+    rng = random.Random(seed)
+    subject_ids = range(subjects_per_class)
+    batches = [
+        [(rng.randrange(classes), rng.choice(DAYS), rng.choice(SECTIONS), rng.choice(subject_ids))]
+        for _ in range(edits)
+    ]
+    started = time.perf_counter()
+    rejected = sum(1 for batch in batches if check_edits(occupancy, teachers, batch))
+    check_seconds = time.perf_counter() - started
+
+    return {
+        'classes': classes,
+        'teachers': len({lesson.teacher_id for lesson in lessons}),
+        'sections': sum(lesson.hours for lesson in lessons),
+        'placed': len(plan.placements),
+        'unplaced': sum(gap for *_, gap in plan.unplaced),
+        'solve_seconds': round(solve_seconds, 3),
+        'edits': edits,
+        'rejected_edits': rejected,
+        'microseconds_per_edit': round(check_seconds / max(edits, 1) * 1e6, 2),
+    }
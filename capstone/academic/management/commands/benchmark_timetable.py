@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from academic.benchmarks import benchmark
+from core.management.commands.generate_school import SCALES
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the timetable solver and edit validation on synthetic schools (no database writes).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), action='append',
+                            help='Scales from generate_school to run (default: all).')
+        parser.add_argument('--edits', type=int, default=10000, help='Single-slot edits to validate.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        for scale in options['scale'] or sorted(SCALES, key=lambda name: SCALES[name]['grades'] * SCALES[name]['classes_per_grade']):
+            spec = SCALES[scale]
+            result = benchmark(
+                spec['grades'] * spec['classes_per_grade'], spec['subjects_per_grade'],
+                edits=options['edits'], seed=options['seed'],
+            )
+            self.stdout.write(
+                f"{scale:<9} {result['classes']:>4} classes {result['teachers']:>4} teachers "
+                f"{result['placed']:>6}/{result['sections']} sections placed in {result['solve_seconds']:.2f}s, "
+                f"edit check {result['microseconds_per_edit']:.1f}us ({result['rejected_edits']} of {result['edits']} rejected)"
+            )
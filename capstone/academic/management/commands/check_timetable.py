@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from academic.timetable import load_occupancy
+from core.models import AcademicYear
+
+
+class Command(BaseCommand):
+    help = "Report teachers booked into two classes at the same time in an academic year's timetable."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--academic-year', type=int, help='AcademicYear id (default: the active year)')
+
+    def handle(self, *args, **options):
+        years = AcademicYear.objects.all()
+        year = years.filter(pk=options['academic_year']).first() if options['academic_year'] else years.filter(is_active=True).first()
+        if year is None:
+            raise CommandError('No such academic year.')
+
+        _, conflicts = load_occupancy(year)
+        for conflict in conflicts:
+            self.stdout.write(self.style.ERROR(
+                f'Class {conflict.class_id}, {conflict.day} {conflict.section}: {conflict.message}'
+            ))
+        if conflicts:
+            raise CommandError(f'{len(conflicts)} clash(es) in the {year} timetable.')
+        self.stdout.write(self.style.SUCCESS(f'No clashes in the {year} timetable.'))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from academic.timetable import generate_timetable
+from core.models import AcademicYear
+
+
+class Command(BaseCommand):
+    help = "Generate a clash-free weekly timetable for every class of an academic year."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--academic-year', type=int, help='AcademicYear id (default: the active year)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--dry-run', action='store_true', help='Solve and report without saving')
+
+    def handle(self, *args, **options):
+        years = AcademicYear.objects.all()
+        year = years.filter(pk=options['academic_year']).first() if options['academic_year'] else years.filter(is_active=True).first()
+        if year is None:
+            raise CommandError('No such academic year.')
+
+        started = time.perf_counter()
+        plan = generate_timetable(year, seed=options['seed'], commit=not options['dry_run'])
+        self.stdout.write(
+            f'{len(plan.placements)} sections placed for {year} in {time.perf_counter() - started:.2f}s'
+            f'{" (dry run)" if options["dry_run"] else ""}.'
+        )
+        for class_id, subject_id, missing in plan.unplaced:
+            self.stdout.write(self.style.WARNING(
+                f'Class {class_id}: {missing} section(s) of subject {subject_id} could not be placed.'
+            ))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('core', '0008_schedule_unique_slot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubjectHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hours_per_week', models.PositiveSmallIntegerField()),
+                ('subject', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='weekly_hours', to='core.subject')),
+            ],
+            options={
+                'verbose_name_plural': 'subject hours',
+            },
+        ),
+    ]
@@ -1,3 +1,13 @@
 from django.db import models
 
-# Create your models here.
+# Weekly teaching load of a subject, read by academic.timetable when generating
+# timetables. Subjects without a row share the week's sections evenly.
+class SubjectHours(models.Model):
+    subject = models.OneToOneField('core.Subject', on_delete=models.CASCADE, related_name='weekly_hours')
+    hours_per_week = models.PositiveSmallIntegerField()  # Sections per week, not clock hours
+
+    class Meta:
+        verbose_name_plural = 'subject hours'
+
+    def __str__(self):
+        return f"{self.subject.name}: {self.hours_per_week} sections a week"
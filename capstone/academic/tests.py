@@ -1,3 +1,199 @@
-from django.test import TestCase
+from io import StringIO
 
-# Create your tests here.
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from core.models import AcademicYear, Class, Grade, Schedule, Subject, TeacherAssignment
+from users.models import CustomUser, TeacherProfile
+
+from .timetable import (
+    SLOT_INDEX, SLOTS, Lesson, Occupancy, apply_schedule_edits, check_edits, generate_timetable, load_occupancy,
+    solve, teachers_by_lesson
+)
+
+FAST_HASHER = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+def make_subject(name, grade, year):
+    # Subject.save saves twice, which Subject.objects.create (a forced insert) can't do
+    subject = Subject(name=name, grade=grade, academic_year=year)
+    subject.save()
+    return subject
+
+
+def make_teacher(username):
+    user = CustomUser.objects.create(username=username, password='x', role='teacher')
+    return TeacherProfile.objects.get(user=user)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class ScheduleEditTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.year = AcademicYear.objects.create(year='2024-2025', is_active=True)
+        cls.grade = Grade.objects.create(name='Grade 1')
+        cls.class_a = Class.objects.create(name='A', grade=cls.grade, academic_year=cls.year)
+        cls.class_b = Class.objects.create(name='B', grade=cls.grade, academic_year=cls.year)
+        cls.maths = make_subject('Maths', cls.grade, cls.year)
+        cls.art = make_subject('Art', cls.grade, cls.year)
+        cls.teacher = make_teacher('maths-teacher')
+        for class_instance in (cls.class_a, cls.class_b):
+            TeacherAssignment.objects.create(
+                teacher=cls.teacher, subject=cls.maths, class_assigned=class_instance, academic_year=cls.year
+            )
+        Schedule.objects.create(
+            class_instance=cls.class_a, day_of_week='Monday', section='1st Section', subject=cls.maths
+        )
+        Schedule.objects.create(
+            class_instance=cls.class_a, day_of_week='Monday', section='2nd Section', subject=cls.art
+        )
+
+    def check(self, edits):
+        occupancy, _ = load_occupancy(self.year)
+        return occupancy, check_edits(occupancy, teachers_by_lesson(self.year), edits)
+
+    def test_teacher_clash_is_reported_and_occupancy_restored(self):
+        occupancy, conflicts = self.check([
+            (self.class_b.id, 'Monday', '2nd Section', self.art.id),
+            (self.class_b.id, 'Monday', '1st Section', self.maths.id),
+        ])
+        self.assertEqual(len(conflicts), 1)
+        self.assertEqual((conflicts[0].class_id, conflicts[0].section), (self.class_b.id, '1st Section'))
+        self.assertIn(f'already teaches class {self.class_a.id}', conflicts[0].message)
+        # Nothing of the failed batch stays placed
+        self.assertTrue(occupancy.class_free(self.class_b.id, SLOT_INDEX[('Monday', '2nd Section')]))
+
+    def test_swap_within_a_batch_is_allowed(self):
+        _, conflicts = self.check([
+            (self.class_a.id, 'Monday', '1st Section', self.art.id),
+            (self.class_a.id, 'Monday', '2nd Section', self.maths.id),
+            (self.class_b.id, 'Monday', '1st Section', self.maths.id),
+        ])
+        self.assertEqual(conflicts, [])
+
+    def test_slot_edited_twice_and_break_are_rejected(self):
+        _, conflicts = self.check([
+            (self.class_b.id, 'Tuesday', '1st Section', self.art.id),
+            (self.class_b.id, 'Tuesday', '1st Section', self.maths.id),
+            (self.class_b.id, 'Tuesday', 'Break', self.art.id),
+        ])
+        self.assertEqual(
+            sorted(conflict.message for conflict in conflicts),
+            ['Not a teaching section.', 'The slot is edited twice in this batch.'],
+        )
+
+    def test_apply_writes_the_batch_or_nothing(self):
+        with self.assertRaises(ValidationError):
+            apply_schedule_edits(self.year, [
+                (self.class_b.id, 'Friday', '4th Section', self.art.id),
+                (self.class_b.id, 'Monday', '1st Section', self.maths.id),
+            ])
+        self.assertFalse(Schedule.objects.filter(class_instance=self.class_b).exists())
+
+        apply_schedule_edits(self.year, [
+            (self.class_a.id, 'Monday', '1st Section', None),
+            (self.class_b.id, 'Monday', '1st Section', self.maths.id),
+        ])
+        self.assertEqual(
+            list(Schedule.objects.filter(day_of_week='Monday', section='1st Section')
+                 .values_list('class_instance_id', 'subject_id')),
+            [(self.class_b.id, self.maths.id)],
+        )
+
+    def test_edits_outside_the_year_are_rejected(self):
+        other_year = AcademicYear.objects.create(year='2023-2024', is_active=False)
+        other_class = Class.objects.create(name='Old', grade=self.grade, academic_year=other_year)
+        other_subject = make_subject('Old Maths', self.grade, other_year)
+        for edit in [
+            (other_class.id, 'Monday', '1st Section', None),
+            (self.class_b.id, 'Monday', '1st Section', other_subject.id),
+        ]:
+            with self.assertRaises(ValidationError):
+                apply_schedule_edits(self.year, [edit])
+        self.assertFalse(Schedule.objects.filter(class_instance__in=[other_class, self.class_b]).exists())
+
+    def test_existing_clashes_fail_check_timetable(self):
+        call_command('check_timetable', academic_year=self.year.id, stdout=StringIO())
+        Schedule.objects.create(
+            class_instance=self.class_b, day_of_week='Monday', section='1st Section', subject=self.maths
+        )
+        _, conflicts = load_occupancy(self.year)
+        self.assertEqual(len(conflicts), 1)
+        with self.assertRaises(CommandError):
+            call_command('check_timetable', academic_year=self.year.id, stdout=StringIO())
+
+
+def assert_clash_free(test, lessons, plan):
+    occupancy = Occupancy()
+    taught = {(lesson.class_id, lesson.subject_id): lesson for lesson in lessons}
+    hours = {key: 0 for key in taught}
+    for (class_id, slot), subject_id in plan.placements.items():
+        teacher_id = taught[(class_id, subject_id)].teacher_id
+        test.assertTrue(occupancy.teacher_free(teacher_id, slot), f'Teacher {teacher_id} double-booked')
+        occupancy.place(class_id, slot, subject_id, teacher_id)
+        hours[(class_id, subject_id)] += 1
+    for key, lesson in taught.items():
+        missing = sum(count for class_id, subject_id, count in plan.unplaced if (class_id, subject_id) == key)
+        test.assertEqual(hours[key] + missing, lesson.hours)
+
+
+class SolverTests(TestCase):
+    def test_full_week_is_placed(self):
+        # Every class and every teacher is busy in all 20 slots: a greedy pass gets
+        # stuck, and only the Kempe chain swaps can complete the week
+        week = len(SLOTS)
+        load = [[7, 7, 6], [7, 6, 7], [6, 7, 7]]
+        lessons = [
+            Lesson(class_id, class_id * 10 + teacher_id, teacher_id, load[class_id][teacher_id])
+            for class_id in range(3) for teacher_id in range(3)
+        ]
+        self.assertEqual(sum(row[0] for row in load), week)
+        for seed in range(5):
+            plan = solve(lessons, seed=seed)
+            self.assertTrue(plan.complete, f'seed {seed}: {plan.unplaced}')
+            self.assertEqual(len(plan.placements), 3 * week)
+            assert_clash_free(self, lessons, plan)
+
+    def test_overbooked_teacher_is_reported(self):
+        lessons = [Lesson(1, 1, 1, 15), Lesson(2, 2, 1, 10)]
+        plan = solve(lessons)
+        self.assertFalse(plan.complete)
+        self.assertEqual(sum(missing for _, _, missing in plan.unplaced), 5)
+        assert_clash_free(self, lessons, plan)
+
+    def test_lessons_without_teacher_only_need_a_free_class_slot(self):
+        lessons = [Lesson(1, 1, None, 10), Lesson(1, 2, None, 10), Lesson(2, 3, None, 20)]
+        plan = solve(lessons)
+        self.assertTrue(plan.complete)
+        assert_clash_free(self, lessons, plan)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class GenerateTimetableTests(TestCase):
+    def test_generated_timetable_has_no_clashes(self):
+        year = AcademicYear.objects.create(year='2024-2025', is_active=True)
+        grade = Grade.objects.create(name='Grade 1')
+        classes = [Class.objects.create(name=name, grade=grade, academic_year=year) for name in 'ABC']
+        teachers = [make_teacher(f'teacher{index}') for index in range(4)]
+        for index in range(4):
+            subject = make_subject(f'Subject {index}', grade, year)
+            subject.classes.set(classes)
+            for class_instance in classes:
+                TeacherAssignment.objects.create(
+                    teacher=teachers[index], subject=subject, class_assigned=class_instance, academic_year=year
+                )
+
+        # An inactive class isn't planned, and keeps the timetable it had
+        closed = Class.objects.create(name='D', grade=grade, academic_year=year, is_active=False)
+        kept = Schedule.objects.create(
+            class_instance=closed, day_of_week='Monday', section='1st Section', subject=subject
+        )
+
+        plan = generate_timetable(year, seed=1)
+        self.assertTrue(plan.complete)
+        self.assertEqual(plan.class_ids, {class_instance.id for class_instance in classes})
+        self.assertEqual(Schedule.objects.filter(class_instance__in=classes).count(), 3 * len(SLOTS))
+        self.assertEqual(list(Schedule.objects.filter(class_instance=closed)), [kept])
+        _, conflicts = load_occupancy(year)
+        self.assertEqual(conflicts, [])
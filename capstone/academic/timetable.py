@@ -0,0 +1,416 @@
+import random
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from core.admin_base import invalidate_counts
+from core.caching import bump_version, bump_versions
+from core.dashboard import TIMETABLE_NAMESPACE, class_timetable_namespace
+from core.models import Class, Schedule, Subject, TeacherAssignment
+
+from .models import SubjectHours
+
+# Timetable engine. The week is a fixed list of teaching slots (day x section,
+# breaks excluded), so the slots a class or teacher occupies fit in one int used
+# as a bitmask: checking or taking a slot is a single AND/OR. Validation of
+# schedule edits and the generator both work on this occupancy index.
+
+DAYS = [day for day, _ in Schedule.DAY_CHOICES]
+SECTIONS = [section for section, _ in Schedule.SECTION_CHOICES if section != 'Break']
+SLOTS = [(day, section) for day in DAYS for section in SECTIONS]
+SLOT_INDEX = {slot: index for index, slot in enumerate(SLOTS)}
+ALL_SLOTS = (1 << len(SLOTS)) - 1
+
+
+def slot_day(slot):
+    return slot // len(SECTIONS)
+
+
+def _bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class Occupancy:
+    """Who is where: per-class and per-teacher slot bitmasks plus the lesson in each class slot."""
+
+    def __init__(self):
+        self.classes = defaultdict(int)
+        self.teachers = defaultdict(int)
+        self.lessons = {}  # (class_id, slot) -> (subject_id, teacher_id)
+        self.teacher_at = {}  # (teacher_id, slot) -> class_id
+
+    def class_free(self, class_id, slot):
+        return not self.classes[class_id] >> slot & 1
+
+    def teacher_free(self, teacher_id, slot):
+        return teacher_id is None or not self.teachers[teacher_id] >> slot & 1
+
+    def place(self, class_id, slot, subject_id, teacher_id):
+        self.classes[class_id] |= 1 << slot
+        self.lessons[(class_id, slot)] = (subject_id, teacher_id)
+        if teacher_id is not None:
+            self.teachers[teacher_id] |= 1 << slot
+            self.teacher_at[(teacher_id, slot)] = class_id
+
+    def remove(self, class_id, slot):
+        lesson = self.lessons.pop((class_id, slot), None)
+        if lesson is None:
+            return None
+        self.classes[class_id] &= ~(1 << slot)
+        teacher_id = lesson[1]
+        if teacher_id is not None and self.teacher_at.get((teacher_id, slot)) == class_id:
+            self.teachers[teacher_id] &= ~(1 << slot)
+            del self.teacher_at[(teacher_id, slot)]
+        return lesson
+
+
+@dataclass
+class Conflict:
+    class_id: int
+    day: str
+    section: str
+    message: str
+
+    def as_dict(self):
+        return {'class': self.class_id, 'day': self.day, 'section': self.section, 'message': self.message}
+
+
+def teachers_by_lesson(academic_year):
+    """(class_id, subject_id) -> teacher_id for the year's assignments."""
+    teachers = {}
+    for class_id, subject_id, teacher_id in (
+        TeacherAssignment.objects.filter(academic_year=academic_year, teacher__isnull=False)
+        .order_by('id').values_list('class_assigned_id', 'subject_id', 'teacher_id')
+    ):
+        teachers.setdefault((class_id, subject_id), teacher_id)
+    return teachers
+
+
+def load_occupancy(academic_year, teachers=None):
+    """
+    Occupancy of the year's current timetable, plus the clashes already in it
+    (a teacher booked into two classes at once). Two queries.
+    """
+    teachers = teachers_by_lesson(academic_year) if teachers is None else teachers
+    occupancy = Occupancy()
+    conflicts = []
+    rows = Schedule.objects.filter(
+        class_instance__academic_year=academic_year, subject__isnull=False
+    ).values_list('class_instance_id', 'day_of_week', 'section', 'subject_id')
+    for class_id, day, section, subject_id in rows:
+        slot = SLOT_INDEX.get((day, section))
+        if slot is None:
+            continue
+        teacher_id = teachers.get((class_id, subject_id))
+        if not occupancy.teacher_free(teacher_id, slot):
+            other = occupancy.teacher_at[(teacher_id, slot)]
+            conflicts.append(Conflict(class_id, day, section, f'Teacher {teacher_id} also teaches class {other} then.'))
+            teacher_id = None  # Keep the class slot, leave the teacher with the first booking
+        occupancy.place(class_id, slot, subject_id, teacher_id)
+    return occupancy, conflicts
+
+
+def check_edits(occupancy, teachers, edits):
+    """
+    Apply ``edits`` — (class_id, day, section, subject_id or None) tuples — to
+    ``occupancy`` and return the conflicts they cause. Every edited slot is freed
+    first, so swaps within one batch are fine. Constant work per edit. On conflict
+    the occupancy is restored.
+    """
+    conflicts = []
+    undo = []
+    resolved = []
+    for class_id, day, section, subject_id in edits:
+        slot = SLOT_INDEX.get((day, section))
+        if slot is None:
+            conflicts.append(Conflict(class_id, day, section, 'Not a teaching section.'))
+            continue
+        resolved.append((class_id, slot, subject_id))
+        lesson = occupancy.remove(class_id, slot)
+        if lesson is not None:
+            undo.append((class_id, slot, lesson))
+
+    placed = []
+    for class_id, slot, subject_id in resolved:
+        if subject_id is None:
+            continue
+        day, section = SLOTS[slot]
+        teacher_id = teachers.get((class_id, subject_id))
+        if not occupancy.class_free(class_id, slot):
+            conflicts.append(Conflict(class_id, day, section, 'The slot is edited twice in this batch.'))
+        elif not occupancy.teacher_free(teacher_id, slot):
+            other = occupancy.teacher_at[(teacher_id, slot)]
+            conflicts.append(Conflict(class_id, day, section, f'Teacher {teacher_id} already teaches class {other} then.'))
+        else:
+            occupancy.place(class_id, slot, subject_id, teacher_id)
+            placed.append((class_id, slot))
+
+    if conflicts:
+        for class_id, slot in placed:
+            occupancy.remove(class_id, slot)
+        for class_id, slot, (subject_id, teacher_id) in undo:
+            occupancy.place(class_id, slot, subject_id, teacher_id)
+    return conflicts
+
+
+def check_edit_targets(academic_year, edits):
+    """
+    The problems with the classes and subjects ``edits`` name: every class must
+    belong to ``academic_year`` and every subject to that class's grade and year.
+    The occupancy only covers that year, so edits failing this cannot be checked
+    for clashes. Two queries.
+    """
+    class_ids = {edit[0] for edit in edits}
+    subject_ids = {edit[3] for edit in edits if edit[3] is not None}
+    class_grades = dict(
+        Class.objects.filter(academic_year=academic_year, id__in=class_ids).values_list('id', 'grade_id')
+    )
+    subject_grades = dict(
+        Subject.objects.filter(academic_year=academic_year, id__in=subject_ids).values_list('id', 'grade_id')
+    )
+    errors = []
+    for class_id, day, section, subject_id in edits:
+        if class_id not in class_grades:
+            errors.append(f'Class {class_id} is not a class of {academic_year.year}.')
+        elif subject_id is not None and subject_grades.get(subject_id) != class_grades[class_id]:
+            errors.append(f'Subject {subject_id} is not taught in the grade of class {class_id} in {academic_year.year}.')
+    return errors
+
+
+def apply_schedule_edits(academic_year, edits):
+    """
+    Validate and save a batch of schedule edits for one academic year. Raises
+    ValidationError listing every clash, otherwise writes the batch in one upsert.
+    """
+    errors = check_edit_targets(academic_year, edits)
+    if errors:
+        raise ValidationError(errors)
+    with transaction.atomic():
+        occupancy, _ = load_occupancy(academic_year)
+        conflicts = check_edits(occupancy, teachers_by_lesson(academic_year), edits)
+        if conflicts:
+            raise ValidationError([conflict.message for conflict in conflicts])
+
+        filled = [edit for edit in edits if edit[3] is not None]
+        cleared = [edit for edit in edits if edit[3] is None]
+        Schedule.objects.bulk_create(
+            [
+                Schedule(class_instance_id=class_id, day_of_week=day, section=section, subject_id=subject_id)
+                for class_id, day, section, subject_id in filled
+            ],
+            update_conflicts=True, unique_fields=['class_instance', 'day_of_week', 'section'],
+            update_fields=['subject'],
+        )
+        for class_id, day, section, _ in cleared:
+            Schedule.objects.filter(class_instance_id=class_id, day_of_week=day, section=section).delete()
+        # bulk_create skips the Schedule signals
+        transaction.on_commit(lambda: bump_versions(class_timetable_namespace(edit[0]) for edit in edits))
+        transaction.on_commit(lambda: invalidate_counts(Schedule))
+    return len(edits)
+
+
+@dataclass
+class Lesson:
+    class_id: int
+    subject_id: int
+    teacher_id: int
+    hours: int
+
+
+@dataclass
+class TimetablePlan:
+    placements: dict = field(default_factory=dict)  # (class_id, slot) -> subject_id
+    unplaced: list = field(default_factory=list)  # (class_id, subject_id, sections missing)
+    class_ids: set = field(default_factory=set)  # Classes the plan covers
+
+    @property
+    def complete(self):
+        return not self.unplaced
+
+
+class _Solver:
+    def __init__(self, lessons, rng):
+        self.lessons = lessons
+        self.rng = rng
+        self.occupancy = Occupancy()
+        self.days_used = defaultdict(int)  # (class_id, subject_id) -> bitmask of days with that lesson
+
+    def _score(self, lesson, slot):
+        # Prefer a day the class hasn't had this subject yet, then the class's emptiest day
+        day = slot_day(slot)
+        repeat = self.days_used[(lesson.class_id, lesson.subject_id)] >> day & 1
+        day_mask = ((1 << len(SECTIONS)) - 1) << (day * len(SECTIONS))
+        day_load = bin(self.occupancy.classes[lesson.class_id] & day_mask).count('1')
+        return (repeat, day_load, self.rng.random())
+
+    def _take(self, lesson, slot):
+        self.occupancy.place(lesson.class_id, slot, lesson.subject_id, lesson.teacher_id)
+        self.days_used[(lesson.class_id, lesson.subject_id)] |= 1 << slot_day(slot)
+
+    def _free_mask(self, class_id, teacher_id):
+        mask = ALL_SLOTS & ~self.occupancy.classes[class_id]
+        if teacher_id is not None:
+            mask &= ~self.occupancy.teachers[teacher_id]
+        return mask
+
+    def _swap_chain(self, lesson):
+        # No slot is free for both the class and the teacher. Take a slot ``a`` free
+        # for the class and ``b`` free for the teacher, and swap a/b along the chain
+        # teacher -a-> class -b-> teacher -a-> ... (a Kempe chain). The chain never
+        # reaches this lesson's class, so afterwards ``a`` is free for both.
+        occupancy = self.occupancy
+        class_free = ALL_SLOTS & ~occupancy.classes[lesson.class_id]
+        teacher_free = ALL_SLOTS & ~occupancy.teachers[lesson.teacher_id]
+        if not class_free or not teacher_free:
+            return None  # The class or the teacher has more sections than the week
+        a = next(_bits(class_free))
+        b = next(_bits(teacher_free))
+
+        chain = []
+        teacher_id = lesson.teacher_id
+        while (teacher_id, a) in occupancy.teacher_at:
+            class_id = occupancy.teacher_at[(teacher_id, a)]
+            chain.append((class_id, a, b))
+            if (class_id, b) not in occupancy.lessons:
+                break
+            teacher_id = occupancy.lessons[(class_id, b)][1]
+            chain.append((class_id, b, a))
+            if teacher_id is None:
+                break
+
+        moved = [(class_id, target, occupancy.remove(class_id, source)) for class_id, source, target in chain]
+        for class_id, target, (subject_id, teacher_id) in moved:
+            occupancy.place(class_id, target, subject_id, teacher_id)
+            self.days_used[(class_id, subject_id)] |= 1 << slot_day(target)
+        return a
+
+    def solve(self):
+        plan = TimetablePlan(class_ids={lesson.class_id for lesson in self.lessons})
+        for lesson in self.lessons:
+            missing = 0
+            for _ in range(lesson.hours):
+                candidates = list(_bits(self._free_mask(lesson.class_id, lesson.teacher_id)))
+                if candidates:
+                    slot = min(candidates, key=lambda slot: self._score(lesson, slot))
+                elif lesson.teacher_id is not None:
+                    slot = self._swap_chain(lesson)
+                else:
+                    slot = None
+                if slot is None:
+                    missing += 1
+                else:
+                    self._take(lesson, slot)
+            if missing:
+                plan.unplaced.append((lesson.class_id, lesson.subject_id, missing))
+        plan.placements = {key: subject_id for key, (subject_id, _) in self.occupancy.lessons.items()}
+        return plan
+
+
+def solve(lessons, seed=0):
+    """
+    Build a clash-free week. Lessons of the busiest teachers go first, each section
+    into the free slot that best spreads the subject over the week; when no slot
+    is free for both class and teacher a Kempe chain swap makes one. Classes and
+    teachers form a bipartite graph and slots are edge colours, so (König) this
+    places every section whenever no class or teacher needs more than the week's
+    slots; anything beyond that is reported in ``unplaced``.
+    """
+    rng = random.Random(seed)
+    teacher_load = defaultdict(int)
+    for lesson in lessons:
+        teacher_load[lesson.teacher_id] += lesson.hours
+    order = sorted(
+        lessons,
+        key=lambda lesson: (
+            -(teacher_load[lesson.teacher_id] if lesson.teacher_id is not None else 0),
+            -lesson.hours, rng.random(),
+        ),
+    )
+    return _Solver(order, rng).solve()
+
+
+def even_hours(subject_ids):
+    # Share the week's sections between a class's subjects, the remainder to the first ones
+    if not subject_ids:
+        return {}
+    base, extra = divmod(len(SLOTS), len(subject_ids))
+    return {subject_id: base + (index < extra) for index, subject_id in enumerate(subject_ids)}
+
+
+def lessons_for_year(academic_year):
+    """
+    What every active class of the year must be taught each week: its subjects
+    (Subject.classes), SubjectHours or an even share of the week, and the teacher
+    assigned to that class and subject. Four queries.
+    """
+    class_ids = list(
+        Class.objects.filter(academic_year=academic_year, is_active=True).values_list('id', flat=True)
+    )
+    subjects_by_class = defaultdict(list)
+    for class_id, subject_id in (
+        Subject.classes.through.objects.filter(
+            class_id__in=class_ids, subject__academic_year=academic_year, subject__is_active=True
+        ).order_by('subject__name', 'subject_id').values_list('class_id', 'subject_id')
+    ):
+        subjects_by_class[class_id].append(subject_id)
+    hours = dict(
+        SubjectHours.objects.filter(subject__academic_year=academic_year).values_list('subject_id', 'hours_per_week')
+    )
+    teachers = teachers_by_lesson(academic_year)
+
+    lessons = []
+    for class_id in class_ids:
+        subject_ids = subjects_by_class[class_id]
+        default_hours = even_hours([subject_id for subject_id in subject_ids if subject_id not in hours])
+        for subject_id in subject_ids:
+            lessons.append(Lesson(
+                class_id, subject_id, teachers.get((class_id, subject_id)),
+                hours.get(subject_id, default_hours.get(subject_id, 0)),
+            ))
+    return lessons
+
+
+def write_plan(academic_year, plan):
+    """
+    Replace the timetable of the classes ``plan`` covers: one upsert plus a delete
+    of their slots left empty. Other classes of the year, inactive ones included,
+    keep their rows.
+    """
+    with transaction.atomic():
+        existing = Schedule.objects.filter(
+            class_instance__academic_year=academic_year, class_instance_id__in=plan.class_ids
+        ).values_list(
+            'id', 'class_instance_id', 'day_of_week', 'section'
+        )
+        stale = [
+            schedule_id for schedule_id, class_id, day, section in existing
+            if (class_id, SLOT_INDEX.get((day, section))) not in plan.placements
+        ]
+        Schedule.objects.bulk_create(
+            [
+                Schedule(
+                    class_instance_id=class_id, day_of_week=SLOTS[slot][0], section=SLOTS[slot][1],
+                    subject_id=subject_id,
+                )
+                for (class_id, slot), subject_id in plan.placements.items()
+            ],
+            update_conflicts=True, unique_fields=['class_instance', 'day_of_week', 'section'],
+            update_fields=['subject'], batch_size=1000,
+        )
+        for start in range(0, len(stale), 1000):
+            Schedule.objects.filter(id__in=stale[start:start + 1000]).delete()
+        transaction.on_commit(lambda: bump_version(TIMETABLE_NAMESPACE))
+        transaction.on_commit(lambda: invalidate_counts(Schedule))
+    return len(plan.placements)
+
+
+def generate_timetable(academic_year, seed=0, commit=True):
+    plan = solve(lessons_for_year(academic_year), seed=seed)
+    if commit:
+        write_plan(academic_year, plan)
+    return plan
@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('years/<int:academic_year_id>/schedule/', views.schedule_edits, name='schedule-edits'),
+]
@@ -1,3 +1,45 @@
-from django.shortcuts import render
+import json
 
-# Create your views here.
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_POST
+
+from core.models import AcademicYear
+
+from .timetable import apply_schedule_edits, check_edit_targets, check_edits, load_occupancy, teachers_by_lesson
+
+
+def _parse_edits(payload):
+    return [
+        (int(edit['class']), edit['day'], edit['section'], int(edit['subject']) if edit.get('subject') else None)
+        for edit in payload['edits']
+    ]
+
+
+@staff_member_required
+@require_POST
+def schedule_edits(request, academic_year_id):
+    # Body: {"edits": [{"class": 3, "day": "Monday", "section": "1st Section", "subject": 12}], "dry_run": false}
+    # A null subject clears the slot. The whole batch is saved or, on any clash, none of it.
+    academic_year = get_object_or_404(AcademicYear, pk=academic_year_id)
+    try:
+        payload = json.loads(request.body)
+        edits = _parse_edits(payload)
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Expected a list of edits.'}, status=400)
+    errors = check_edit_targets(academic_year, edits)
+    if errors:
+        return JsonResponse({'error': errors}, status=400)
+
+    if payload.get('dry_run'):
+        occupancy, _ = load_occupancy(academic_year)
+        conflicts = check_edits(occupancy, teachers_by_lesson(academic_year), edits)
+        return JsonResponse({'conflicts': [conflict.as_dict() for conflict in conflicts]})
+
+    try:
+        saved = apply_schedule_edits(academic_year, edits)
+    except ValidationError as e:
+        return JsonResponse({'error': e.messages}, status=409)
+    return JsonResponse({'saved': saved})
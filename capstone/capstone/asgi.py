@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'capstone.settings')
+# Each ASGI request runs its sync code on a thread of its own, so a connection kept
+# open for reuse would never be reused; see capstone.asgi_server
+os.environ.setdefault('DATABASE_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
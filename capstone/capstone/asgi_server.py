@@ -0,0 +1,57 @@
+"""
+Uvicorn deployment profile for the ASGI application.
+
+    python -m capstone.asgi_server
+
+Settings come from the environment, like the database ones:
+
+ASGI_HOST, ASGI_PORT        bind address (127.0.0.1:8000)
+ASGI_WORKERS                worker processes (one per CPU)
+ASGI_LIMIT_CONCURRENCY      requests per worker before answering 503 (200)
+ASGI_BACKLOG                pending connections per socket (2048)
+ASGI_KEEPALIVE              idle keep-alive seconds (5)
+ASGI_FORWARDED_ALLOW_IPS    proxies trusted for X-Forwarded-* headers (127.0.0.1)
+
+The same settings work with uvicorn's own command line, e.g.
+``uvicorn capstone.asgi:application --workers 4 --lifespan off``. Async views
+(the */summary/ dashboards and communication's inbox feed) serve many requests
+per worker; sync views still take a thread each.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import uvicorn
+except ImportError:
+    uvicorn = None
+
+
+def server_options(environ=os.environ):
+    return {
+        'host': environ.get('ASGI_HOST', '127.0.0.1'),
+        'port': int(environ.get('ASGI_PORT', 8000)),
+        'workers': int(environ.get('ASGI_WORKERS', os.cpu_count() or 1)),
+        'limit_concurrency': int(environ.get('ASGI_LIMIT_CONCURRENCY', 200)),
+        'backlog': int(environ.get('ASGI_BACKLOG', 2048)),
+        'timeout_keep_alive': int(environ.get('ASGI_KEEPALIVE', 5)),
+        'forwarded_allow_ips': environ.get('ASGI_FORWARDED_ALLOW_IPS', '127.0.0.1'),
+        'proxy_headers': True,
+        # Django has no lifespan events; uvloop and httptools are used when installed
+        'lifespan': 'off',
+        'loop': 'auto',
+        'http': 'auto',
+        'access_log': environ.get('ASGI_ACCESS_LOG', '0') == '1',
+    }
+
+
+def main():
+    if uvicorn is None:
+        raise ImproperlyConfigured('Serving over ASGI requires uvicorn: pip install "uvicorn[standard]"')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'capstone.settings')
+    # An import string rather than the application, so each worker process loads its own
+    uvicorn.run('capstone.asgi:application', **server_options())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import contextvars
+from contextlib import contextmanager
+
+from django.db import connections
+
+# Routes reads made inside replica_reads() (dashboards, reports, exports) to the
+# 'replica' database when one is configured; everything else, and every write,
+# uses 'default'. Reads inside a transaction on the primary stay there so a view
+# always sees its own uncommitted writes. Reads that fill a versioned cache entry
+# go through primary_reads(): the version was bumped by a write the replica may
+# not have yet, and a lagging read cached under it would be served until the
+# entry expires.
+
+REPLICA = 'replica'
+
+_replica_reads = contextvars.ContextVar('replica_reads', default=False)
+
+
+@contextmanager
+def replica_reads():
+    """Send the ORM reads made inside this block (or decorated function) to the replica."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """Keep the reads made inside this block on the primary, even within replica_reads()."""
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def replica_alias():
+    # For querysets read outside replica_reads(), such as a streaming response's rows
+    return REPLICA if REPLICA in connections.databases else 'default'
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or REPLICA not in connections.databases:
+            return None
+        if connections['default'].in_atomic_block:
+            return None
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica copies the primary's schema through replication; migrate only the primary
+        if db == REPLICA:
+            return False
+        return None
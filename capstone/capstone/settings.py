@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 
 from pathlib import Path
 
+from capstone.database import databases_from_env
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -45,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.profiling.QueryProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -67,6 +70,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.reference_data',
             ],
         },
     },
@@ -77,13 +81,20 @@ WSGI_APPLICATION = 'capstone.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
+#
+# DATABASE_URL          primary, e.g. postgres://school:secret@db:5432/school
+#                       (defaults to the SQLite file below, opened in WAL mode)
+# DATABASE_REPLICA_URL  optional read replica for dashboard and report reads
+# DATABASE_CONN_MAX_AGE seconds to keep a connection open between requests (60;
+#                       0 under ASGI, see capstone/asgi.py)
+# DATABASE_CONN_HEALTH_CHECKS  set to 0 to skip checking reused connections
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+DATABASES = databases_from_env(f"sqlite:///{BASE_DIR / 'db.sqlite3'}")
+
+# Reads wrapped in capstone.routers.replica_reads() go to the replica when one is
+# configured. Cached dashboards, summaries and analytics are built on the primary,
+# so replica lag never ends up in the cache; only uncached reads may trail it.
+DATABASE_ROUTERS = ['capstone.routers.ReplicaRouter']
 
 
 # Password validation
@@ -142,4 +153,64 @@ SESSION_COOKIE_SECURE = False  # Set to True if using HTTPS in production
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False
 SESSION_COOKIE_AGE = 1209600  # Two weeks, or set your preferred duration
 LOGIN_URL = '/core/sign-in/'
-LOGIN_REDIRECT_URL = '/core/student-dashboard/'
\ No newline at end of file
+LOGIN_REDIRECT_URL = '/core/student-dashboard/'
+
+# Shared cache behind the versioned dashboard and reference-data caches.
+# Point this at memcached/redis when running more than one process.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'capstone',
+    }
+}
+
+# Seconds school reference data (active year, grades, classes, subjects) stays cached
+REFERENCE_CACHE_TIMEOUT = 3600
+
+# Seconds an assembled dashboard payload stays cached (invalidated early by core.signals)
+DASHBOARD_CACHE_TIMEOUT = 300
+
+# Seconds the directory's per-filter user total stays cached
+DIRECTORY_COUNT_CACHE_TIMEOUT = 60
+
+# Seconds a filtered admin changelist's row count stays cached (core.admin_base)
+ADMIN_COUNT_CACHE_TIMEOUT = 60
+
+# Seconds exam statistics stay cached (invalidated early when a grade changes)
+ANALYTICS_CACHE_TIMEOUT = 3600
+
+# Expand notification audiences into inbox rows on the job queue. Only with a
+# manage.py runworker process running; otherwise the fan-out runs on commit
+NOTIFICATION_FANOUT_ASYNC = False
+
+# Wakes live inbox streams and long polls when deliveries are written (communication.live).
+# DatabaseHub watches the deliveries table, so it reaches streams whichever process ran
+# the fan-out (here the job worker). LocalHub only reaches streams in the fan-out's own
+# process, and CacheHub needs a cache shared between processes, not LocMemCache.
+NOTIFICATION_HUB = 'communication.live.DatabaseHub'
+NOTIFICATION_HUB_POLL_SECONDS = 1.0
+
+# Request profiling (core.profiling). Sampled requests log query count, DB, view
+# and template time and duplicate (N+1) queries to the capstone.profiling logger.
+PROFILING_SAMPLE_RATE = 1.0 if DEBUG else 0.05
+PROFILING_SLOW_REQUEST_MS = 500
+PROFILING_DUPLICATE_THRESHOLD = 3
+PROFILING_SERVER_TIMING = DEBUG
+PROFILING_SLOWEST_SIZE = 50
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'capstone.profiling': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,85 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, router
+from django.test import SimpleTestCase, override_settings
+
+from core.models import Attendance
+
+from .database import databases_from_env, parse_database_url
+from .routers import REPLICA, ReplicaRouter, primary_reads, replica_alias, replica_reads
+
+REPLICA_SETTINGS = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}
+
+
+@override_settings(DATABASE_ROUTERS=['capstone.routers.ReplicaRouter'])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(connections.databases, {REPLICA: REPLICA_SETTINGS})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reads_follow_the_block_they_run_in(self):
+        self.assertEqual(router.db_for_read(Attendance), 'default')
+        with replica_reads():
+            self.assertEqual(router.db_for_read(Attendance), REPLICA)
+            with primary_reads():
+                self.assertEqual(router.db_for_read(Attendance), 'default')
+            self.assertEqual(router.db_for_read(Attendance), REPLICA)
+            self.assertEqual(router.db_for_write(Attendance), 'default')
+        self.assertEqual(router.db_for_read(Attendance), 'default')
+
+    def test_decorated_views_read_from_the_replica_across_threads(self):
+        @replica_reads()
+        def view():
+            return async_to_sync(sync_to_async(router.db_for_read))(Attendance)
+
+        self.assertEqual(view(), REPLICA)
+
+    def test_reads_in_a_transaction_stay_on_the_primary(self):
+        with replica_reads(), mock.patch.object(connections['default'], 'in_atomic_block', True):
+            self.assertEqual(router.db_for_read(Attendance), 'default')
+
+    def test_without_a_replica_everything_uses_the_primary(self):
+        del connections.databases[REPLICA]
+        with replica_reads():
+            self.assertEqual(router.db_for_read(Attendance), 'default')
+        self.assertEqual(replica_alias(), 'default')
+
+    def test_only_the_primary_is_migrated(self):
+        self.assertEqual(replica_alias(), REPLICA)
+        self.assertFalse(router.allow_migrate(REPLICA, 'core', model_name='attendance'))
+        self.assertTrue(router.allow_migrate('default', 'core', model_name='attendance'))
+        self.assertIsNone(ReplicaRouter().allow_migrate('default', 'core'))
+
+
+class DatabaseUrlTests(SimpleTestCase):
+    def test_postgres_url(self):
+        settings = parse_database_url(
+            'postgres://school:p%40ss@db:5433/school?sslmode=require', conn_max_age=60, conn_health_checks=True
+        )
+        self.assertEqual(settings, {
+            'ENGINE': 'django.db.backends.postgresql', 'NAME': 'school', 'USER': 'school', 'PASSWORD': 'p@ss',
+            'HOST': 'db', 'PORT': '5433', 'OPTIONS': {'sslmode': 'require'},
+            'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True,
+        })
+
+    def test_sqlite_urls(self):
+        self.assertEqual(parse_database_url('sqlite:////var/db/school.sqlite3?timeout=20'), {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': '/var/db/school.sqlite3', 'OPTIONS': {'timeout': 20.0},
+        })
+        self.assertEqual(parse_database_url('sqlite://:memory:')['NAME'], ':memory:')
+        with self.assertRaises(ImproperlyConfigured):
+            parse_database_url('mysql://db/school')
+
+    def test_replica_from_the_environment(self):
+        databases = databases_from_env('sqlite:///db.sqlite3', environ={
+            'DATABASE_URL': 'postgres://school@primary/school',
+            'DATABASE_REPLICA_URL': 'postgres://school@replica/school',
+            'DATABASE_CONN_MAX_AGE': '0',
+        })
+        self.assertEqual(sorted(databases), ['default', REPLICA])
+        self.assertEqual((databases['default']['HOST'], databases[REPLICA]['HOST']), ('primary', 'replica'))
+        self.assertEqual(databases[REPLICA]['CONN_MAX_AGE'], 0)
+        self.assertEqual(databases_from_env('sqlite:///db.sqlite3', environ={})['default']['NAME'], 'db.sqlite3')
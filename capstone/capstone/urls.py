@@ -21,4 +21,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('users/', include('users.urls')),
     path('core/', include('core.urls')),
+    path('communication/', include('communication.urls')),
+    path('finance/', include('finance.urls')),
+    path('academic/', include('academic.urls')),
 ]
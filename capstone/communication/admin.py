@@ -1,3 +1,10 @@
 from django.contrib import admin
+from .models import InboxDelivery
 
-# Register your models here.
+class InboxDeliveryAdmin(admin.ModelAdmin):
+    list_display = ['user', 'notification', 'created_at', 'read_at']
+    search_fields = ['user__username', 'notification__title']
+    list_select_related = ['user', 'notification']
+    raw_id_fields = ['user', 'notification']
+
+admin.site.register(InboxDelivery, InboxDeliveryAdmin)
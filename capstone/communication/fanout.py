@@ -0,0 +1,187 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from core.jobs import enqueue
+from core.models import Class, Notification, StudentEnrollment, TeacherAssignment
+from users.models import CustomUser
+
+from .live import get_hub
+from .models import InboxDelivery
+
+BATCH_SIZE = 1000
+
+
+def audience(notification):
+    """Queryset of the ids of every user who should see ``notification``."""
+    users = CustomUser.objects.filter(is_active=True)
+    if notification.scope == 'School':
+        return users.values('id')
+
+    if notification.scope == 'Grade':
+        classes = Class.objects.filter(
+            grade__in=notification.grade_target.all(), academic_year__is_active=True
+        )
+    else:
+        classes = notification.class_target.all()
+    classes = classes.values('id')
+
+    # Students of the classes, their parents, and the teachers assigned to them
+    return users.filter(
+        Q(studentprofile__studentenrollment__class_assigned__in=classes)
+        | Q(parentprofile__students__studentenrollment__class_assigned__in=classes)
+        | Q(teacherprofile__teacherassignment__class_assigned__in=classes)
+    ).values('id').distinct()
+
+
+def sync_deliveries(notification_id):
+    """
+    Bring the inbox rows of one notification in line with its audience: insert
+    missing deliveries in batches and drop those of users no longer targeted.
+    Read state of deliveries that stay is kept.
+    """
+    notification = Notification.objects.filter(pk=notification_id).first()
+    if notification is None:
+        return 0
+    deliveries = InboxDelivery.objects.filter(notification=notification)
+    if not notification.is_active:
+        deliveries.delete()
+        return 0
+
+    recipients = audience(notification)
+    deliveries.exclude(user_id__in=recipients).delete()
+
+    created = 0
+    batch = []
+    user_ids = []
+    for user_id in recipients.values_list('id', flat=True).iterator(chunk_size=BATCH_SIZE):
+        batch.append(InboxDelivery(user_id=user_id, notification=notification, created_at=notification.created_at))
+        user_ids.append(user_id)
+        if len(batch) >= BATCH_SIZE:
+            InboxDelivery.objects.bulk_create(batch, ignore_conflicts=True)
+            created += len(batch)
+            batch = []
+    InboxDelivery.objects.bulk_create(batch, ignore_conflicts=True)
+    # Live channels read the new rows, so wake them only once they are committed
+    transaction.on_commit(lambda: get_hub().publish(user_ids))
+    return created + len(batch)
+
+
+def _classes_by_user(user_ids):
+    # user id -> {(class id, grade id, class in the active year)}, through the same
+    # enrollments, parent links and teacher assignments audience() follows
+    classes = defaultdict(set)
+    for queryset, user in (
+        (StudentEnrollment.objects.filter(student__user__in=user_ids), 'student__user'),
+        (StudentEnrollment.objects.filter(student__parents__user__in=user_ids), 'student__parents__user'),
+        (TeacherAssignment.objects.filter(teacher__user__in=user_ids), 'teacher__user'),
+    ):
+        for user_id, class_id, grade_id, active in queryset.filter(class_assigned__isnull=False).values_list(
+            user, 'class_assigned_id', 'class_assigned__grade_id', 'class_assigned__academic_year__is_active'
+        ):
+            classes[user_id].add((class_id, grade_id, bool(active)))
+    return classes
+
+
+def sync_user_deliveries(user_ids):
+    """
+    The other side of sync_deliveries: bring the inboxes of ``user_ids`` in line
+    with the active notifications that target them, so a new user or a student
+    who joins a class sees the notices already sent. A fixed number of queries
+    per BATCH_SIZE users.
+    """
+    user_ids = list(user_ids)
+    created = 0
+    woken = []
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        batch = list(CustomUser.objects.filter(pk__in=user_ids[start:start + BATCH_SIZE], is_active=True)
+                     .values_list('id', flat=True))
+        classes = _classes_by_user(batch)
+        class_ids = {class_id for memberships in classes.values() for class_id, _, _ in memberships}
+        grade_ids = {grade_id for memberships in classes.values() for _, grade_id, active in memberships if active}
+
+        notifications = Notification.objects.filter(is_active=True)
+        school = list(notifications.filter(scope='School').values_list('id', flat=True))
+        by_class, by_grade = defaultdict(set), defaultdict(set)
+        for notification_id, class_id in notifications.filter(scope='Class', class_target__in=class_ids).values_list(
+            'id', 'class_target'
+        ):
+            by_class[class_id].add(notification_id)
+        for notification_id, grade_id in notifications.filter(scope='Grade', grade_target__in=grade_ids).values_list(
+            'id', 'grade_target'
+        ):
+            by_grade[grade_id].add(notification_id)
+
+        expected = {}
+        for user_id in batch:
+            targeted = set(school)
+            for class_id, grade_id, active in classes[user_id]:
+                targeted |= by_class[class_id]
+                if active:
+                    targeted |= by_grade[grade_id]
+            expected[user_id] = targeted
+
+        existing = defaultdict(set)
+        stale = []
+        for delivery_id, user_id, notification_id in InboxDelivery.objects.filter(
+            user__in=user_ids[start:start + BATCH_SIZE]
+        ).values_list('id', 'user_id', 'notification_id'):
+            if notification_id in expected.get(user_id, ()):
+                existing[user_id].add(notification_id)
+            else:
+                stale.append(delivery_id)
+        InboxDelivery.objects.filter(id__in=stale).delete()
+
+        missing = {user_id: targeted - existing[user_id] for user_id, targeted in expected.items()}
+        created_at = dict(
+            Notification.objects.filter(id__in=set().union(*missing.values())).values_list('id', 'created_at')
+        )
+        deliveries = [
+            InboxDelivery(user_id=user_id, notification_id=notification_id, created_at=created_at[notification_id])
+            for user_id, notification_ids in missing.items() for notification_id in notification_ids
+        ]
+        InboxDelivery.objects.bulk_create(deliveries, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        created += len(deliveries)
+        woken += [user_id for user_id, notification_ids in missing.items() if notification_ids]
+    transaction.on_commit(lambda: get_hub().publish(woken))
+    return created
+
+
+def _in_background():
+    # Set NOTIFICATION_FANOUT_ASYNC when a manage.py runworker process runs the job
+    # queue; otherwise the fan-out runs in the saving process once it commits
+    return getattr(settings, 'NOTIFICATION_FANOUT_ASYNC', False)
+
+
+def schedule_fan_out(notification):
+    # School-wide notices can touch every user, so with a worker the work goes to
+    # the job queue. The job row commits with the notification and its targets, so
+    # the worker never sees a half-saved audience. Saving a notification and its
+    # targets fires several signals; schedule only once per transaction.
+    if getattr(notification, '_fan_out_scheduled', False):
+        return
+    notification._fan_out_scheduled = True
+    notification_id = notification.pk
+    background = _in_background()
+    if background:
+        enqueue('communication.sync_deliveries', notification_id)
+
+    def done():
+        notification._fan_out_scheduled = False
+        if not background:
+            sync_deliveries(notification_id)
+
+    transaction.on_commit(done)
+
+
+def schedule_inbox_sync(user_ids):
+    """Sync the inboxes of ``user_ids`` once the current transaction commits (see schedule_fan_out)."""
+    user_ids = sorted(set(user_ids) - {None})
+    if not user_ids:
+        return
+    if _in_background():
+        enqueue('communication.sync_user_deliveries', user_ids)
+    else:
+        transaction.on_commit(lambda: sync_user_deliveries(user_ids))
@@ -0,0 +1,117 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import InboxDelivery
+
+PAGE_SIZE = 20
+
+# Live channels read on threads of their own. A stream waits up to minutes between
+# reads, and the connection of the request's thread (under WSGI, the worker's
+# own) is left to the request; each live read closes the connection of the pool
+# thread it ran on instead.
+_live_reads = ThreadPoolExecutor(thread_name_prefix='inbox-live')
+
+
+def inbox_queryset(user, before=None, unread_only=False, limit=PAGE_SIZE):
+    """
+    Newest deliveries first, as one range scan over (user, created_at, id).
+    ``before`` is the (created_at, id) cursor of the last row of the previous page.
+    """
+    deliveries = InboxDelivery.objects.filter(user=user)
+    if unread_only:
+        deliveries = deliveries.filter(read_at__isnull=True)
+    if before is not None:
+        created_at, delivery_id = before
+        deliveries = deliveries.filter(created_at__lte=created_at).exclude(
+            created_at=created_at, id__gte=delivery_id
+        )
+    return deliveries.select_related('notification').order_by('-created_at', '-id')[:limit]
+
+
+def inbox_page(user, before=None, unread_only=False, limit=PAGE_SIZE):
+    return list(inbox_queryset(user, before=before, unread_only=unread_only, limit=limit))
+
+
+def deliveries_after(user, cursor, limit=PAGE_SIZE):
+    """
+    Deliveries added after ``cursor`` (the id of the last delivery a live client
+    saw), oldest first. Ids follow insertion, so a notification retargeted onto
+    this user later still arrives even though its created_at is older.
+    """
+    return (
+        InboxDelivery.objects.filter(user=user, id__gt=cursor)
+        .select_related('notification').order_by('id')[:limit]
+    )
+
+
+def latest_cursor(user):
+    return InboxDelivery.objects.filter(user=user).aggregate(latest=Max('id'))['latest'] or 0
+
+
+def _read_deliveries_after(user, cursor):
+    try:
+        return list(deliveries_after(user, cursor))
+    finally:
+        connection.close()  # This pool thread's connection, idle until the next read
+
+
+async def aread_deliveries_after(user, cursor):
+    """deliveries_after as a list, read on a live channel thread."""
+    return await sync_to_async(_read_deliveries_after, thread_sensitive=False, executor=_live_reads)(
+        user, cursor
+    )
+
+
+async def alatest_cursor(user):
+    latest = await InboxDelivery.objects.filter(user=user).aaggregate(latest=Max('id'))
+    return latest['latest'] or 0
+
+
+def rendered_inbox(user, limit=PAGE_SIZE):
+    """
+    The newest deliveries for a page that then goes live, and the cursor to go live
+    from. The list stops at the cursor, so a delivery added between the two reads
+    arrives once, over the live channel, instead of twice or not at all.
+    """
+    cursor = latest_cursor(user)
+    deliveries = list(
+        InboxDelivery.objects.filter(user=user, id__lte=cursor)
+        .select_related('notification').order_by('-created_at', '-id')[:limit]
+    )
+    return deliveries, cursor
+
+
+def delivery_payload(delivery):
+    return {
+        'id': delivery.id,
+        'title': delivery.notification.title,
+        'message': delivery.notification.message,
+        'scope': delivery.notification.scope,
+        'created_at': delivery.created_at.isoformat(),
+        'read': delivery.read_at is not None,
+    }
+
+
+def rendered_inbox_payload(user):
+    """rendered_inbox for the JSON dashboards, so they list what the HTML pages do."""
+    deliveries, cursor = rendered_inbox(user)
+    return {'notifications': [delivery_payload(delivery) for delivery in deliveries], 'inbox_cursor': cursor}
+
+
+def unread_deliveries(user):
+    return InboxDelivery.objects.filter(user=user, read_at__isnull=True)
+
+
+def unread_count(user):
+    return unread_deliveries(user).count()
+
+
+def mark_read(user, delivery_ids=None):
+    deliveries = unread_deliveries(user)
+    if delivery_ids is not None:
+        deliveries = deliveries.filter(id__in=delivery_ids)
+    return deliveries.update(read_at=timezone.now())
@@ -0,0 +1,196 @@
+import asyncio
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.db.models import Max
+from django.utils.module_loading import import_string
+
+from core.caching import bump_version, get_versions
+
+from .models import InboxDelivery
+
+# Wake-ups for the live inbox channels (communication.views.inbox_stream and
+# inbox_poll). A hub only says "this user may have new deliveries"; the channel
+# then reads InboxDelivery rows after the client's cursor, so a missed or
+# spurious wake-up costs at most one indexed query and never loses a row.
+# Channels also re-check on every heartbeat, which bounds the delay when the
+# fan-out ran in a process the hub cannot reach.
+#
+# NOTIFICATION_HUB selects the implementation:
+#   communication.live.DatabaseHub  any processes sharing the database (default)
+#   communication.live.LocalHub     in-process; fan-out and channels share a process
+#   communication.live.CacheHub     several processes sharing CACHES (memcached/redis)
+
+LIVE_NAMESPACE = 'live-inbox'
+
+
+class LocalSubscription:
+    def __init__(self, hub, user_id):
+        self.hub = hub
+        self.user_id = user_id
+        self.event = asyncio.Event()
+        self.loop = None
+
+    async def __aenter__(self):
+        self.loop = asyncio.get_running_loop()
+        self.hub._add(self)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.hub._remove(self)
+
+    async def wait(self, timeout):
+        """True if woken before ``timeout`` seconds passed."""
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.event.clear()
+        return True
+
+    def wake(self):
+        # publish() may run on any thread; the event belongs to the subscriber's loop
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:
+            pass  # The loop closed while the subscription was leaving
+
+
+class LocalHub:
+    """Wakes the subscriptions of this process directly."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, user_id):
+        return LocalSubscription(self, user_id)
+
+    def _add(self, subscription):
+        with self._lock:
+            self._subscriptions[subscription.user_id].add(subscription)
+            self._subscribed()
+
+    def _subscribed(self):
+        # Called with the lock held
+        pass
+
+    def _remove(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def publish(self, user_ids):
+        with self._lock:
+            woken = [
+                subscription
+                for user_id in user_ids
+                for subscription in self._subscriptions.get(user_id, ())
+            ]
+        for subscription in woken:
+            subscription.wake()
+
+
+class DatabaseHub(LocalHub):
+    """
+    Works wherever the fan-out runs, since every process shares the database:
+    while this process has subscriptions, one thread reads the (id, user) of
+    deliveries added since its last look and wakes those users' subscriptions.
+    That is one query per poll interval for the whole process, not per channel.
+    """
+
+    def __init__(self, poll_interval=None):
+        super().__init__()
+        self.poll_interval = poll_interval or getattr(settings, 'NOTIFICATION_HUB_POLL_SECONDS', 1.0)
+        self._watching = False
+
+    def _subscribed(self):
+        if not self._watching:
+            self._watching = True
+            threading.Thread(target=self._watch, name='notification-hub', daemon=True).start()
+
+    def _idle(self):
+        with self._lock:
+            if not self._subscriptions:
+                self._watching = False
+            return not self._watching
+
+    def _watch(self):
+        try:
+            latest = InboxDelivery.objects.aggregate(latest=Max('id'))['latest'] or 0
+            while not self._idle():
+                time.sleep(self.poll_interval)
+                added = list(
+                    InboxDelivery.objects.filter(id__gt=latest).order_by('id').values_list('id', 'user_id')
+                )
+                if added:
+                    latest = added[-1][0]
+                    self.publish({user_id for _, user_id in added})
+        except Exception:
+            with self._lock:
+                self._watching = False  # The next subscription starts a new watcher
+            raise
+        finally:
+            connection.close()  # This thread's connection; the thread is ending
+
+
+class CacheSubscription:
+    def __init__(self, hub):
+        self.hub = hub
+        self.version = None
+
+    async def __aenter__(self):
+        (self.version,) = await sync_to_async(get_versions)(LIVE_NAMESPACE)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def wait(self, timeout):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(self.hub.poll_interval, remaining))
+            (version,) = await sync_to_async(get_versions)(LIVE_NAMESPACE)
+            if version != self.version:
+                self.version = version
+                return True
+
+
+class CacheHub:
+    """
+    For several worker processes: publishing bumps one version in the shared
+    cache, which every subscription polls. Any fan-out wakes every channel once,
+    which is cheap while notifications arrive minutes apart.
+    """
+
+    def __init__(self, poll_interval=None):
+        self.poll_interval = poll_interval or getattr(settings, 'NOTIFICATION_HUB_POLL_SECONDS', 1.0)
+
+    def subscribe(self, user_id):
+        return CacheSubscription(self)
+
+    def publish(self, user_ids):
+        bump_version(LIVE_NAMESPACE)
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_hub():
+    global _hub
+    with _hub_lock:
+        if _hub is None:
+            _hub = import_string(getattr(settings, 'NOTIFICATION_HUB', 'communication.live.DatabaseHub'))()
+        return _hub
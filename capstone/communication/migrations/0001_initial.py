@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('core', '0005_attendance_rollups'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InboxDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='core.notification')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox', to='users.customuser')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-created_at', '-id'], name='inbox_user_recent_idx'), models.Index(fields=['user', 'read_at'], name='inbox_user_unread_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'notification'), name='unique_inbox_delivery')],
+            },
+        ),
+    ]
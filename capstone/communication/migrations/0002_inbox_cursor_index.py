@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communication', '0001_initial'),
+        ('core', '0009_daily_attendance_bitmap'),
+        ('users', '0003_payroll'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inboxdelivery',
+            index=models.Index(fields=['user', 'id'], name='inbox_user_cursor_idx'),
+        ),
+    ]
@@ -1,3 +1,23 @@
 from django.db import models
 
-# Create your models here.
+# Per-user inbox rows, written once when a notification is activated (see
+# communication.fanout) so reading an inbox never has to resolve audiences.
+class InboxDelivery(models.Model):
+    user = models.ForeignKey('users.CustomUser', on_delete=models.CASCADE, related_name='inbox')
+    notification = models.ForeignKey('core.Notification', on_delete=models.CASCADE, related_name='deliveries')
+    created_at = models.DateTimeField()  # Copied from the notification so the inbox sorts without a join
+    read_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'notification'], name='unique_inbox_delivery'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='inbox_user_recent_idx'),
+            models.Index(fields=['user', 'read_at'], name='inbox_user_unread_idx'),
+            # Live channels resume from the last delivery id a client saw
+            models.Index(fields=['user', 'id'], name='inbox_user_cursor_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.notification.title} ({'read' if self.read_at else 'unread'})"
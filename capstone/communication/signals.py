@@ -0,0 +1,64 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Notification, StudentEnrollment, TeacherAssignment
+from users.models import CustomUser, ParentProfile, StudentProfile, TeacherProfile
+
+from .fanout import schedule_fan_out, schedule_inbox_sync
+
+
+@receiver(post_save, sender=Notification)
+def fan_out_notification(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_fan_out(instance)
+
+
+@receiver(m2m_changed, sender=Notification.class_target.through)
+@receiver(m2m_changed, sender=Notification.grade_target.through)
+def fan_out_retargeted_notification(sender, instance, action, reverse, **kwargs):
+    if not reverse and action in ('post_add', 'post_remove', 'post_clear'):
+        schedule_fan_out(instance)
+
+
+# The other direction: people who join the school or a class receive the notices
+# already sent to it
+
+def _family_user_ids(student_ids):
+    # A student's own account and their parents' accounts
+    return [
+        *StudentProfile.objects.filter(pk__in=student_ids).values_list('user_id', flat=True),
+        *ParentProfile.objects.filter(students__in=student_ids).values_list('user_id', flat=True),
+    ]
+
+
+@receiver(post_save, sender=CustomUser)
+def sync_new_user_inbox(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        schedule_inbox_sync([instance.pk])
+
+
+@receiver(post_save, sender=StudentEnrollment)
+@receiver(post_delete, sender=StudentEnrollment)
+def sync_enrolled_inboxes(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_inbox_sync(_family_user_ids([instance.student_id]))
+
+
+@receiver(post_save, sender=TeacherAssignment)
+@receiver(post_delete, sender=TeacherAssignment)
+def sync_teacher_inbox(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_inbox_sync(TeacherProfile.objects.filter(pk=instance.teacher_id).values_list('user_id', flat=True))
+
+
+@receiver(m2m_changed, sender=ParentProfile.students.through)
+def sync_parent_inboxes(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            schedule_inbox_sync([instance.user_id])
+    elif action == 'pre_clear':
+        instance._cleared_parents = list(instance.parents.values_list('user_id', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        schedule_inbox_sync(ParentProfile.objects.filter(pk__in=pk_set).values_list('user_id', flat=True))
+    elif action == 'post_clear':
+        schedule_inbox_sync(getattr(instance, '_cleared_parents', ()))
@@ -0,0 +1,13 @@
+from core.jobs import task
+
+from .fanout import sync_deliveries, sync_user_deliveries
+
+
+@task('communication.sync_deliveries')
+def sync_notification_deliveries(notification_id):
+    return {'delivered': sync_deliveries(notification_id)}
+
+
+@task('communication.sync_user_deliveries')
+def sync_user_inboxes(user_ids):
+    return {'delivered': sync_user_deliveries(user_ids)}
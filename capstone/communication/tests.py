@@ -1,3 +1,245 @@
-from django.test import TestCase
+import datetime
+import json
+import threading
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.db import connections
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core.models import AcademicYear, Class, Grade, Job, Notification, StudentEnrollment, Subject, TeacherAssignment
+from users.models import CustomUser, ParentProfile, StaffProfile, StudentProfile, TeacherProfile
+
+from . import views
+from .fanout import sync_user_deliveries
+from .inbox import aread_deliveries_after, deliveries_after, rendered_inbox
+from .live import LocalHub
+from .models import InboxDelivery
+
+FAST_HASHER = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+def get(view, user, **params):
+    request = RequestFactory().get('/', params)
+    request.user = user
+
+    async def auser():
+        return user
+
+    request.auser = auser
+    return view(request)
+
+
+async def aget(view, user, **params):
+    return await get(view, user, **params)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER, NOTIFICATION_FANOUT_ASYNC=False)
+class InboxCursorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create(username='student', password='x', role='student')
+        cls.other = CustomUser.objects.create(username='other', password='x', role='student')
+        cls.sender = StaffProfile.objects.get(
+            user=CustomUser.objects.create(username='office', password='x', role='staff')
+        )
+
+    def setUp(self):
+        # The default hub watches the table from a thread of its own, which can't
+        # see into the test's transaction
+        patcher = mock.patch.object(views, 'get_hub', return_value=LocalHub())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def deliver(self, user, created_at):
+        # Fan-out runs on commit, which a TestCase never reaches; deliver directly
+        notification = Notification.objects.create(title='Notice', message='m', scope='School', sender=self.sender)
+        return InboxDelivery.objects.create(user=user, notification=notification, created_at=created_at)
+
+    def test_pages_follow_the_cursor_through_ties(self):
+        start = timezone.now().replace(microsecond=0)
+        deliveries = [
+            self.deliver(self.user, start - datetime.timedelta(minutes=index // 3)) for index in range(45)
+        ]
+        self.deliver(self.other, start)
+        expected = [d.id for d in sorted(deliveries, key=lambda d: (d.created_at, d.id), reverse=True)]
+
+        seen, params = [], {}
+        while True:
+            payload = json.loads(get(views.inbox, self.user, **params).content)
+            seen += [notification['id'] for notification in payload['notifications']]
+            if payload['next'] is None:
+                break
+            self.assertRegex(payload['next'], r'^\d+-\d+$')
+            params = {'before': payload['next']}
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursors_are_rejected(self):
+        for value in ['abc', '12', '1-x', '9' * 30 + '-1']:
+            with self.subTest(value=value):
+                self.assertEqual(get(views.inbox, self.user, before=value).status_code, 400)
+        for value in ['abc', '-1']:
+            with self.subTest(value=value):
+                self.assertEqual(async_to_sync(aget)(views.inbox_poll, self.user, cursor=value).status_code, 400)
+
+    def test_rendered_inbox_stops_at_its_cursor(self):
+        now = timezone.now()
+        older = self.deliver(self.user, now)
+        self.deliver(self.other, now)
+        deliveries, cursor = rendered_inbox(self.user)
+        self.assertEqual(([d.id for d in deliveries], cursor), ([older.id], older.id))
+
+        # A notification retargeted onto the user later sorts among the old ones by
+        # date, but its id is past the cursor, so the live channel delivers it
+        late = self.deliver(self.user, now - datetime.timedelta(days=30))
+        self.assertEqual(list(deliveries_after(self.user, cursor)), [late])
+        self.assertEqual(list(deliveries_after(self.user, late.id)), [])
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER, NOTIFICATION_FANOUT_ASYNC=False)
+class LiveChannelTests(TransactionTestCase):
+    # Live reads run on threads of their own, which only see committed rows. The
+    # fan-out runs on commit here, delivering each school notice to every user
+
+    def setUp(self):
+        self.user = CustomUser.objects.create(username='student', password='x', role='student')
+        self.sender = StaffProfile.objects.get(
+            user=CustomUser.objects.create(username='office', password='x', role='staff')
+        )
+        patcher = mock.patch.object(views, 'get_hub', return_value=LocalHub())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_poll_resumes_after_the_cursor(self):
+        first = await self.adeliver(self.user)
+        payload = json.loads((await aget(views.inbox_poll, self.user)).content)
+        self.assertEqual(payload, {'notifications': [], 'cursor': first.id})
+
+        second = await self.adeliver(self.user)
+        payload = json.loads((await aget(views.inbox_poll, self.user, cursor=str(first.id))).content)
+        self.assertEqual([n['id'] for n in payload['notifications']], [second.id])
+        self.assertEqual(payload['cursor'], second.id)
+
+    async def test_stream_sends_deliveries_after_the_cursor(self):
+        first = await self.adeliver(self.user)
+        second = await self.adeliver(self.user)
+        events = views._events(self.user, first.id)
+        self.assertEqual(await anext(events), f'retry: {views.RETRY_MS}\n\n')
+        event = await anext(events)
+        await events.aclose()
+        self.assertTrue(event.startswith(f'id: {second.id}\nevent: notification\n'))
+        self.assertNotIn(f'id: {first.id}\n', event)
+
+    def test_reads_leave_the_request_threads_connection_open(self):
+        self.deliver(self.user)
+        closed_on = []
+        wrapper = type(connections['default'])
+        original = wrapper.close
+
+        def close(connection):
+            closed_on.append(threading.current_thread().name)
+            return original(connection)
+
+        with mock.patch.object(wrapper, 'close', close):
+            # As a WSGI server runs an async view: on the request's own thread
+            deliveries = async_to_sync(aread_deliveries_after)(self.user, 0)
+        self.assertEqual(len(deliveries), 1)
+        self.assertTrue(closed_on)
+        self.assertTrue(all(name.startswith('inbox-live') for name in closed_on), closed_on)
+
+    def deliver(self, user):
+        notification = Notification.objects.create(title='Notice', message='m', scope='School', sender=self.sender)
+        return InboxDelivery.objects.get(user=user, notification=notification)
+
+    async def adeliver(self, user):
+        notification = await Notification.objects.acreate(
+            title='Notice', message='m', scope='School', sender=self.sender
+        )
+        return await InboxDelivery.objects.aget(user=user, notification=notification)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER, NOTIFICATION_FANOUT_ASYNC=False)
+class InboxBackfillTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        year = AcademicYear.objects.create(year='2024-2025', is_active=True)
+        grade = Grade.objects.create(name='Grade 1')
+        cls.class_a = Class.objects.create(name='A', grade=grade, academic_year=year)
+        cls.class_b = Class.objects.create(name='B', grade=grade, academic_year=year)
+        cls.subject = Subject(name='Maths', grade=grade, academic_year=year)
+        cls.subject.save()
+        sender = StaffProfile.objects.get(user=CustomUser.objects.create(username='office', password='x', role='staff'))
+
+        def notice(title, scope='School', targets=(), **fields):
+            # Notification.save wants the targets of a class or grade notice first
+            notification = Notification.objects.create(title=title, message='m', sender=sender, **fields)
+            if scope != 'School':
+                getattr(notification, 'class_target' if scope == 'Class' else 'grade_target').set(targets)
+                Notification.objects.filter(pk=notification.pk).update(scope=scope)
+            return notification
+
+        cls.school = notice('School')
+        notice('Withdrawn', is_active=False)
+        notice('Class A', 'Class', [cls.class_a])
+        notice('Class B', 'Class', [cls.class_b])
+        notice('Grade 1', 'Grade', [grade])
+
+    def inbox(self, user):
+        return set(InboxDelivery.objects.filter(user=user).values_list('notification__title', flat=True))
+
+    def test_joining_the_school_or_a_class_delivers_earlier_notices(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            student = CustomUser.objects.create(username='student', password='x', role='student')
+        self.assertEqual(self.inbox(student), {'School'})
+        delivery = InboxDelivery.objects.get(user=student)
+        self.assertEqual(delivery.created_at, self.school.created_at)
+
+        profile = StudentProfile.objects.get(user=student)
+        with self.captureOnCommitCallbacks(execute=True):
+            enrollment = StudentEnrollment.objects.create(
+                student=profile, class_assigned=self.class_a, academic_year=self.class_a.academic_year
+            )
+        self.assertEqual(self.inbox(student), {'School', 'Class A', 'Grade 1'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            parent = CustomUser.objects.create(username='parent', password='x', role='parent')
+        with self.captureOnCommitCallbacks(execute=True):
+            ParentProfile.objects.get(user=parent).students.add(profile)
+        self.assertEqual(self.inbox(parent), {'School', 'Class A', 'Grade 1'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            enrollment.delete()
+        self.assertEqual(self.inbox(student), {'School'})
+        self.assertEqual(self.inbox(parent), {'School'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            teacher = CustomUser.objects.create(username='teacher', password='x', role='teacher')
+            TeacherAssignment.objects.create(
+                teacher=TeacherProfile.objects.get(user=teacher), subject=self.subject,
+                class_assigned=self.class_b, academic_year=self.class_b.academic_year,
+            )
+        self.assertEqual(self.inbox(teacher), {'School', 'Class B', 'Grade 1'})
+
+    def test_sync_queries_do_not_grow_with_users(self):
+        users = []
+        for index in range(5):
+            users.append(CustomUser.objects.create(username=f'user{index}', password='x', role='student'))
+            StudentEnrollment.objects.create(
+                student=StudentProfile.objects.get(user=users[-1]), class_assigned=self.class_a,
+                academic_year=self.class_a.academic_year,
+            )
+        with self.assertNumQueries(10):
+            self.assertEqual(sync_user_deliveries([users[0].pk]), 3)
+        with self.assertNumQueries(10):
+            self.assertEqual(sync_user_deliveries([user.pk for user in users[1:]]), 12)
+
+    @override_settings(NOTIFICATION_FANOUT_ASYNC=True)
+    def test_with_a_worker_the_sync_is_queued(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            user = CustomUser.objects.create(username='student', password='x', role='student')
+        self.assertEqual(self.inbox(user), set())
+        self.assertEqual(
+            list(Job.objects.filter(task='communication.sync_user_deliveries').values_list('args', flat=True)),
+            [[[user.pk]]],
+        )
@@ -0,0 +1,10 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('inbox/', views.inbox, name='inbox'),
+    path('inbox/feed/', views.inbox_feed, name='inbox-feed'),
+    path('inbox/stream/', views.inbox_stream, name='inbox-stream'),
+    path('inbox/poll/', views.inbox_poll, name='inbox-poll'),
+    path('inbox/read/', views.inbox_mark_read, name='inbox-mark-read'),
+]
@@ -1,3 +1,164 @@
-from django.shortcuts import render
+import asyncio
+import datetime
+import json
 
-# Create your views here.
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_POST
+
+from core.async_dashboard import fetch_rows
+
+from .inbox import (
+    PAGE_SIZE, alatest_cursor, aread_deliveries_after, delivery_payload, inbox_page, inbox_queryset, mark_read,
+    unread_count, unread_deliveries
+)
+from .live import get_hub
+
+# Live channels. A stream sends a comment line when idle for HEARTBEAT_SECONDS (so
+# proxies keep it open) and ends after STREAM_SECONDS; EventSource then reconnects
+# with Last-Event-ID, resuming where it left off.
+HEARTBEAT_SECONDS = 15
+STREAM_SECONDS = 300
+RETRY_MS = 2000
+LONG_POLL_SECONDS = 25
+
+
+# Page cursors are "<microseconds since the epoch>-<delivery id>", which needs no
+# URL encoding when a client appends it to the query string
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def _cursor(delivery):
+    return f'{(delivery.created_at - EPOCH) // datetime.timedelta(microseconds=1)}-{delivery.id}'
+
+
+def _parse_cursor(value):
+    microseconds, _, delivery_id = value.rpartition('-')
+    return EPOCH + datetime.timedelta(microseconds=int(microseconds)), int(delivery_id)
+
+
+def _live_cursor(value):
+    # The id of the last delivery the client saw; None to start from now
+    if not value:
+        return None
+    cursor = int(value)
+    if cursor < 0:
+        raise ValueError(value)
+    return cursor
+
+
+def _inbox_payload(deliveries, unread):
+    return {
+        'unread': unread,
+        'notifications': [delivery_payload(delivery) for delivery in deliveries],
+        'next': _cursor(deliveries[-1]) if len(deliveries) == PAGE_SIZE else None,
+    }
+
+
+@login_required(login_url='/core/sign-in/')
+def inbox(request):
+    # ?before=<cursor from the previous page>&unread=1
+    try:
+        before = _parse_cursor(request.GET['before']) if request.GET.get('before') else None
+    except (ValueError, OverflowError):
+        return JsonResponse({'error': 'Invalid cursor.'}, status=400)
+
+    deliveries = inbox_page(request.user, before=before, unread_only=request.GET.get('unread') == '1')
+    return JsonResponse(_inbox_payload(deliveries, unread_count(request.user)))
+
+
+@login_required(login_url='/core/sign-in/')
+async def inbox_feed(request):
+    # Async inbox for ASGI deployments; same parameters and payload as inbox
+    try:
+        before = _parse_cursor(request.GET['before']) if request.GET.get('before') else None
+    except (ValueError, OverflowError):
+        return JsonResponse({'error': 'Invalid cursor.'}, status=400)
+
+    user = await request.auser()
+    page = inbox_queryset(user, before=before, unread_only=request.GET.get('unread') == '1')
+    # The async ORM runs one query at a time; awaiting both together gains nothing
+    deliveries = await fetch_rows(page)
+    unread = await unread_deliveries(user).acount()
+    return JsonResponse(_inbox_payload(deliveries, unread))
+
+
+async def _events(user, cursor):
+    loop = asyncio.get_running_loop()
+    closes_at = loop.time() + STREAM_SECONDS
+    yield f'retry: {RETRY_MS}\n\n'
+    async with get_hub().subscribe(user.id) as subscription:
+        while True:
+            deliveries = await aread_deliveries_after(user, cursor)
+            for delivery in deliveries:
+                cursor = delivery.id
+                yield f'id: {cursor}\nevent: notification\ndata: {json.dumps(delivery_payload(delivery))}\n\n'
+            if len(deliveries) == PAGE_SIZE:
+                continue
+            remaining = closes_at - loop.time()
+            if remaining <= 0:
+                return
+            if not await subscription.wait(min(HEARTBEAT_SECONDS, remaining)):
+                yield ': keep-alive\n\n'
+
+
+@login_required(login_url='/core/sign-in/')
+async def inbox_stream(request):
+    # Server-sent events of new inbox deliveries, for ASGI deployments (a WSGI server
+    # would hold a thread per open stream; use inbox_poll there). Resumes after the
+    # Last-Event-ID header or ?cursor=, otherwise starts from the newest delivery.
+    try:
+        cursor = _live_cursor(request.headers.get('Last-Event-ID') or request.GET.get('cursor'))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid cursor.'}, status=400)
+
+    user = await request.auser()
+    if cursor is None:
+        cursor = await alatest_cursor(user)
+    response = StreamingHttpResponse(_events(user, cursor), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Stop nginx buffering the stream
+    return response
+
+
+@login_required(login_url='/core/sign-in/')
+async def inbox_poll(request):
+    # Long-poll fallback: ?cursor=<last delivery id>. Answers at once with anything
+    # newer, otherwise waits up to LONG_POLL_SECONDS for it. Without a cursor it
+    # answers immediately with the current one.
+    try:
+        cursor = _live_cursor(request.GET.get('cursor'))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid cursor.'}, status=400)
+
+    user = await request.auser()
+    deliveries = []
+    if cursor is None:
+        cursor = await alatest_cursor(user)
+    else:
+        async with get_hub().subscribe(user.id) as subscription:
+            deliveries = await aread_deliveries_after(user, cursor)
+            if not deliveries:
+                # Checked again even without a wake-up, in case the fan-out ran elsewhere
+                await subscription.wait(LONG_POLL_SECONDS)
+                deliveries = await aread_deliveries_after(user, cursor)
+    return JsonResponse({
+        'notifications': [delivery_payload(delivery) for delivery in deliveries],
+        'cursor': deliveries[-1].id if deliveries else cursor,
+    })
+
+
+@login_required(login_url='/core/sign-in/')
+@require_POST
+def inbox_mark_read(request):
+    # Body: {"ids": [...]} to mark some deliveries, or {} to mark everything read
+    try:
+        ids = json.loads(request.body or '{}').get('ids')
+    except (ValueError, AttributeError):
+        return JsonResponse({'error': 'Expected a JSON object.'}, status=400)
+    if ids is not None and not (
+        isinstance(ids, list) and all(isinstance(i, int) and not isinstance(i, bool) for i in ids)
+    ):
+        return JsonResponse({'error': 'ids must be a list of delivery ids.'}, status=400)
+    updated = mark_read(request.user, ids)
+    return JsonResponse({'marked': updated, 'unread': unread_count(request.user)})
@@ -1,77 +1,142 @@
 from django.contrib import admin
-from .models import AcademicYear, Grade, Class, Subject, Schedule, TeacherAssignment, StudentEnrollment, Attendance, Exam, ExamGrade, Fees, Notification, TeacherDailyAttendance, StaffDailyAttendance
-
-class AcademicYearAdmin(admin.ModelAdmin):
+from django.utils import timezone
+from .admin_base import CoreModelAdmin
+from .exports import export_for_model, export_response
+from .search import IndexedSearchMixin
+from finance.admin import FeeStatusFilter, FeeTransactionInline, save_fee_transactions
+from finance.ledger import with_balance
+from .models import AcademicYear, Grade, Class, Subject, Schedule, TeacherAssignment, StudentEnrollment, Attendance, Exam, ExamGrade, Fees, Notification, TeacherDailyAttendance, StaffDailyAttendance, Job
+
+@admin.action(description='Export selected rows as CSV')
+def export_as_csv(modeladmin, request, queryset):
+    return export_response(export_for_model(queryset.model), queryset, 'csv')
+
+@admin.action(description='Export selected rows as XLSX')
+def export_as_xlsx(modeladmin, request, queryset):
+    return export_response(export_for_model(queryset.model), queryset, 'xlsx')
+
+class AcademicYearAdmin(CoreModelAdmin):
     list_display = ['year', 'is_active']
     search_fields = ['year']
 
-class GradeAdmin(admin.ModelAdmin):
+class GradeAdmin(CoreModelAdmin):
     list_display = ['name']
     search_fields = ['name']
 
-class ClassAdmin(admin.ModelAdmin):
+class ClassAdmin(IndexedSearchMixin, CoreModelAdmin):
     list_display = ['name', 'grade', 'academic_year', 'is_active']
     search_fields = ['name']
+    search_index = {'class': 'pk'}
     list_filter = ['grade', 'academic_year', 'is_active']
 
-class SubjectAdmin(admin.ModelAdmin):
+class SubjectAdmin(IndexedSearchMixin, CoreModelAdmin):
     list_display = ['name', 'grade', 'academic_year', 'is_active']
     search_fields = ['name']
+    search_index = {'subject': 'pk'}
     list_filter = ['grade', 'academic_year', 'is_active']
 
-class ScheduleAdmin(admin.ModelAdmin):
+class ScheduleAdmin(CoreModelAdmin):
     list_display = ['class_instance', 'section', 'subject', 'day_of_week']
     search_fields = ['class_instance__name', 'subject__name']
     list_filter = ['day_of_week']
+    autocomplete_fields = ['class_instance', 'subject']
 
-class TeacherAssignmentAdmin(admin.ModelAdmin):
+class TeacherAssignmentAdmin(CoreModelAdmin):
     list_display = ['teacher', 'subject', 'class_assigned', 'academic_year']
     search_fields = ['teacher__user__username', 'subject__name']
     list_filter = ['academic_year']
+    autocomplete_fields = ['teacher', 'subject', 'class_assigned']
 
-class StudentEnrollmentAdmin(admin.ModelAdmin):
+class StudentEnrollmentAdmin(CoreModelAdmin):
     list_display = ['student', 'class_assigned', 'academic_year']
     search_fields = ['student__user__username']
     list_filter = ['academic_year']
+    raw_id_fields = ['student']
+    autocomplete_fields = ['class_assigned']
 
-class AttendanceAdmin(admin.ModelAdmin):
+class AttendanceAdmin(CoreModelAdmin):
     list_display = ['student', 'subject', 'date', 'status', 'academic_year']
     search_fields = ['student__user__username', 'subject__name']
-    list_filter = ['date', 'status']
+    list_filter = ['status', 'academic_year']
+    date_hierarchy = 'date'
+    raw_id_fields = ['student']
+    autocomplete_fields = ['subject']
+    actions = [export_as_csv, export_as_xlsx]
 
-class ExamAdmin(admin.ModelAdmin):
+class ExamAdmin(CoreModelAdmin):
     list_display = ['name', 'subject', 'class_assigned', 'exam_date', 'academic_year']
     search_fields = ['name', 'subject__name']
-    list_filter = ['exam_date', 'academic_year']
+    list_filter = ['academic_year']
+    date_hierarchy = 'exam_date'
+    autocomplete_fields = ['subject', 'class_assigned']
 
-class ExamGradeAdmin(admin.ModelAdmin):
+class ExamGradeAdmin(IndexedSearchMixin, CoreModelAdmin):
     list_display = ['student', 'exam', 'subject', 'grade', 'academic_year']
     search_fields = ['student__user__username', 'exam__name', 'subject__name']
+    search_index = {'user': 'student__user', 'subject': 'subject'}
+    search_index_fields = ['exam__name']
     list_filter = ['academic_year']
+    raw_id_fields = ['student']
+    autocomplete_fields = ['exam', 'subject']
+    actions = [export_as_csv, export_as_xlsx]
 
-class FeesAdmin(admin.ModelAdmin):
-    list_display = ['student', 'amount_due', 'amount_paid', 'due_date', 'fee_status', 'academic_year']
+class FeesAdmin(CoreModelAdmin):
+    list_display = ['student', 'amount_due', 'amount_paid', 'outstanding', 'due_date', 'fee_status', 'academic_year']
     search_fields = ['student__user__username']
-    list_filter = ['academic_year']
+    list_filter = [FeeStatusFilter, 'academic_year']
+    raw_id_fields = ['student']
+    readonly_fields = ['amount_paid']  # Moved by recording transactions below
+    inlines = [FeeTransactionInline]
+    actions = [export_as_csv, export_as_xlsx]
+
+    def get_queryset(self, request):
+        return with_balance(super().get_queryset(request))
+
+    def save_formset(self, request, form, formset, change):
+        if formset.model is FeeTransactionInline.model:
+            save_fee_transactions(request, formset)
+        else:
+            super().save_formset(request, form, formset, change)
+
+    def outstanding(self, obj):
+        return obj.outstanding
+    outstanding.admin_order_field = 'outstanding'
 
     def fee_status(self, obj):
-        return obj.fee_status
-    fee_status.admin_order_field = 'fee_status'
+        return obj.status
+    fee_status.admin_order_field = 'status'
 
-class NotificationAdmin(admin.ModelAdmin):
+class NotificationAdmin(IndexedSearchMixin, CoreModelAdmin):
     list_display = ['title', 'sender', 'scope', 'is_active', 'created_at']
     search_fields = ['title', 'message']
+    search_index = {'notification': 'pk'}
     list_filter = ['scope', 'is_active']
+    date_hierarchy = 'created_at'
+    autocomplete_fields = ['sender', 'class_target', 'grade_target']
 
-class TeacherDailyAttendanceAdmin(admin.ModelAdmin):
+class TeacherDailyAttendanceAdmin(CoreModelAdmin):
     list_display = ['date', 'teacher', 'status']
     search_fields = ['teacher__user__username']
-    list_filter = ['date', 'status']
+    list_filter = ['status']
+    date_hierarchy = 'date'
+    autocomplete_fields = ['teacher']
 
-class StaffDailyAttendanceAdmin(admin.ModelAdmin):
+class StaffDailyAttendanceAdmin(CoreModelAdmin):
     list_display = ['date', 'staff', 'status']
     search_fields = ['staff__user__username']
-    list_filter = ['date', 'status']
+    list_filter = ['status']
+    date_hierarchy = 'date'
+    autocomplete_fields = ['staff']
+
+@admin.action(description='Retry selected jobs')
+def retry_jobs(modeladmin, request, queryset):
+    queryset.exclude(status='running').update(status='queued', attempts=0, run_at=timezone.now())
+
+class JobAdmin(CoreModelAdmin):
+    list_display = ['id', 'task', 'status', 'attempts', 'run_at', 'created_at', 'finished_at']
+    list_filter = ['status', 'task']
+    readonly_fields = ['result', 'last_error']
+    actions = [retry_jobs]
 
 # Register models
 admin.site.register(AcademicYear, AcademicYearAdmin)
@@ -88,3 +153,4 @@ admin.site.register(Fees, FeesAdmin)
 admin.site.register(Notification, NotificationAdmin)
 admin.site.register(TeacherDailyAttendance, TeacherDailyAttendanceAdmin)
 admin.site.register(StaffDailyAttendance, StaffDailyAttendanceAdmin)
+admin.site.register(Job, JobAdmin)
\ No newline at end of file
@@ -0,0 +1,137 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
+from django.utils.functional import cached_property
+
+from core.caching import bump_version, bump_versions, versioned_key
+
+# Shared base for the school's ModelAdmins. A changelist page otherwise costs one
+# query per foreign key per row (each FK column renders the related object's
+# __str__, which itself follows more FKs) plus an exact COUNT(*) of the table,
+# twice when filtered.
+
+# What each model's __str__ reads beyond its own columns, so a list_display column
+# showing one of them can join everything it needs
+STR_SELECT_RELATED = {
+    'core.Class': ['grade', 'academic_year'],
+    'core.Subject': ['grade', 'academic_year'],
+    'core.Exam': ['subject', 'class_assigned', 'academic_year'],
+    'core.Notification': ['sender__user'],
+    'users.AdminProfile': ['user'],
+    'users.StaffProfile': ['user'],
+    'users.TeacherProfile': ['user'],
+    'users.StudentProfile': ['user'],
+    'users.ParentProfile': ['user'],
+}
+
+# Tables smaller than this are counted exactly; planner estimates are rough for tiny tables
+ESTIMATE_THRESHOLD = 10000
+
+
+def count_namespace(model):
+    # Bumped whenever a row of the model is saved or deleted, which may change a count
+    return f'admin-count:{model._meta.label_lower}'
+
+
+def _invalidate_counts(sender, **kwargs):
+    bump_version(count_namespace(sender))
+
+
+def invalidate_counts(*models):
+    # For bulk writes, which send no post_save or post_delete
+    bump_versions(count_namespace(model) for model in models)
+
+
+def connect_count_invalidation(site=admin.site):
+    """
+    Recount a CoreModelAdmin changelist whenever a row of its model is saved or
+    deleted. Called once from CoreConfig.ready, after the admin modules are loaded.
+    """
+    for model, model_admin in site._registry.items():
+        if isinstance(model_admin, CoreModelAdmin):
+            for signal in (post_save, post_delete):
+                signal.connect(_invalidate_counts, sender=model, dispatch_uid=count_namespace(model))
+
+
+def _estimated_rows(model):
+    # Planner statistics instead of a full count; only available on PostgreSQL
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    return row[0] if row and row[0] > 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for large changelists. The unfiltered total on PostgreSQL comes from
+    table statistics; any other count is cached briefly per query, so paging
+    through a filtered list counts it once instead of on every page. The cached
+    count is keyed by the model's count namespace, so adding or deleting a row
+    (through the admin or any other save) recounts at once.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            estimate = _estimated_rows(queryset.model)
+            if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+                return estimate
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        digest = hashlib.md5(f'{queryset.model._meta.label}:{sql}:{params}'.encode()).hexdigest()
+        key = versioned_key(f'admin:count:{digest}', count_namespace(queryset.model))
+        total = cache.get(key)
+        if total is None:
+            total = queryset.count()
+            cache.set(key, total, getattr(settings, 'ADMIN_COUNT_CACHE_TIMEOUT', 60))
+        return total
+
+
+class CoreModelAdmin(admin.ModelAdmin):
+    """
+    ModelAdmin whose changelist joins the related rows its list_display renders
+    (unless list_select_related is set explicitly), counts through
+    EstimatedCountPaginator and skips the second, unfiltered count. Other admin
+    pages join what the model's own __str__ reads.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # The changelist leaves list_select_related alone once a queryset has joins, so
+        # the list columns are joined here along with what this model's own __str__
+        # reads (change forms, delete pages, autocomplete results)
+        queryset = super().get_queryset(request)
+        related = self.get_list_select_related(request)
+        if related is True:
+            queryset = queryset.select_related()
+        else:
+            paths = list(related or []) + STR_SELECT_RELATED.get(self.model._meta.label, [])
+            if paths:
+                queryset = queryset.select_related(*paths)
+        return queryset if queryset.ordered else queryset.order_by('pk')
+
+    def get_list_select_related(self, request):
+        if self.list_select_related:
+            return self.list_select_related
+        related = []
+        for name in self.get_list_display(request):
+            try:
+                field = self.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if field.concrete and (field.many_to_one or field.one_to_one):
+                related.append(name)
+                related.extend(
+                    f'{name}__{path}' for path in STR_SELECT_RELATED.get(field.related_model._meta.label, [])
+                )
+        return related or False
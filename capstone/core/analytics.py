@@ -0,0 +1,209 @@
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+
+from capstone.routers import primary_reads
+from core.caching import cache_timeout, versioned_key
+from core.models import ExamGrade
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency; only the analytics need it
+    np = None
+
+# Exam grade statistics. Grades are loaded as NumPy columns with one values_list
+# query, and every group (exam, class, grade, subject, year) is summarised in a
+# single sorted pass: a lexsort by (group, value) makes each group a contiguous,
+# ordered run, so counts, sums, percentiles and competition ranks come from
+# reduceat/searchsorted over the whole array instead of a Python loop per group.
+# Results are cached under the version of the exam or academic year, which
+# core.signals bumps whenever a grade in it changes.
+
+PERCENTILES = (10, 25, 50, 75, 90)
+HISTOGRAM_BINS = np.linspace(0, 100, 11) if np is not None else None  # 0-10, 10-20, ..., 90-100
+ANALYTICS_CACHE_TIMEOUT = 3600
+
+
+def exam_namespace(exam_id):
+    return f'exam:{exam_id}'
+
+
+def year_grades_namespace(academic_year_id):
+    return f'exam_grades:{academic_year_id}'
+
+
+def _require_numpy():
+    if np is None:
+        raise ImproperlyConfigured('Exam analytics need NumPy; install it with "pip install numpy".')
+
+
+COLUMNS = {
+    'student': 'student_id',
+    'exam': 'exam_id',
+    'subject': 'subject_id',
+    'class': 'exam__class_assigned_id',
+    'grade_level': 'exam__class_assigned__grade_id',
+}
+
+
+def load_grades(queryset):
+    """ExamGrade rows with a mark as a dict of NumPy columns (ids as int64, -1 for NULL)."""
+    _require_numpy()
+    rows = list(
+        queryset.filter(grade__isnull=False, student__isnull=False)
+        .values_list(*COLUMNS.values(), 'grade')
+    )
+    columns = list(zip(*rows)) or [()] * (len(COLUMNS) + 1)
+    frame = {
+        name: np.array([-1 if value is None else value for value in column], dtype=np.int64)
+        for name, column in zip(COLUMNS, columns)
+    }
+    frame['grade'] = np.array(columns[-1], dtype=np.float64)
+    return frame
+
+
+class GroupStats:
+    """
+    Statistics of ``values`` grouped by ``keys``, computed in one sorted pass.
+    ``summaries()`` gives one dict per group; ``rank``/``percentile`` are per input
+    row (competition rank within its group, 1 = best; share of the group below it).
+    """
+
+    def __init__(self, keys, values):
+        self.group_ids, inverse = np.unique(keys, return_inverse=True)
+        order = np.lexsort((values, inverse))
+        self.sorted_values = values[order]
+        sorted_groups = inverse[order]
+        self.starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]]) if len(keys) else np.empty(0, dtype=np.int64)
+        self.counts = np.diff(np.r_[self.starts, len(values)])
+        ends = self.starts + self.counts
+
+        sums = np.add.reduceat(self.sorted_values, self.starts) if len(keys) else np.empty(0)
+        squares = np.add.reduceat(self.sorted_values ** 2, self.starts) if len(keys) else np.empty(0)
+        self.means = sums / np.maximum(self.counts, 1)
+        # Population standard deviation of each group
+        self.stds = np.sqrt(np.maximum(squares / np.maximum(self.counts, 1) - self.means ** 2, 0))
+
+        # Scores compare in hundredths (grades have two decimals), so (group, score) packs
+        # into one sortable integer and ties are exact even for averaged scores
+        composite = sorted_groups * 100_000 + np.rint(self.sorted_values * 100).astype(np.int64)
+        row_composite = inverse * 100_000 + np.rint(values * 100).astype(np.int64)
+        below = np.searchsorted(composite, row_composite, side='left') - self.starts[inverse]
+        above = ends[inverse] - np.searchsorted(composite, row_composite, side='right')
+        self.rank = above + 1
+        self.percentile = 100.0 * below / self.counts[inverse]
+
+        bins = np.clip(np.digitize(values, HISTOGRAM_BINS[1:-1]), 0, len(HISTOGRAM_BINS) - 2)
+        self.histograms = np.bincount(
+            inverse * (len(HISTOGRAM_BINS) - 1) + bins, minlength=len(self.group_ids) * (len(HISTOGRAM_BINS) - 1)
+        ).reshape(len(self.group_ids), len(HISTOGRAM_BINS) - 1)
+
+    def _percentiles(self, p):
+        # Linear interpolation inside each group's sorted run, vectorised across groups
+        position = self.starts + (self.counts - 1) * (p / 100)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, self.starts + self.counts - 1)
+        fraction = position - lower
+        return self.sorted_values[lower] * (1 - fraction) + self.sorted_values[upper] * fraction
+
+    def summaries(self):
+        if not len(self.group_ids):
+            return {}
+        percentiles = {p: self._percentiles(p) for p in PERCENTILES}
+        minimums = self.sorted_values[self.starts]
+        maximums = self.sorted_values[self.starts + self.counts - 1]
+        return {
+            int(group_id): {
+                'count': int(self.counts[index]),
+                'mean': round(float(self.means[index]), 2),
+                'median': round(float(percentiles[50][index]), 2),
+                'stdev': round(float(self.stds[index]), 2),
+                'min': float(minimums[index]),
+                'max': float(maximums[index]),
+                'percentiles': {p: round(float(values[index]), 2) for p, values in percentiles.items()},
+                'histogram': self.histograms[index].tolist(),
+            }
+            for index, group_id in enumerate(self.group_ids)
+        }
+
+
+def _student_averages(frame, scope):
+    # Mean grade per (scope, student), the basis for class/grade/year rankings
+    pairs, inverse = np.unique(np.stack([frame[scope], frame['student']], axis=1), axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    averages = np.bincount(inverse, weights=frame['grade']) / np.bincount(inverse)
+    return pairs[:, 0], pairs[:, 1], averages
+
+
+def _rankings(scope_ids, student_ids, values, stats):
+    rankings = {}
+    for index in np.lexsort((student_ids, stats.rank, scope_ids)):
+        rankings.setdefault(int(scope_ids[index]), []).append({
+            'student': int(student_ids[index]),
+            'score': round(float(values[index]), 2),
+            'rank': int(stats.rank[index]),
+            'percentile': round(float(stats.percentile[index]), 1),
+        })
+    return rankings
+
+
+def compute_exam_statistics(exam):
+    frame = load_grades(ExamGrade.objects.filter(exam=exam))
+    stats = GroupStats(frame['exam'], frame['grade'])
+    summary = stats.summaries().get(exam.id)
+    if summary is None:
+        return None
+    summary['ranking'] = _rankings(frame['exam'], frame['student'], frame['grade'], stats)[exam.id]
+    return summary
+
+
+def compute_year_statistics(academic_year):
+    """
+    Summaries for every exam, subject, class, grade level and the whole year,
+    plus each student's average and rank within their class, grade level and
+    year, from one query and one vectorised pass per scope.
+    """
+    frame = load_grades(ExamGrade.objects.filter(academic_year=academic_year))
+    result = {
+        scope: GroupStats(frame[scope], frame['grade']).summaries()
+        for scope in ('exam', 'subject', 'class', 'grade_level')
+    }
+    year_keys = np.zeros(len(frame['grade']), dtype=np.int64)
+    result['year'] = GroupStats(year_keys, frame['grade']).summaries().get(0)
+
+    students = {}
+    for scope in ('class', 'grade_level', 'year'):
+        if scope == 'year':
+            frame['year'] = year_keys
+        scope_ids, student_ids, averages = _student_averages(frame, scope)
+        stats = GroupStats(scope_ids, averages)
+        sizes = stats.counts[np.searchsorted(stats.group_ids, scope_ids)]
+        rows = zip(
+            student_ids.tolist(), scope_ids.tolist(), averages.round(2).tolist(),
+            stats.rank.tolist(), sizes.tolist(), stats.percentile.round(1).tolist(),
+        )
+        for student_id, scope_id, average, rank, size, percentile in rows:
+            students.setdefault(student_id, {})[scope] = {
+                'id': scope_id if scope != 'year' else None,
+                'average': average, 'rank': rank, 'of': size, 'percentile': percentile,
+            }
+    result['students'] = students
+    return result
+
+
+def _cached(key, compute):
+    result = cache.get(key)
+    if result is None:
+        with primary_reads():
+            result = compute()
+        cache.set(key, result, cache_timeout('ANALYTICS_CACHE_TIMEOUT', ANALYTICS_CACHE_TIMEOUT))
+    return result
+
+
+def exam_statistics(exam):
+    key = versioned_key(f'analytics:exam:{exam.id}', exam_namespace(exam.id))
+    return _cached(key, lambda: compute_exam_statistics(exam))
+
+
+def year_statistics(academic_year):
+    key = versioned_key(f'analytics:year:{academic_year.id}', year_grades_namespace(academic_year.id))
+    return _cached(key, lambda: compute_year_statistics(academic_year))
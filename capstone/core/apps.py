@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        import core.signals
+
+        # django.contrib.admin comes first in INSTALLED_APPS, so the admin modules
+        # have been autodiscovered by now
+        from core.admin_base import connect_count_invalidation
+        connect_count_invalidation()
@@ -0,0 +1,74 @@
+import datetime
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+from capstone.routers import primary_reads
+from core.caching import cache_timeout
+from core.dashboard import (
+    EMPTY_TEACHER_DASHBOARD, apply_attendance_progress, attendance_progress_queryset, evaluate_querysets,
+    student_dashboard_cache_key, student_dashboard_payload, student_dashboard_querysets, student_enrollment,
+    teacher_dashboard_cache_key, teacher_dashboard_payload, teacher_dashboard_querysets
+)
+from core.reference import get_active_academic_year
+
+# Async counterparts of the core.dashboard loaders for the ASGI endpoints. They
+# return the same payloads under the same cache keys. The async ORM runs queries
+# one at a time on a single thread, so a dashboard's queries are evaluated together
+# in one hop to that thread rather than awaited one by one; while they run, the
+# worker's event loop serves other requests instead of holding a thread.
+
+
+async def fetch_rows(queryset):
+    # Evaluated on the ORM's async path; None for a part that does not apply
+    if queryset is None:
+        return None
+    return [row async for row in queryset]
+
+
+async def evaluate_rows(querysets):
+    """evaluate_querysets off the event loop."""
+    return await sync_to_async(evaluate_querysets)(querysets)
+
+
+async def abuild_student_dashboard(student_profile):
+    academic_year = await sync_to_async(get_active_academic_year)()
+    enrollment = None
+    if academic_year is not None:
+        enrollment = await student_enrollment(student_profile, academic_year).afirst()
+    class_instance = enrollment.class_assigned if enrollment else None
+    if class_instance is None:
+        academic_year = None
+
+    rows = await evaluate_rows(student_dashboard_querysets(student_profile, class_instance, academic_year))
+    return student_dashboard_payload(class_instance, rows)
+
+
+async def aget_student_dashboard(student_profile):
+    key = await sync_to_async(student_dashboard_cache_key)(student_profile.id)
+    payload = await cache.aget(key)
+    if payload is None:
+        with primary_reads():
+            payload = await abuild_student_dashboard(student_profile)
+        await cache.aset(key, payload, cache_timeout('DASHBOARD_CACHE_TIMEOUT', 300))
+    return payload
+
+
+async def abuild_teacher_dashboard(teacher_profile, today):
+    academic_year = await sync_to_async(get_active_academic_year)()
+    if academic_year is None:
+        return EMPTY_TEACHER_DASHBOARD
+    rows = await evaluate_rows(teacher_dashboard_querysets(teacher_profile, academic_year))
+    return teacher_dashboard_payload(rows, today)
+
+
+async def aget_teacher_dashboard(teacher_profile, today=None):
+    today = today or datetime.date.today()
+    key = await sync_to_async(teacher_dashboard_cache_key)(teacher_profile.id, today)
+    payload = await cache.aget(key)
+    if payload is None:
+        with primary_reads():
+            payload = await abuild_teacher_dashboard(teacher_profile, today)
+        await cache.aset(key, payload, cache_timeout('DASHBOARD_CACHE_TIMEOUT', 300))
+    progress = await fetch_rows(attendance_progress_queryset(payload, today))
+    return apply_attendance_progress(payload, progress or [])
@@ -0,0 +1,70 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from core.admin_base import invalidate_counts
+from core.caching import bump_versions
+from core.dashboard import student_namespace
+from core.models import Attendance, StudentEnrollment
+from core.rollups import refresh_rollups
+
+ATTENDANCE_STATUSES = {choice for choice, _ in Attendance._meta.get_field('status').choices}
+
+
+def class_roster(class_instance, academic_year):
+    return list(
+        StudentEnrollment.objects.filter(class_assigned=class_instance, academic_year=academic_year)
+        .values_list('student_id', flat=True)
+    )
+
+
+def record_roll_call(class_instance, subject, date, statuses, default_status=None):
+    """
+    Write a whole class's attendance for one subject and day as a single upsert.
+
+    ``statuses`` maps student profile ids to 'Present'/'Absent'. Enrolled students
+    missing from it get ``default_status``, or are left untouched when that is None.
+    Returns the list of student ids that were marked.
+    """
+    academic_year = class_instance.academic_year
+    if subject.grade_id != class_instance.grade_id:
+        raise ValidationError(f"{subject.name} is not taught in {class_instance.name}.")
+    if default_status is not None and default_status not in ATTENDANCE_STATUSES:
+        raise ValidationError(f"Invalid attendance status: {default_status}")
+
+    roster = class_roster(class_instance, academic_year)
+    enrolled = set(roster)
+    unknown = set(statuses) - enrolled
+    if unknown:
+        raise ValidationError(
+            f"Students {sorted(unknown)} are not enrolled in {class_instance.name}."
+        )
+
+    records = []
+    for student_id in roster:
+        status = statuses.get(student_id, default_status)
+        if status is None:
+            continue
+        if status not in ATTENDANCE_STATUSES:
+            raise ValidationError(f"Invalid attendance status: {status}")
+        records.append(Attendance(
+            student_id=student_id,
+            subject=subject,
+            date=date,
+            status=status,
+            academic_year=academic_year,
+        ))
+
+    with transaction.atomic():
+        Attendance.objects.bulk_create(
+            records,
+            update_conflicts=True,
+            unique_fields=['student', 'subject', 'date'],
+            update_fields=['status', 'academic_year'],
+        )
+        marked = [record.student_id for record in records]
+        # bulk_create skips post_save, so maintain rollups and invalidate dashboards ourselves
+        refresh_rollups((student_id, subject.id, date) for student_id in marked)
+        transaction.on_commit(lambda: bump_versions(student_namespace(s) for s in marked))
+        transaction.on_commit(lambda: invalidate_counts(Attendance))
+
+    return marked
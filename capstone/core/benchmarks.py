@@ -0,0 +1,380 @@
+import asyncio
+import datetime
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.cache import SessionStore
+from asgiref.sync import ThreadSensitiveContext, async_to_sync, iscoroutinefunction, sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, connections, transaction
+from django.test import RequestFactory, override_settings
+from django.urls import URLPattern, resolve, reverse
+
+from core import urls as core_urls
+from core.models import AcademicYear, Attendance, Exam, ExamGrade, Fees, StudentEnrollment, TeacherAssignment
+from users.models import CustomUser, ParentProfile, StaffProfile, TeacherProfile
+
+# View and admin changelist benchmarks. Requests are built with RequestFactory and
+# dispatched straight to the resolved view, with request.user set to a user of the
+# right role, so timings cover the view, ORM and templates without the test client
+# or authentication backend. Each benchmark records timings for warm caches and
+# the query count of a cold run (cache cleared first). POST views run inside a
+# transaction that is rolled back, so benchmarking leaves the data as it was.
+
+# url name in core.urls -> (role, query string), or None for a view that is not
+# benchmarked. Every core url needs an entry: run_benchmarks refuses to run
+# otherwise, so a new view is measured from the start.
+VIEW_BENCHMARKS = {
+    'sign-in': (None, ''),
+    'sign-out': None,  # Only ends the session
+    'list': ('admin', ''),
+    'directory-api': ('admin', 'role=student'),
+    'search': ('admin', 'q=student'),
+    'admin-dashboard': ('admin', ''),
+    'staff-dashboard': ('staff', ''),
+    'teacher-dashboard': ('teacher', ''),
+    'teacher-summary': ('teacher', ''),
+    'student-dashboard': ('student', ''),
+    'student-summary': ('student', ''),
+    'parent-dashboard': ('parent', ''),
+    'family-summary': ('parent', ''),
+    'attendance-roll-call': ('admin', ''),
+    'daily-check-in': ('admin', ''),
+    'daily-attendance-summary': ('admin', 'role=teacher'),
+    'daily-absences': ('admin', 'role=teacher'),
+    'export-records': ('admin', 'format=csv'),
+    'slow-requests': ('admin', ''),
+    'exam-analytics': ('admin', ''),
+    'year-analytics': ('admin', ''),
+}
+
+# url name -> function of the sample data returning (URL kwargs, JSON body of a POST
+# or None), for views that need ids from the database
+VIEW_ARGUMENTS = {
+    'export-records': lambda samples: ({'name': 'attendance'}, None),
+    'exam-analytics': lambda samples: ({'exam_id': samples['exam'].id}, None),
+    'year-analytics': lambda samples: ({'year_id': samples['academic_year'].id}, None),
+    'attendance-roll-call': lambda samples: ({}, {
+        'class': samples['assignment'].class_assigned_id, 'subject': samples['assignment'].subject_id,
+        'date': datetime.date.today().isoformat(), 'default_status': 'Present',
+    }),
+    'daily-check-in': lambda samples: ({}, {
+        'role': 'teacher', 'date': datetime.date.today().isoformat(), 'default_status': 'Present',
+    }),
+}
+
+ADMIN_CHANGELISTS = [
+    'core.attendance', 'core.examgrade', 'core.fees', 'core.studentenrollment',
+    'core.teacherassignment', 'core.schedule', 'core.notification', 'users.customuser',
+]
+
+
+def _sample_users():
+    # Users that actually have data to show, so dashboards do real work
+    student = (
+        StudentEnrollment.objects.filter(academic_year__is_active=True)
+        .select_related('student__user').first()
+    )
+    parent = ParentProfile.objects.filter(students__isnull=False).select_related('user').first()
+    teacher = TeacherProfile.objects.filter(teacherassignment__isnull=False).select_related('user').first()
+    staff = StaffProfile.objects.select_related('user').first()
+    admin_user = CustomUser.objects.filter(is_superuser=True, is_active=True).first()
+    return {
+        'student': student.student.user if student else None,
+        'parent': parent.user if parent else None,
+        'teacher': teacher.user if teacher else None,
+        'staff': staff.user if staff else None,
+        'admin': admin_user,
+    }
+
+
+def _sample_objects():
+    academic_year = AcademicYear.objects.filter(is_active=True).first()
+    return {
+        'academic_year': academic_year,
+        'exam': Exam.objects.filter(academic_year=academic_year).order_by('id').first(),
+        'assignment': TeacherAssignment.objects.filter(
+            academic_year=academic_year, class_assigned__isnull=False, subject__isnull=False
+        ).order_by('id').first(),
+    }
+
+
+def view_targets():
+    """(url name, role, query string) of every benchmarked view in core.urls."""
+    targets = []
+    for pattern in core_urls.urlpatterns:
+        if not isinstance(pattern, URLPattern):
+            continue
+        if pattern.name not in VIEW_BENCHMARKS:
+            raise ImproperlyConfigured(f"core url '{pattern.name}' has no entry in VIEW_BENCHMARKS")
+        if VIEW_BENCHMARKS[pattern.name] is not None:
+            targets.append((pattern.name, *VIEW_BENCHMARKS[pattern.name]))
+    return targets
+
+
+def _build_request(factory, path, user, body=None):
+    if body is None:
+        request = factory.get(path)
+    else:
+        request = factory.post(path, json.dumps(body), content_type='application/json')
+    request.session = SessionStore()
+    request._messages = FallbackStorage(request)
+    request.user = user if user is not None else AnonymousUser()
+
+    async def auser():
+        return request.user
+
+    request.auser = auser
+    return request
+
+
+def _call(path, user, factory, body=None):
+    request = _build_request(factory, path, user, body)
+    match = resolve(request.path_info)
+    view = async_to_sync(match.func) if iscoroutinefunction(match.func) else match.func
+    response = view(request, *match.args, **match.kwargs)
+    if hasattr(response, 'render') and callable(response.render):
+        response = response.render()
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+class QueryCounter:
+    # connection.execute_wrapper hook; unlike connection.queries it needs no DEBUG
+    # and has no 9000 query cap
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _measure(path, user, repeat, factory, body=None):
+    cache.clear()
+    cold = QueryCounter()
+    timings = []
+    warm = QueryCounter()
+    with transaction.atomic():
+        with connection.execute_wrapper(cold):
+            response = _call(path, user, factory, body)
+        status = response.status_code
+
+        with connection.execute_wrapper(warm):
+            for _ in range(repeat):
+                started = time.perf_counter()
+                _call(path, user, factory, body)
+                timings.append((time.perf_counter() - started) * 1000)
+        if body is not None:
+            transaction.set_rollback(True)
+    timings.sort()
+    return {
+        'path': path,
+        'status': status,
+        'queries_cold': cold.count,
+        'queries_warm': warm.count // repeat,
+        'median_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+        'min_ms': round(timings[0], 2),
+    }
+
+
+def run_benchmarks(repeat=5, only=None):
+    factory = RequestFactory()
+    users = _sample_users()
+    samples = _sample_objects()
+    targets = []
+    for name, role, query in view_targets():
+        try:
+            kwargs, body = VIEW_ARGUMENTS[name](samples) if name in VIEW_ARGUMENTS else ({}, None)
+        except AttributeError:
+            targets.append((name, None, role, None, 'no sample data for its arguments'))
+            continue
+        path = reverse(name, kwargs=kwargs) + (f'?{query}' if query else '')
+        targets.append((name, path, role, body, None))
+    for label in ADMIN_CHANGELISTS:
+        app_label, model_name = label.split('.')
+        targets.append((f'admin:{label}', reverse(f'admin:{app_label}_{model_name}_changelist'), 'admin', None, None))
+
+    results = {}
+    for name, path, role, body, skipped in targets:
+        if only and name not in only:
+            continue
+        user = users.get(role) if role else None
+        if role and user is None:
+            skipped = f'no {role} user with data'
+        if skipped:
+            results[name] = {'path': path, 'skipped': skipped}
+            continue
+        try:
+            results[name] = _measure(path, user, repeat, factory, body)
+        except Exception as e:
+            # Record broken views rather than aborting the whole run
+            results[name] = {'path': path, 'error': f'{type(e).__name__}: {e}'}
+    return {
+        'generated_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'database': connections['default'].vendor,
+        'repeat': repeat,
+        'rows': {
+            'users': CustomUser.objects.count(),
+            'attendance': Attendance.objects.count(),
+            'exam_grades': ExamGrade.objects.count(),
+            'fees': Fees.objects.count(),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, tolerance=0.25, min_delta_ms=2.0):
+    """
+    List regressions against a baseline run: more cold queries than before, or a
+    median slower by more than ``tolerance`` (and at least ``min_delta_ms``, so
+    sub-millisecond noise doesn't count).
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if not before or 'median_ms' not in before or 'median_ms' not in result:
+            continue
+        if result['queries_cold'] > before['queries_cold']:
+            regressions.append(
+                f"{name}: {before['queries_cold']} -> {result['queries_cold']} queries"
+            )
+        slower = result['median_ms'] - before['median_ms']
+        if slower > min_delta_ms and result['median_ms'] > before['median_ms'] * (1 + tolerance):
+            regressions.append(
+                f"{name}: median {before['median_ms']}ms -> {result['median_ms']}ms"
+            )
+    return regressions
+
+
+# Tail latency under concurrent load, through the two ways Django dispatches a
+# view: the WSGI path, one thread per in-flight request (like a threaded WSGI
+# server), with async views run to completion by async_to_sync; and the ASGI path,
+# one event loop, with sync views handed to a thread through sync_to_async in a
+# thread-sensitive context per request, as under uvicorn. As above, views are
+# called directly with request.user set. Every endpoint runs on both paths, so
+# the sync pages and their async */summary/ twins compare either way.
+
+# name -> (url name, role)
+LOAD_BENCHMARKS = {
+    'student-dashboard': ('student-dashboard', 'student'),
+    'student-summary': ('student-summary', 'student'),
+    'teacher-dashboard': ('teacher-dashboard', 'teacher'),
+    'teacher-summary': ('teacher-summary', 'teacher'),
+    'inbox': ('inbox', 'student'),
+    'inbox-feed': ('inbox-feed', 'student'),
+}
+
+
+async def _acall(path, user, factory):
+    request = _build_request(factory, path, user)
+    match = resolve(request.path_info)
+    if iscoroutinefunction(match.func):
+        response = await match.func(request, *match.args, **match.kwargs)
+    else:
+        response = await sync_to_async(match.func)(request, *match.args, **match.kwargs)
+    if hasattr(response, 'render') and callable(response.render):
+        response = await sync_to_async(response.render)()
+    return response
+
+
+def _latency_stats(timings, elapsed, statuses):
+    timings = sorted(timings)
+
+    def percentile(fraction):
+        return round(timings[min(len(timings) - 1, int(len(timings) * fraction))], 2)
+
+    return {
+        'statuses': sorted(statuses),
+        'requests': len(timings),
+        'rps': round(len(timings) / elapsed, 1) if elapsed else None,
+        'median_ms': round(statistics.median(timings), 2),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'max_ms': round(timings[-1], 2),
+    }
+
+
+def _shares(total, concurrency):
+    return [total // concurrency + (1 if index < total % concurrency else 0) for index in range(concurrency)]
+
+
+def _wsgi_load(path, user, concurrency, total):
+    factory = RequestFactory()
+    statuses = set()
+
+    def client_loop(count):
+        timings = []
+        try:
+            for _ in range(count):
+                started = time.perf_counter()
+                statuses.add(_call(path, user, factory).status_code)
+                timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            connections.close_all()
+        return timings
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        batches = list(pool.map(client_loop, _shares(total, concurrency)))
+    return _latency_stats([timing for batch in batches for timing in batch], time.perf_counter() - started, statuses)
+
+
+async def _asgi_load(path, user, concurrency, total):
+    factory = RequestFactory()
+    statuses = set()
+
+    async def client_loop(count):
+        timings = []
+        for _ in range(count):
+            started = time.perf_counter()
+            async with ThreadSensitiveContext():
+                statuses.add((await _acall(path, user, factory)).status_code)
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    started = time.perf_counter()
+    batches = await asyncio.gather(*(client_loop(count) for count in _shares(total, concurrency)))
+    return _latency_stats([timing for batch in batches for timing in batch], time.perf_counter() - started, statuses)
+
+
+def run_load_benchmarks(concurrency=20, requests=200, only=None, cached=True):
+    """
+    Per endpoint and path, latency percentiles of ``requests`` requests made
+    ``concurrency`` at a time. With ``cached`` off the dashboard caches expire
+    immediately, so every request rebuilds its payload from the database.
+    """
+    users = _sample_users()
+    results = {}
+    with override_settings(**({} if cached else {'DASHBOARD_CACHE_TIMEOUT': 0})):
+        for name, (url_name, role) in LOAD_BENCHMARKS.items():
+            if only and name not in only:
+                continue
+            path = reverse(url_name)
+            user = users.get(role)
+            if user is None:
+                results[name] = {'path': path, 'skipped': f'no {role} user with data'}
+                continue
+            # One request first, so both paths start from the same warm caches
+            _call(path, user, RequestFactory())
+            results[name] = {
+                'path': path,
+                'wsgi': _wsgi_load(path, user, concurrency, requests),
+                'asgi': asyncio.run(_asgi_load(path, user, concurrency, requests)),
+            }
+    return {
+        'generated_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'database': connections['default'].vendor,
+        'concurrency': concurrency,
+        'requests': requests,
+        'cached': cached,
+        'results': results,
+    }
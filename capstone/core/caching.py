@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.cache import cache
+
+# Versioned cache namespaces. Every cached payload key embeds the current
+# version of the namespaces it depends on, so invalidating is a single
+# counter bump and stale entries simply age out of the cache.
+VERSION_PREFIX = 'version'
+
+
+def _version_key(namespace):
+    return f'{VERSION_PREFIX}:{namespace}'
+
+
+def get_versions(*namespaces):
+    keys = [_version_key(ns) for ns in namespaces]
+    found = cache.get_many(keys)
+    return tuple(found.get(key, 1) for key in keys)
+
+
+def bump_version(namespace):
+    key = _version_key(namespace)
+    # add() is a no-op when the key exists, so incr() always has something to work on
+    cache.add(key, 1, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The key was evicted between add() and incr()
+        cache.set(key, 2, timeout=None)
+
+
+def bump_versions(namespaces):
+    for namespace in set(namespaces):
+        bump_version(namespace)
+
+
+def versioned_key(name, *namespaces):
+    versions = get_versions(*namespaces)
+    return f'{name}:' + ':'.join(str(v) for v in versions)
+
+
+def cache_timeout(setting_name, default):
+    return getattr(settings, setting_name, default)
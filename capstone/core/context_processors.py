@@ -0,0 +1,16 @@
+from django.utils.functional import SimpleLazyObject
+
+from core.reference import get_active_academic_year, get_classes, get_grades, get_subjects
+
+
+def reference_data(request):
+    # Lazy so templates that never touch reference data don't pay for it; under one
+    # name so it can't shadow a view's own context (e.g. a student's exam grades)
+    return {
+        'reference': {
+            'active_academic_year': SimpleLazyObject(get_active_academic_year),
+            'grades': SimpleLazyObject(get_grades),
+            'classes': SimpleLazyObject(get_classes),
+            'subjects': SimpleLazyObject(get_subjects),
+        },
+    }
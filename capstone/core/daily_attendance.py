@@ -0,0 +1,245 @@
+import datetime
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+
+from core.admin_base import invalidate_counts
+from core.models import DailyAttendanceBitmap, StaffDailyAttendance, TeacherDailyAttendance
+from users.models import StaffProfile, TeacherProfile
+
+# Staff and teacher daily attendance. Next to the one-row-per-person-per-day
+# tables, every person has a DailyAttendanceBitmap per role and calendar year: a
+# present and an absent bitmap of 46 bytes each, bit n for day n of the year.
+# Monthly and yearly summaries and "who is absent" read one bitmap row per person
+# instead of one attendance row per person per day. People are whoever holds the
+# role's profile, as for check-in, whatever their CustomUser.role says.
+
+# Role: (daily attendance model, its profile field, profile model)
+DAILY_ATTENDANCE = {
+    'teacher': (TeacherDailyAttendance, 'teacher', TeacherProfile),
+    'staff': (StaffDailyAttendance, 'staff', StaffProfile),
+}
+DAILY_STATUSES = {choice for choice, _ in StaffDailyAttendance._meta.get_field('status').choices}
+BITMAP_BYTES = 46  # 366 days
+
+
+def day_bit(date):
+    return date.timetuple().tm_yday - 1
+
+
+def _bits(data):
+    return int.from_bytes(bytes(data or b''), 'little')
+
+
+def _bytes(bits):
+    return bits.to_bytes(BITMAP_BYTES, 'little')
+
+
+def _day_mask(start, end):
+    # Bits of the days from start to end inclusive, both in the same year
+    return ((1 << (day_bit(end) + 1)) - 1) ^ ((1 << day_bit(start)) - 1)
+
+
+def _month_end(month):
+    return (month + datetime.timedelta(days=32)).replace(day=1) - datetime.timedelta(days=1)
+
+
+def _rate(present, absent):
+    total = present + absent
+    return round(100 * present / total, 1) if total else None
+
+
+def _daily_attendance(role):
+    try:
+        return DAILY_ATTENDANCE[role]
+    except KeyError:
+        raise ValidationError(f"Unknown role: {role}")
+
+
+def apply_marks(role, marks):
+    """
+    Write ``marks``, an iterable of (user_id, date, status) tuples, into the
+    ``role`` bitmaps; a status of None clears the day. Two queries per year touched.
+    """
+    by_year = defaultdict(dict)
+    for user_id, date, status in marks:
+        if user_id is None or date is None:
+            continue
+        by_year[date.year][(user_id, day_bit(date))] = status
+    if not by_year:
+        return
+
+    with transaction.atomic():
+        for year, days in by_year.items():
+            user_ids = {user_id for user_id, _ in days}
+            bits = {
+                bitmap.user_id: [_bits(bitmap.present), _bits(bitmap.absent)]
+                for bitmap in DailyAttendanceBitmap.objects.select_for_update()
+                .filter(role=role, year=year, user_id__in=user_ids)
+            }
+            for (user_id, bit), status in days.items():
+                if user_id not in bits:
+                    # Clearing a day needs no new bitmap, nor should one be made for a
+                    # person whose bitmaps are being deleted with them
+                    if status is None:
+                        continue
+                    bits[user_id] = [0, 0]
+                present, absent = bits[user_id]
+                day = 1 << bit
+                bits[user_id] = [
+                    present | day if status == 'Present' else present & ~day,
+                    absent | day if status == 'Absent' else absent & ~day,
+                ]
+            DailyAttendanceBitmap.objects.bulk_create(
+                [
+                    DailyAttendanceBitmap(
+                        user_id=user_id, role=role, year=year, present=_bytes(present), absent=_bytes(absent)
+                    )
+                    for user_id, (present, absent) in bits.items()
+                ],
+                update_conflicts=True,
+                unique_fields=['user', 'role', 'year'],
+                update_fields=['present', 'absent'],
+            )
+
+
+def record_check_in(role, date, statuses, default_status=None):
+    """
+    Write the daily attendance of every active staff member (or teacher) for one
+    day as a single upsert, and their bitmaps with it.
+
+    ``statuses`` maps profile ids to 'Present'/'Absent'. People missing from it get
+    ``default_status``, or are left untouched when that is None. Returns the list
+    of profile ids that were marked.
+    """
+    model, field, profile_model = _daily_attendance(role)
+    if default_status is not None and default_status not in DAILY_STATUSES:
+        raise ValidationError(f"Invalid attendance status: {default_status}")
+
+    users = dict(
+        profile_model.objects.filter(user__is_active=True).values_list('id', 'user_id').order_by('id')
+    )
+    unknown = set(statuses) - set(users)
+    if unknown:
+        raise ValidationError(f"No active {role} with ids {sorted(unknown)}.")
+
+    records = []
+    for profile_id in users:
+        status = statuses.get(profile_id, default_status)
+        if status is None:
+            continue
+        if status not in DAILY_STATUSES:
+            raise ValidationError(f"Invalid attendance status: {status}")
+        records.append(model(date=date, status=status, **{f'{field}_id': profile_id}))
+
+    with transaction.atomic():
+        model.objects.bulk_create(
+            records,
+            update_conflicts=True,
+            unique_fields=['date', field],
+            update_fields=['status'],
+        )
+        marked = [getattr(record, f'{field}_id') for record in records]
+        # bulk_create skips post_save, so the bitmaps are written here
+        apply_marks(role, ((users[profile_id], date, record.status) for profile_id, record in zip(marked, records)))
+        transaction.on_commit(lambda: invalidate_counts(model))
+
+    return marked
+
+
+def rebuild_bitmaps(year=None):
+    """Recompute every bitmap (or one year's) from the daily attendance rows."""
+    bits = defaultdict(lambda: [0, 0])
+    for role, (model, field, _) in DAILY_ATTENDANCE.items():
+        rows = model.objects.filter(status__in=DAILY_STATUSES)
+        if year is not None:
+            rows = rows.filter(date__year=year)
+        for user_id, date, status in rows.values_list(f'{field}__user_id', 'date', 'status').iterator():
+            bits[(user_id, role, date.year)][status == 'Absent'] |= 1 << day_bit(date)
+
+    bitmaps = DailyAttendanceBitmap.objects.all()
+    if year is not None:
+        bitmaps = bitmaps.filter(year=year)
+    with transaction.atomic():
+        bitmaps.delete()
+        DailyAttendanceBitmap.objects.bulk_create(
+            [
+                DailyAttendanceBitmap(
+                    user_id=user_id, role=role, year=bitmap_year, present=_bytes(present), absent=_bytes(absent)
+                )
+                for (user_id, role, bitmap_year), (present, absent) in bits.items()
+            ],
+            batch_size=1000,
+        )
+    return len(bits)
+
+
+def _people(role):
+    _, _, profile_model = _daily_attendance(role)
+    return list(
+        profile_model.objects.filter(user__is_active=True)
+        .values(
+            'user_id', username=F('user__username'), first_name=F('user__first_name'),
+            last_name=F('user__last_name'),
+        )
+        .order_by('user__first_name', 'user_id')
+    )
+
+
+def _year_bitmaps(role, year):
+    return {
+        user_id: (_bits(present), _bits(absent))
+        for user_id, present, absent in DailyAttendanceBitmap.objects.filter(role=role, year=year)
+        .values_list('user_id', 'present', 'absent')
+    }
+
+
+def _person(user):
+    return {'id': user['user_id'], 'username': user['username'],
+            'name': f"{user['first_name']} {user['last_name']}".strip() or user['username']}
+
+
+def presence_summary(role, year, month=None):
+    """Present and absent days per active person of ``role`` over a year or one month of it."""
+    _daily_attendance(role)
+    start = datetime.date(year, month or 1, 1)
+    mask = _day_mask(start, _month_end(start) if month else datetime.date(year, 12, 31))
+    bitmaps = _year_bitmaps(role, year)
+    summary = []
+    for user in _people(role):
+        present, absent = bitmaps.get(user['user_id'], (0, 0))
+        present, absent = (present & mask).bit_count(), (absent & mask).bit_count()
+        summary.append(dict(_person(user), present=present, absent=absent, rate=_rate(present, absent)))
+    return summary
+
+
+def presence_by_month(role, year):
+    """Month-by-month present and absent days across everyone of ``role``."""
+    _daily_attendance(role)
+    bitmaps = list(_year_bitmaps(role, year).values())
+    months = []
+    for month in range(1, 13):
+        start = datetime.date(year, month, 1)
+        mask = _day_mask(start, _month_end(start))
+        present = sum((bits & mask).bit_count() for bits, _ in bitmaps)
+        absent = sum((bits & mask).bit_count() for _, bits in bitmaps)
+        if present or absent:
+            months.append({'month': start, 'present': present, 'absent': absent, 'rate': _rate(present, absent)})
+    return months
+
+
+def absent_on(role, date):
+    """Who of ``role`` is marked absent on ``date``, and who has not been marked at all."""
+    _daily_attendance(role)
+    bitmaps = _year_bitmaps(role, date.year)
+    day = 1 << day_bit(date)
+    absent, unmarked = [], []
+    for user in _people(role):
+        present_bits, absent_bits = bitmaps.get(user['user_id'], (0, 0))
+        if absent_bits & day:
+            absent.append(_person(user))
+        elif not present_bits & day:
+            unmarked.append(_person(user))
+    return {'absent': absent, 'unmarked': unmarked}
@@ -0,0 +1,329 @@
+import datetime
+
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Prefetch
+
+from capstone.routers import primary_reads
+from core.caching import cache_timeout, versioned_key
+from core.models import (
+    Attendance, Class, ClassAttendanceDaily, ExamGrade, Schedule, StudentEnrollment, TeacherAssignment
+)
+from core.reference import ACTIVE_YEAR_NAMESPACE, get_active_academic_year
+from core.rollups import attendance_summary_rows, student_attendance_totals
+
+# Cache namespaces the dashboards depend on. Signals in core.signals bump these
+# when the underlying rows change. A single row change bumps the namespace of the
+# class or teacher it belongs to, so only the dashboards showing it are rebuilt;
+# the school-wide namespaces below are bumped by bulk rewrites (timetable
+# generation, synthetic data). Notifications are not cached here: dashboards read
+# them from each user's inbox (communication.inbox).
+TIMETABLE_NAMESPACE = 'timetable'
+ROSTERS_NAMESPACE = 'rosters'
+
+# The student dashboard lists only the latest attendance marks; the per-subject
+# totals for the whole year come from the monthly rollups
+RECENT_ATTENDANCE = 30
+
+
+def student_namespace(student_id):
+    return f'student:{student_id}'
+
+
+def teacher_namespace(teacher_id):
+    # The teacher's assignments, which decide the classes on their dashboard
+    return f'teacher:{teacher_id}'
+
+
+def class_timetable_namespace(class_id):
+    # Schedule and teacher assignments of one class
+    return f'timetable:{class_id}'
+
+
+def class_roster_namespace(class_id):
+    return f'roster:{class_id}'
+
+
+def _scope(name, namespaces, load):
+    # Which classes a dashboard covers, cached under the namespaces that can change
+    # it, so its cache key can name their namespaces before the dashboard is built
+    key = versioned_key(name, *namespaces)
+    scope = cache.get(key)
+    if scope is None:
+        with primary_reads():
+            scope = load()
+        cache.set(key, scope, cache_timeout('DASHBOARD_CACHE_TIMEOUT', 300))
+    return scope
+
+
+def class_payload(class_instance):
+    if class_instance is None:
+        return None
+    return {
+        'id': class_instance.id,
+        'name': class_instance.name,
+        'grade': class_instance.grade.name,
+        'grade_id': class_instance.grade_id,
+        'academic_year': class_instance.academic_year.year if class_instance.academic_year else None,
+    }
+
+
+def student_enrollment(student_profile, academic_year):
+    return (
+        StudentEnrollment.objects.filter(student=student_profile, academic_year=academic_year)
+        .select_related('class_assigned__grade', 'class_assigned__academic_year')
+    )
+
+
+def student_dashboard_querysets(student_profile, class_instance, academic_year):
+    """
+    The independent queries of the student dashboard, by payload part; parts that
+    do not apply (no class, no active year) are None.
+    """
+    has_class = class_instance is not None
+    has_year = academic_year is not None
+    return {
+        # Subject -> teacher for this class, resolved once instead of per timetable row
+        'teachers': TeacherAssignment.objects.filter(
+            class_assigned=class_instance, teacher__isnull=False
+        ).select_related('teacher__user') if has_class else None,
+        'schedule': Schedule.objects.filter(class_instance=class_instance).select_related('subject')
+        if has_class else None,
+        'attendance_summary': student_attendance_totals(student_profile, academic_year) if has_year else None,
+        'exam_grades': ExamGrade.objects.filter(student=student_profile, academic_year=academic_year)
+        .select_related('exam', 'subject').order_by('exam__exam_date', 'id') if has_year else None,
+        'attendance_records': Attendance.objects.filter(student=student_profile, academic_year=academic_year)
+        .select_related('subject').order_by('-date', 'id')[:RECENT_ATTENDANCE] if has_year else None,
+    }
+
+
+def student_dashboard_payload(class_instance, rows):
+    """The student dashboard from the results of student_dashboard_querysets."""
+    teachers = {
+        assignment.subject_id: assignment.teacher.user.username for assignment in rows['teachers'] or []
+    }
+    return {
+        'class_instance': class_payload(class_instance),
+        'schedule': [
+            {
+                'day_of_week': entry.day_of_week,
+                'section': entry.section,
+                'subject': entry.subject.name if entry.subject else None,
+                'teacher': teachers.get(entry.subject_id),
+            }
+            for entry in rows['schedule'] or []
+        ],
+        'exam_grades': [
+            {
+                'exam': grade.exam.name if grade.exam else None,
+                'subject': grade.subject.name if grade.subject else None,
+                'grade': grade.grade,
+            }
+            for grade in rows['exam_grades'] or []
+        ],
+        'attendance_records': [
+            {
+                'date': record.date,
+                'subject': record.subject.name if record.subject else None,
+                'status': record.status,
+            }
+            for record in rows['attendance_records'] or []
+        ],
+        'attendance_summary': attendance_summary_rows(rows['attendance_summary'] or []),
+    }
+
+
+def evaluate_querysets(querysets):
+    """Evaluate a dict of querysets (or None for parts that do not apply), keeping the keys."""
+    return {part: list(queryset) if queryset is not None else None for part, queryset in querysets.items()}
+
+
+def build_student_dashboard(student_profile):
+    """Load everything the student dashboard shows in a fixed number of queries."""
+    academic_year = get_active_academic_year()
+    enrollment = None
+    if academic_year is not None:
+        enrollment = student_enrollment(student_profile, academic_year).first()
+    class_instance = enrollment.class_assigned if enrollment else None
+    if class_instance is None:
+        academic_year = None
+
+    rows = evaluate_querysets(student_dashboard_querysets(student_profile, class_instance, academic_year))
+    return student_dashboard_payload(class_instance, rows)
+
+
+def student_dashboard_cache_key(student_id):
+    # Enrollments bump the student's namespace and the active year is reference data
+    class_id = _scope(
+        f'dashboard:student-class:{student_id}', [student_namespace(student_id), ACTIVE_YEAR_NAMESPACE],
+        lambda: StudentEnrollment.objects.filter(
+            student_id=student_id, academic_year=get_active_academic_year(), class_assigned__isnull=False
+        ).values_list('class_assigned_id', flat=True).first(),
+    )
+    # Notifications are not part of it: they are read from the user's inbox
+    namespaces = [student_namespace(student_id), TIMETABLE_NAMESPACE, ACTIVE_YEAR_NAMESPACE]
+    if class_id is not None:
+        namespaces.append(class_timetable_namespace(class_id))
+    return versioned_key(f'dashboard:student:{student_id}', *namespaces)
+
+
+def get_student_dashboard(student_profile):
+    key = student_dashboard_cache_key(student_profile.id)
+    payload = cache.get(key)
+    if payload is None:
+        with primary_reads():
+            payload = build_student_dashboard(student_profile)
+        cache.set(key, payload, cache_timeout('DASHBOARD_CACHE_TIMEOUT', 300))
+    return payload
+
+
+EMPTY_TEACHER_DASHBOARD = {'assignments': [], 'schedule': [], 'today': [], 'classes': []}
+
+
+def teacher_dashboard_querysets(teacher_profile, academic_year):
+    """The independent queries of the teacher dashboard, by payload part."""
+    assignments = TeacherAssignment.objects.filter(teacher=teacher_profile, academic_year=academic_year)
+    # Only the sections the teacher actually takes: same class and subject as one of their assignments
+    taught = assignments.filter(class_assigned=OuterRef('class_instance'), subject=OuterRef('subject'))
+    enrollments = (
+        StudentEnrollment.objects.filter(academic_year=academic_year)
+        .select_related('student__user')
+        .order_by('student__user__last_name', 'student__user__first_name', 'id')
+    )
+    return {
+        'assignments': assignments.filter(class_assigned__isnull=False)
+        .select_related('subject', 'class_assigned__grade')
+        .order_by('class_assigned__grade__name', 'class_assigned__name', 'subject__name'),
+        'schedule': Schedule.objects.filter(Exists(taught)).select_related('subject', 'class_instance__grade'),
+        'classes': Class.objects.filter(
+            id__in=assignments.values('class_assigned')
+        ).select_related('grade').prefetch_related(
+            Prefetch('studentenrollment_set', queryset=enrollments, to_attr='enrollments')
+        ).order_by('grade__name', 'name'),
+    }
+
+
+def teacher_dashboard_payload(rows, today):
+    """The teacher dashboard from the results of teacher_dashboard_querysets."""
+    day_order = {day: index for index, (day, _) in enumerate(Schedule.DAY_CHOICES)}
+    section_order = {section: index for index, (section, _) in enumerate(Schedule.SECTION_CHOICES)}
+    schedule = sorted(
+        (
+            {
+                'day_of_week': entry.day_of_week,
+                'section': entry.section,
+                'subject': entry.subject.name,
+                'subject_id': entry.subject_id,
+                'class_id': entry.class_instance_id,
+                'class_name': entry.class_instance.name,
+                'grade': entry.class_instance.grade.name,
+            }
+            for entry in rows['schedule']
+        ),
+        key=lambda row: (day_order.get(row['day_of_week'], 0), section_order.get(row['section'], 0)),
+    )
+    weekday = today.strftime('%A')
+    return {
+        'assignments': [
+            {
+                'subject': assignment.subject.name if assignment.subject else None,
+                'subject_id': assignment.subject_id,
+                'class_id': assignment.class_assigned_id,
+                'class_name': assignment.class_assigned.name,
+                'grade': assignment.class_assigned.grade.name,
+            }
+            for assignment in rows['assignments']
+        ],
+        'schedule': schedule,
+        'today': [row for row in schedule if row['day_of_week'] == weekday],
+        'classes': [
+            {
+                'id': class_instance.id,
+                'name': class_instance.name,
+                'grade': class_instance.grade.name,
+                'students': [
+                    {
+                        'id': enrollment.student_id,
+                        'username': enrollment.student.user.username,
+                        'name': enrollment.student.user.get_full_name(),
+                    }
+                    for enrollment in class_instance.enrollments
+                    if enrollment.student_id
+                ],
+            }
+            for class_instance in rows['classes']
+        ],
+    }
+
+
+def build_teacher_dashboard(teacher_profile, today=None):
+    """
+    Assignments, weekly schedule and class rosters of a teacher in the active year,
+    in four queries however many classes the teacher has.
+    """
+    today = today or datetime.date.today()
+    academic_year = get_active_academic_year()
+    if academic_year is None:
+        return EMPTY_TEACHER_DASHBOARD
+
+    rows = evaluate_querysets(teacher_dashboard_querysets(teacher_profile, academic_year))
+    return teacher_dashboard_payload(rows, today)
+
+
+def teacher_dashboard_cache_key(teacher_id, today):
+    # The date picks today's sections
+    class_ids = _scope(
+        f'dashboard:teacher-scope:{teacher_id}', [teacher_namespace(teacher_id), ACTIVE_YEAR_NAMESPACE],
+        lambda: sorted(set(
+            TeacherAssignment.objects.filter(
+                teacher_id=teacher_id, academic_year=get_active_academic_year(), class_assigned__isnull=False
+            ).values_list('class_assigned_id', flat=True)
+        )),
+    )
+    namespaces = [teacher_namespace(teacher_id), TIMETABLE_NAMESPACE, ROSTERS_NAMESPACE, ACTIVE_YEAR_NAMESPACE]
+    for class_id in class_ids:
+        namespaces += [class_timetable_namespace(class_id), class_roster_namespace(class_id)]
+    return versioned_key(f'dashboard:teacher:{teacher_id}:{today.isoformat()}', *namespaces)
+
+
+def attendance_progress_queryset(dashboard, today):
+    # None when the teacher has no sections today
+    sections = dashboard['today']
+    if not sections:
+        return None
+    return ClassAttendanceDaily.objects.filter(
+        date=today,
+        class_instance_id__in={row['class_id'] for row in sections},
+        subject_id__in={row['subject_id'] for row in sections},
+    ).values_list('class_instance_id', 'subject_id', 'present', 'absent')
+
+
+def apply_attendance_progress(dashboard, rows):
+    marked = {(class_id, subject_id): present + absent for class_id, subject_id, present, absent in rows}
+    roster_sizes = {row['id']: len(row['students']) for row in dashboard['classes']}
+    today_sections = []
+    for row in dashboard['today']:
+        count = marked.get((row['class_id'], row['subject_id']), 0)
+        size = roster_sizes.get(row['class_id'], 0)
+        today_sections.append({**row, 'marked': count, 'roster_size': size, 'complete': size > 0 and count >= size})
+    return {**dashboard, 'today': today_sections}
+
+
+def attach_attendance_progress(dashboard, today):
+    """
+    Mark each of today's sections with how many of the class roster have been
+    marked, from the daily class rollup. Kept out of the cached payload so it is
+    always current; one query.
+    """
+    rows = attendance_progress_queryset(dashboard, today)
+    return apply_attendance_progress(dashboard, rows if rows is not None else [])
+
+
+def get_teacher_dashboard(teacher_profile, today=None):
+    today = today or datetime.date.today()
+    key = teacher_dashboard_cache_key(teacher_profile.id, today)
+    payload = cache.get(key)
+    if payload is None:
+        with primary_reads():
+            payload = build_teacher_dashboard(teacher_profile, today)
+        cache.set(key, payload, cache_timeout('DASHBOARD_CACHE_TIMEOUT', 300))
+    return attach_attendance_progress(payload, today)
@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Exists, OuterRef, Q
+
+from core.models import StudentEnrollment
+from core.reference import get_active_academic_year
+from users.models import CustomUser
+
+# User directory with keyset pagination on (last_name, id): each page is an index
+# range scan starting after the last row of the previous one, so page 1000 costs
+# the same as page 1, unlike OFFSET which reads and discards every earlier row.
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+DIRECTORY_FIELDS = ('id', 'username', 'first_name', 'last_name', 'email', 'role')
+
+
+def directory_queryset(role=None, grade=None, class_id=None, search=None):
+    users = CustomUser.objects.filter(is_active=True).only(*DIRECTORY_FIELDS)
+    if role:
+        users = users.filter(role=role)
+    if grade or class_id:
+        # Students enrolled in the active year; Exists keeps one row per user
+        enrollments = StudentEnrollment.objects.filter(
+            student__user=OuterRef('pk'), academic_year=get_active_academic_year()
+        )
+        if grade:
+            enrollments = enrollments.filter(class_assigned__grade=grade)
+        if class_id:
+            enrollments = enrollments.filter(class_assigned=class_id)
+        users = users.filter(Exists(enrollments))
+    if search:
+        users = users.filter(Q(last_name__istartswith=search) | Q(username__istartswith=search))
+    return users
+
+
+def seek(users, after=None):
+    # Rows after the (last_name, id) cursor, in index order
+    if after is not None:
+        last_name, user_id = after
+        users = users.filter(Q(last_name__gt=last_name) | Q(last_name=last_name, id__gt=user_id))
+    return users.order_by('last_name', 'id')
+
+
+def directory_page(users, after=None, limit=PAGE_SIZE):
+    """
+    One page ordered by (last_name, id). ``after`` is the (last_name, id) of the
+    last row of the previous page. Returns (rows, next cursor or None).
+    """
+    rows = list(seek(users, after)[:limit + 1])
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, (rows[-1].last_name, rows[-1].id)
+    return rows, None
+
+
+def _estimated_user_rows():
+    # Planner statistics instead of a full count; only available on PostgreSQL
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [CustomUser._meta.db_table]
+        )
+        row = cursor.fetchone()
+    return row[0] if row and row[0] > 0 else None
+
+
+def approximate_total(users, filters):
+    """
+    Total for the directory header. Cached for a short while per filter set, since
+    an exact COUNT(*) is a full scan on every page view; the unfiltered total on
+    PostgreSQL comes from table statistics.
+    """
+    key = 'directory:total:' + ':'.join(f'{name}={filters[name] or ""}' for name in sorted(filters))
+    total = cache.get(key)
+    if total is None:
+        if connection.vendor == 'postgresql' and not any(filters.values()):
+            total = _estimated_user_rows()
+        if total is None:
+            total = users.count()
+        cache.set(key, total, getattr(settings, 'DIRECTORY_COUNT_CACHE_TIMEOUT', 60))
+    return total
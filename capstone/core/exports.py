@@ -0,0 +1,216 @@
+import csv
+import datetime
+import zipfile
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.db.models import Exists, OuterRef
+from django.http import StreamingHttpResponse
+
+from core.models import Attendance, ExamGrade, Fees, StudentEnrollment
+from finance.ledger import FEE_STATUS
+
+# Year-end exports of the big per-student tables. Rows are read with values_list()
+# and iterator() so memory stays flat however many rows match, and both writers
+# yield bytes as soon as the first chunk is ready.
+CHUNK_SIZE = 2000
+
+
+class Export:
+    def __init__(self, name, model, columns, annotations=None):
+        self.name = name
+        self.model = model
+        self.headers = [header for header, _ in columns]
+        self.fields = [field for _, field in columns]
+        # Computed columns, evaluated by the database like any other field
+        self.annotations = annotations or {}
+
+    def queryset(self, academic_year=None, grade=None, class_instance=None):
+        queryset = self.model.objects.all()
+        if academic_year is not None:
+            queryset = queryset.filter(academic_year=academic_year)
+        if grade is not None or class_instance is not None:
+            # Students enrolled in the class/grade during the row's own academic year
+            enrollments = StudentEnrollment.objects.filter(
+                student=OuterRef('student'), academic_year=OuterRef('academic_year')
+            )
+            if grade is not None:
+                enrollments = enrollments.filter(class_assigned__grade=grade)
+            if class_instance is not None:
+                enrollments = enrollments.filter(class_assigned=class_instance)
+            queryset = queryset.filter(Exists(enrollments))
+        return queryset.order_by('pk')
+
+    def rows(self, queryset):
+        if self.annotations:
+            queryset = queryset.annotate(**self.annotations)
+        return queryset.values_list(*self.fields).iterator(chunk_size=CHUNK_SIZE)
+
+
+EXPORTS = {
+    'attendance': Export('attendance', Attendance, [
+        ('Student', 'student__user__username'),
+        ('Subject', 'subject__name'),
+        ('Date', 'date'),
+        ('Status', 'status'),
+        ('Academic Year', 'academic_year__year'),
+    ]),
+    'grades': Export('grades', ExamGrade, [
+        ('Student', 'student__user__username'),
+        ('Exam', 'exam__name'),
+        ('Subject', 'subject__name'),
+        ('Grade', 'grade'),
+        ('Academic Year', 'academic_year__year'),
+    ]),
+    'fees': Export('fees', Fees, [
+        ('Student', 'student__user__username'),
+        ('Amount Due', 'amount_due'),
+        ('Amount Paid', 'amount_paid'),
+        ('Due Date', 'due_date'),
+        ('Academic Year', 'academic_year__year'),
+        ('Status', 'status'),
+    ], annotations={'status': FEE_STATUS}),
+}
+
+
+def export_for_model(model):
+    for export in EXPORTS.values():
+        if export.model is model:
+            return export
+    raise LookupError(f'No export is defined for {model.__name__}')
+
+
+class _Echo:
+    """File-like object that hands back whatever is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_stream(headers, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+class _ChunkBuffer:
+    # Non-seekable sink for zipfile; the generator drains it after every write
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c><v>{value}</v></c>'
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        value = value.isoformat()
+    return f'<c t="inlineStr"><is><t>{escape(str(value))}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return '<row>' + ''.join(_xlsx_cell(value) for value in values) + '</row>'
+
+
+def xlsx_stream(headers, rows, sheet_name='Export'):
+    """
+    Write a single-sheet workbook using inline strings, so rows can be streamed
+    straight into the zip without the shared-strings table that needs every
+    value up front.
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        archive.writestr('_rels/.rels', _ROOT_RELS)
+        archive.writestr('xl/workbook.xml', _WORKBOOK.format(name=escape(sheet_name[:31])))
+        archive.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        yield buffer.drain()
+
+        with archive.open('xl/worksheets/sheet1.xml', mode='w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row(headers).encode())
+            pending = []
+            for row in rows:
+                pending.append(_xlsx_row(row))
+                if len(pending) >= CHUNK_SIZE:
+                    sheet.write(''.join(pending).encode())
+                    pending = []
+                    yield buffer.drain()
+            sheet.write(''.join(pending).encode())
+            sheet.write(b'</sheetData></worksheet>')
+    yield buffer.drain()
+
+
+FORMATS = {
+    'csv': (csv_stream, 'text/csv'),
+    'xlsx': (xlsx_stream, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+
+def stream_export(export, queryset, file_format='csv'):
+    writer, _ = FORMATS[file_format]
+    if file_format == 'xlsx':
+        return writer(export.headers, export.rows(queryset), sheet_name=export.name)
+    return (chunk.encode() for chunk in writer(export.headers, export.rows(queryset)))
+
+
+def export_response(export, queryset, file_format='csv'):
+    _, content_type = FORMATS[file_format]
+    response = StreamingHttpResponse(stream_export(export, queryset, file_format), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{export.name}.{file_format}"'
+    return response
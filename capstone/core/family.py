@@ -0,0 +1,132 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Sum
+
+from capstone.routers import primary_reads
+from core.caching import cache_timeout, get_versions
+from core.dashboard import class_payload, student_namespace
+from core.models import ExamGrade, Fees, StudentAttendanceMonthly, StudentEnrollment
+from core.reference import ACTIVE_YEAR_NAMESPACE, get_active_academic_year
+
+# Family summary for the parent dashboard. Each child's summary (class, attendance
+# rate, latest grades, fees) is cached under that student's namespace, the same one
+# the student dashboard uses, so it survives until one of the child's own rows
+# changes. Children missing from the cache are built together: four grouped
+# queries whether one child or five is stale.
+
+LATEST_GRADES = 5
+
+
+def _child_cache_keys(student_ids):
+    # Changes to a child's class, grade or subjects bump the student namespace too
+    namespaces = [ACTIVE_YEAR_NAMESPACE] + [student_namespace(student_id) for student_id in student_ids]
+    year_version, *student_versions = get_versions(*namespaces)
+    return {
+        student_id: f'family:child:{student_id}:{version}:{year_version}'
+        for student_id, version in zip(student_ids, student_versions)
+    }
+
+
+def build_child_summaries(students, academic_year):
+    """Summaries of ``students`` (StudentProfiles with user loaded) keyed by student id."""
+    student_ids = [student.id for student in students]
+    classes = {}
+    attendance = {}
+    grades = defaultdict(list)
+    fees = {}
+    if academic_year is not None and student_ids:
+        classes = {
+            enrollment.student_id: enrollment.class_assigned
+            for enrollment in StudentEnrollment.objects.filter(
+                student_id__in=student_ids, academic_year=academic_year, class_assigned__isnull=False
+            ).select_related('class_assigned__grade', 'class_assigned__academic_year')
+        }
+        attendance = {
+            row['student_id']: row
+            for row in StudentAttendanceMonthly.objects.filter(student_id__in=student_ids, academic_year=academic_year)
+            .values('student_id').annotate(present=Sum('present'), absent=Sum('absent')).order_by()
+        }
+        for grade in (
+            ExamGrade.objects.filter(student_id__in=student_ids, academic_year=academic_year)
+            .select_related('exam', 'subject')
+            .order_by('student_id', '-exam__exam_date', '-id')
+        ):
+            if len(grades[grade.student_id]) < LATEST_GRADES:
+                grades[grade.student_id].append({
+                    'exam': grade.exam.name if grade.exam else None,
+                    'subject': grade.subject.name if grade.subject else None,
+                    'date': grade.exam.exam_date if grade.exam else None,
+                    'grade': grade.grade,
+                })
+        fees = {
+            row['student_id']: row
+            for row in Fees.objects.filter(student_id__in=student_ids, academic_year=academic_year)
+            .values('student_id').annotate(amount_due=Sum('amount_due'), amount_paid=Sum('amount_paid')).order_by()
+        }
+
+    summaries = {}
+    for student in students:
+        present = attendance.get(student.id, {}).get('present') or 0
+        absent = attendance.get(student.id, {}).get('absent') or 0
+        fee = fees.get(student.id)
+        amount_due = (fee and fee['amount_due']) or Decimal('0.00')
+        amount_paid = (fee and fee['amount_paid']) or Decimal('0.00')
+        summaries[student.id] = {
+            'id': student.id,
+            'username': student.user.username,
+            'name': student.user.get_full_name() or student.user.username,
+            'class_instance': class_payload(classes.get(student.id)),
+            'attendance': {
+                'present': present,
+                'absent': absent,
+                'rate': round(100 * present / (present + absent), 1) if present + absent else None,
+            },
+            'latest_grades': grades.get(student.id, []),
+            'fees': {
+                'amount_due': amount_due,
+                'amount_paid': amount_paid,
+                'outstanding': amount_due - amount_paid,
+                'status': Fees.status_for(amount_due, amount_paid) if fee else None,
+            },
+        }
+    return summaries
+
+
+def get_child_summaries(students):
+    """Per-child summaries in the order of ``students``, building only the ones not cached."""
+    keys = _child_cache_keys([student.id for student in students])
+    cached = cache.get_many(keys.values())
+    summaries = {student_id: cached[key] for student_id, key in keys.items() if key in cached}
+
+    missing = [student for student in students if student.id not in summaries]
+    if missing:
+        with primary_reads():
+            built = build_child_summaries(missing, get_active_academic_year())
+        cache.set_many(
+            {keys[student_id]: summary for student_id, summary in built.items()},
+            cache_timeout('DASHBOARD_CACHE_TIMEOUT', 300),
+        )
+        summaries.update(built)
+    return [summaries[student.id] for student in students]
+
+
+def get_family_summary(parent_profile):
+    """
+    Everything the parent dashboard shows, in a fixed number of queries however
+    many children the parent has.
+    """
+    students = list(parent_profile.students.select_related('user').order_by('user__first_name', 'id'))
+    children = get_child_summaries(students)
+    rated = [child['attendance'] for child in children if child['attendance']['rate'] is not None]
+    present = sum(row['present'] for row in rated)
+    total = sum(row['present'] + row['absent'] for row in rated)
+    return {
+        'children': children,
+        'totals': {
+            'children': len(children),
+            'outstanding': sum((child['fees']['outstanding'] for child in children), Decimal('0.00')),
+            'attendance_rate': round(100 * present / total, 1) if total else None,
+        },
+    }
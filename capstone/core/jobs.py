@@ -0,0 +1,127 @@
+import datetime
+import json
+import logging
+import time
+import traceback
+
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from core.models import Job
+
+# A small database-backed job queue. Tasks are plain functions registered with
+# @task in an app's tasks.py; enqueue() stores a Job row (inside the caller's
+# transaction, so a job never runs before the data it needs is committed) and
+# manage.py runworker claims and runs them. Arguments must be JSON-serializable.
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+RETRY_BASE_SECONDS = 10
+
+
+def task(name):
+    def register(func):
+        _registry[name] = func
+        func.task_name = name
+        return func
+    return register
+
+
+def enqueue(task_name, *args, max_attempts=3, delay=0, **kwargs):
+    return Job.objects.create(
+        task=getattr(task_name, 'task_name', task_name),
+        args=list(args),
+        kwargs=kwargs,
+        max_attempts=max_attempts,
+        run_at=timezone.now() + datetime.timedelta(seconds=delay),
+    )
+
+
+def discover_tasks():
+    autodiscover_modules('tasks')
+    return _registry
+
+
+def _claim_next():
+    # The conditional UPDATE is the lock: only one worker can move a job off 'queued'
+    now = timezone.now()
+    candidates = (
+        Job.objects.filter(status='queued', run_at__lte=now)
+        .order_by('run_at', 'id')
+        .values_list('id', flat=True)[:10]
+    )
+    for job_id in candidates:
+        claimed = Job.objects.filter(pk=job_id, status='queued').update(
+            status='running', started_at=now, attempts=F('attempts') + 1
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def run_job(job):
+    func = _registry.get(job.task)
+    try:
+        if func is None:
+            raise LookupError(f'Unknown task {job.task!r}')
+        result = func(*job.args, **job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Job %s (%s) failed on attempt %s', job.id, job.task, job.attempts)
+        if job.attempts < job.max_attempts:
+            # Exponential backoff: 10s, 20s, 40s, ...
+            retry_in = RETRY_BASE_SECONDS * 2 ** (job.attempts - 1)
+            Job.objects.filter(pk=job.pk).update(
+                status='queued', last_error=error,
+                run_at=timezone.now() + datetime.timedelta(seconds=retry_in),
+            )
+        else:
+            Job.objects.filter(pk=job.pk).update(status='failed', last_error=error, finished_at=timezone.now())
+        return False
+
+    try:
+        json.dumps(result)
+    except TypeError:
+        # Non-JSON results are dropped rather than failing a job that did its work
+        result = None
+    Job.objects.filter(pk=job.pk).update(status='done', result=result, finished_at=timezone.now())
+    return True
+
+
+def requeue_stale(older_than):
+    """
+    Put back jobs whose worker died mid-run (still 'running' after ``older_than``
+    seconds). A job that has used all its attempts is failed instead, so a task
+    that kills its worker isn't retried forever. Returns (requeued, failed).
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status='running', started_at__lt=now - datetime.timedelta(seconds=older_than))
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', last_error='The worker stopped while running this job.', finished_at=now
+    )
+    requeued = stale.update(status='queued', run_at=now)
+    return requeued, failed
+
+
+def work(poll_interval=1.0, burst=False, stop=None):
+    """
+    Run jobs until ``stop()`` returns True, or, with ``burst``, until the queue is empty.
+    Returns the number of jobs processed.
+    """
+    discover_tasks()
+    processed = 0
+    while not (stop and stop()):
+        close_old_connections()
+        job = _claim_next()
+        if job is None:
+            if burst:
+                break
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+        processed += 1
+    return processed
@@ -0,0 +1,43 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import compare, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the dashboards, exports and admin changelists; optionally compare against a baseline.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Warm runs per benchmark.')
+        parser.add_argument('--only', nargs='*', help='Benchmark names to run (default: all).')
+        parser.add_argument('--output', help='Write the results to this JSON file.')
+        parser.add_argument('--baseline', help='JSON results of an earlier run to compare against.')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed median slowdown relative to the baseline (0.25 = 25%%).')
+
+    def handle(self, *args, **options):
+        results = run_benchmarks(repeat=max(1, options['repeat']), only=options['only'])
+
+        self.stdout.write(f"{'benchmark':<32} {'status':>6} {'queries':>8} {'median':>9} {'p95':>9}")
+        for name, result in results['results'].items():
+            if 'median_ms' in result:
+                self.stdout.write(
+                    f"{name:<32} {result['status']:>6} {result['queries_cold']:>8} "
+                    f"{result['median_ms']:>7.1f}ms {result['p95_ms']:>7.1f}ms"
+                )
+            else:
+                self.stdout.write(self.style.WARNING(f"{name:<32} {result.get('error') or result.get('skipped')}"))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            regressions = compare(results, baseline, tolerance=options['tolerance'])
+            if regressions:
+                raise CommandError('Performance regressions:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
@@ -0,0 +1,43 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import run_load_benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Compare tail latency of the dashboards and inbox under concurrent load through WSGI and ASGI.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=20, help='Requests in flight at once.')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint and handler.')
+        parser.add_argument('--only', nargs='*', help='Benchmark names to run (default: all).')
+        parser.add_argument('--uncached', action='store_true', help='Rebuild every dashboard from the database.')
+        parser.add_argument('--output', help='Write the results to this JSON file.')
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        results = run_load_benchmarks(
+            concurrency=concurrency, requests=max(concurrency, options['requests']),
+            only=options['only'], cached=not options['uncached'],
+        )
+
+        self.stdout.write(
+            f"{'benchmark':<20} {'handler':<8} {'status':>8} {'rps':>8} "
+            f"{'median':>9} {'p95':>9} {'p99':>9} {'max':>9}"
+        )
+        for name, result in results['results'].items():
+            if 'skipped' in result:
+                self.stdout.write(self.style.WARNING(f"{name:<20} {result['skipped']}"))
+                continue
+            for handler in ('wsgi', 'asgi'):
+                row = result[handler]
+                self.stdout.write(
+                    f"{name:<20} {handler:<8} {','.join(map(str, row['statuses'])):>8} {row['rps']:>8.1f} "
+                    f"{row['median_ms']:>7.1f}ms {row['p95_ms']:>7.1f}ms {row['p99_ms']:>7.1f}ms {row['max_ms']:>7.1f}ms"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
@@ -0,0 +1,84 @@
+import datetime
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.directory import PAGE_SIZE, directory_queryset, seek
+from core.models import (
+    AcademicYear, Attendance, ExamGrade, Fees, Notification, Schedule, StudentEnrollment
+)
+
+
+def canonical_queries():
+    # The lookups every dashboard page issues; ids only shape the plan, they need not exist
+    today = datetime.date.today()
+    return [
+        ('active academic year', AcademicYear.objects.filter(is_active=True)),
+        ('student enrollment', StudentEnrollment.objects.filter(student_id=1, academic_year_id=1)),
+        ('student enrollment (active year)', StudentEnrollment.objects.filter(
+            student_id=1, academic_year__is_active=True
+        ).select_related('class_assigned__grade', 'class_assigned__academic_year')),
+        ('student attendance', Attendance.objects.filter(
+            student_id=1, academic_year_id=1
+        ).order_by('-date')),
+        ('student attendance by date range', Attendance.objects.filter(
+            student_id=1, academic_year_id=1, date__gte=today - datetime.timedelta(days=30)
+        )),
+        ('student exam grades', ExamGrade.objects.filter(student_id=1, academic_year_id=1)),
+        ('class timetable', Schedule.objects.filter(class_instance_id=1).select_related('subject')),
+        ('class timetable for a day', Schedule.objects.filter(class_instance_id=1, day_of_week='Monday')),
+        ('fees due this year', Fees.objects.filter(academic_year_id=1, due_date__lte=today)),
+        ('class notifications', Notification.objects.filter(is_active=True, class_target=1)),
+        ('directory page', seek(directory_queryset(), ('M', 1))[:PAGE_SIZE]),
+        ('directory page by role', seek(directory_queryset(role='student'), ('M', 1))[:PAGE_SIZE]),
+    ]
+
+
+# SQLite reports "SCAN <table>" for full table scans; index-driven scans name the index
+SQLITE_FULL_SCAN = re.compile(r'\bSCAN (?:TABLE )?(\w+)\b(?! USING (?:COVERING )?INDEX| USING INTEGER PRIMARY KEY)')
+POSTGRES_FULL_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+
+def full_scans(vendor, plan):
+    pattern = POSTGRES_FULL_SCAN if vendor == 'postgresql' else SQLITE_FULL_SCAN
+    return pattern.findall(plan)
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN on the canonical dashboard queries and fail if any falls back to a full table scan.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every query plan.')
+
+    def handle(self, *args, **options):
+        database = options['database']
+        vendor = connections[database].vendor
+        if vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'Query plan checks are not supported on {vendor}.')
+
+        failures = []
+        for label, queryset in canonical_queries():
+            queryset = queryset.using(database)
+            if vendor == 'postgresql':
+                # Small tables make the planner prefer sequential scans; ask what it would do at scale
+                with connections[database].cursor() as cursor:
+                    cursor.execute('SET enable_seqscan = off')
+                    plan = queryset.explain()
+                    cursor.execute('SET enable_seqscan = on')
+            else:
+                plan = queryset.explain()
+
+            if options['verbose_plans']:
+                self.stdout.write(f'-- {label}\n{plan}\n')
+
+            scanned = full_scans(vendor, plan)
+            if scanned:
+                failures.append(label)
+                self.stdout.write(self.style.ERROR(f'FULL SCAN  {label}: {", ".join(sorted(set(scanned)))}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'ok         {label}'))
+
+        if failures:
+            raise CommandError(f'{len(failures)} canonical queries fall back to a full table scan.')
@@ -0,0 +1,48 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.exports import EXPORTS, FORMATS, stream_export
+from core.jobs import enqueue
+
+
+class Command(BaseCommand):
+    help = 'Stream attendance, grade or fee records to a CSV or XLSX file at constant memory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(EXPORTS))
+        parser.add_argument('--format', dest='file_format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--academic-year', type=int, help='AcademicYear id')
+        parser.add_argument('--grade', type=int, help='Grade id')
+        parser.add_argument('--class', dest='class_id', type=int, help='Class id')
+        parser.add_argument('--output', '-o', help='Output file (defaults to stdout)')
+        parser.add_argument('--enqueue', action='store_true', help='Write the file on the background worker')
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            if not options['output']:
+                raise CommandError('--enqueue needs --output.')
+            job = enqueue(
+                'core.export_records', options['name'], options['output'], options['file_format'],
+                academic_year=options['academic_year'], grade=options['grade'],
+                class_instance=options['class_id'],
+            )
+            self.stdout.write(f'Queued job {job.id}.')
+            return
+
+        export = EXPORTS[options['name']]
+        queryset = export.queryset(
+            academic_year=options['academic_year'],
+            grade=options['grade'],
+            class_instance=options['class_id'],
+        )
+        chunks = stream_export(export, queryset, options['file_format'])
+
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+        else:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
@@ -0,0 +1,57 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from core.jobs import enqueue
+from core.models import AcademicYear
+from core.report_cards import FORMATS, generate_report_cards
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the report cards of a class or grade into one zip archive. Rerunning with '
+        'the same --output resumes an interrupted run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', required=True, help='Zip archive to write')
+        parser.add_argument('--academic-year', type=int, help='AcademicYear id (defaults to the active year)')
+        parser.add_argument('--grade', type=int, help='Grade id')
+        parser.add_argument('--class', dest='class_id', type=int, help='Class id')
+        parser.add_argument('--format', dest='file_format', choices=FORMATS, default='html')
+        parser.add_argument('--workers', type=int, help='Rendering processes (defaults to CPU count)')
+        parser.add_argument('--enqueue', action='store_true', help='Render on the background worker instead')
+
+    def handle(self, *args, **options):
+        if options['academic_year']:
+            year = AcademicYear.objects.filter(pk=options['academic_year']).first()
+        else:
+            year = AcademicYear.objects.filter(is_active=True).first()
+        if year is None:
+            raise CommandError('No such academic year.')
+
+        if options['enqueue']:
+            job = enqueue(
+                'core.generate_report_cards', options['output'], year.pk,
+                grade=options['grade'], class_instance=options['class_id'],
+                file_format=options['file_format'], workers=options['workers'],
+            )
+            self.stdout.write(f'Queued job {job.id}.')
+            return
+
+        def progress(run):
+            self.stdout.write(
+                f'{run.resumed + run.rendered}/{run.total} cards, {run.cards_per_second:.1f} cards/s'
+            )
+
+        try:
+            run = generate_report_cards(
+                options['output'], year, grade=options['grade'], class_instance=options['class_id'],
+                file_format=options['file_format'], workers=options['workers'], progress=progress,
+            )
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {run.total} report cards to {run.path} in {run.total_seconds:.2f}s '
+            f'({run.rendered} rendered at {run.cards_per_second:.1f} cards/s, {run.resumed} resumed).'
+        ))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.synthetic import SchoolGenerator, SchoolSpec
+
+SCALES = {
+    # years, grades, classes per grade, students per class, subjects per grade, school days
+    'tiny': dict(years=1, grades=2, classes_per_grade=2, students_per_class=10, subjects_per_grade=4, school_days=20),
+    'small': dict(years=1, grades=6, classes_per_grade=2, students_per_class=25, subjects_per_grade=6, school_days=60),
+    'school': dict(years=2, grades=12, classes_per_grade=4, students_per_class=30, subjects_per_grade=8, school_days=180),
+    'district': dict(years=3, grades=12, classes_per_grade=20, students_per_class=35, subjects_per_grade=10, school_days=180),
+}
+
+
+class Command(BaseCommand):
+    help = 'Generate a synthetic school (years, grades, classes, timetables, enrollments, attendance, grades, fees).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+        parser.add_argument('--years', type=int)
+        parser.add_argument('--grades', type=int)
+        parser.add_argument('--classes-per-grade', type=int)
+        parser.add_argument('--students-per-class', type=int)
+        parser.add_argument('--subjects-per-grade', type=int)
+        parser.add_argument('--school-days', type=int)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        values = dict(SCALES[options['scale']])
+        for name in values:
+            if options.get(name) is not None:
+                values[name] = options[name]
+
+        started = time.perf_counter()
+        counts = SchoolGenerator(SchoolSpec(seed=options['seed'], **values), stdout=self.stdout).generate()
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Generated {summary} in {time.perf_counter() - started:.1f}s.'))
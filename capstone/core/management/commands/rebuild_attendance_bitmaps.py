@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.daily_attendance import rebuild_bitmaps
+from core.jobs import enqueue
+
+
+class Command(BaseCommand):
+    help = 'Recompute the staff and teacher attendance bitmaps from the daily attendance rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help='Only rebuild this calendar year')
+        parser.add_argument('--enqueue', action='store_true', help='Run on the background worker instead')
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            job = enqueue('core.rebuild_attendance_bitmaps', options['year'])
+            self.stdout.write(f'Queued job {job.id}.')
+            return
+
+        started = time.perf_counter()
+        bitmaps = rebuild_bitmaps(options['year'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {bitmaps} attendance bitmaps in {time.perf_counter() - started:.2f}s.'
+        ))
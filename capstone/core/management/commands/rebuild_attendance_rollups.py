@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import enqueue
+from core.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the attendance rollup tables from the raw Attendance rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--academic-year', type=int, help='Only rebuild this AcademicYear id')
+        parser.add_argument('--enqueue', action='store_true', help='Run on the background worker instead')
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            job = enqueue('core.rebuild_attendance_rollups', options['academic_year'])
+            self.stdout.write(f'Queued job {job.id}.')
+            return
+
+        started = time.perf_counter()
+        monthly, daily = rebuild_rollups(options['academic_year'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {monthly} student-month and {daily} class-day rollups '
+            f'in {time.perf_counter() - started:.2f}s.'
+        ))
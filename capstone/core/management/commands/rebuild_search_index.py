@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core.search import SOURCES, backend, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search documents of users, subjects, classes and notifications.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', action='append', choices=sorted(SOURCES), help='Only reindex these kinds.')
+
+    def handle(self, *args, **options):
+        counts = rebuild_index(options['kind'])
+        summary = ', '.join(f'{count} {kind}' for kind, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Indexed {summary} ({backend()} backend).'))
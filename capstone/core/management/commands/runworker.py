@@ -0,0 +1,42 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import discover_tasks, requeue_stale, work
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (notification fan-out, reports, imports, rollup rebuilds).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument(
+            '--stale-after', type=int, default=3600,
+            help='Requeue jobs left running for this many seconds by a crashed worker',
+        )
+
+    def handle(self, *args, **options):
+        stopping = []
+
+        def request_stop(signum, frame):
+            # Finish the current job, then exit
+            stopping.append(signum)
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        tasks = discover_tasks()
+        requeued, failed = requeue_stale(options['stale_after'])
+        self.stdout.write(f'Worker started with {len(tasks)} tasks: {", ".join(sorted(tasks))}')
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} stale jobs.')
+        if failed:
+            self.stdout.write(self.style.WARNING(f'Failed {failed} stale jobs that had no attempts left.'))
+
+        processed = work(
+            poll_interval=options['poll_interval'],
+            burst=options['burst'],
+            stop=lambda: bool(stopping),
+        )
+        self.stdout.write(self.style.SUCCESS(f'Worker stopped after {processed} jobs.'))
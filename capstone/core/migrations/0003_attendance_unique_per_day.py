@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:11
+
+from django.db import migrations, models
+
+
+def remove_duplicate_attendance(apps, schema_editor):
+    # Keep the most recent mark for each (student, subject, date) before the constraint lands
+    Attendance = apps.get_model('core', 'Attendance')
+    keep = (
+        Attendance.objects.values('student', 'subject', 'date')
+        .annotate(latest=models.Max('id'))
+        .values_list('latest', flat=True)
+    )
+    Attendance.objects.exclude(id__in=list(keep)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_initial'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_attendance, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(fields=('student', 'subject', 'date'), name='unique_attendance_per_day'),
+        ),
+    ]
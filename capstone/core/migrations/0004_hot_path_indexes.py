@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:12
+
+from django.db import migrations, models
+
+
+def keep_latest_active_year(apps, schema_editor):
+    # The partial unique index below allows only one active year
+    AcademicYear = apps.get_model('core', 'AcademicYear')
+    latest = AcademicYear.objects.filter(is_active=True).order_by('-id').first()
+    if latest is not None:
+        AcademicYear.objects.filter(is_active=True).exclude(id=latest.id).update(is_active=False)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_attendance_unique_per_day'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(keep_latest_active_year, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['student', 'academic_year', 'date'], name='attendance_student_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='examgrade',
+            index=models.Index(fields=['student', 'academic_year'], name='examgrade_student_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fees',
+            index=models.Index(fields=['academic_year', 'due_date'], name='fees_year_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['class_instance', 'day_of_week'], name='schedule_class_day_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentenrollment',
+            index=models.Index(fields=['student', 'academic_year'], name='enrollment_student_year_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='academicyear',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('is_active',), name='single_active_academic_year'),
+        ),
+    ]
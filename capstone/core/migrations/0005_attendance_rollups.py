@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_hot_path_indexes'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassAttendanceDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('academic_year', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='core.academicyear')),
+                ('class_instance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.class')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.subject')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['class_instance', 'academic_year', 'date'], name='class_daily_year_idx')],
+                'constraints': [models.UniqueConstraint(fields=('class_instance', 'subject', 'date'), name='unique_class_attendance_day')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentAttendanceMonthly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('academic_year', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='core.academicyear')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.studentprofile')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.subject')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student', 'academic_year'], name='student_monthly_year_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'subject', 'academic_year', 'month'), name='unique_student_attendance_month')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:33
+
+from django.db import migrations, models
+
+
+def remove_double_booked_slots(apps, schema_editor):
+    # Keep the most recent entry for each class slot before the constraint lands
+    Schedule = apps.get_model('core', 'Schedule')
+    keep = (
+        Schedule.objects.values('class_instance', 'day_of_week', 'section')
+        .annotate(latest=models.Max('id'))
+        .values_list('latest', flat=True)
+    )
+    Schedule.objects.exclude(id__in=list(keep)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_double_booked_slots, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='schedule',
+            constraint=models.UniqueConstraint(fields=('class_instance', 'day_of_week', 'section'), name='unique_schedule_slot'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_schedule_unique_slot'),
+        ('users', '0003_payroll'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAttendanceBitmap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('present', models.BinaryField(default=bytes)),
+                ('absent', models.BinaryField(default=bytes)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_bitmaps', to='users.customuser')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['year', 'user'], name='attendance_bitmap_year_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'year'), name='unique_attendance_bitmap_year')],
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:05
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+BITMAP_BYTES = 46
+
+
+def rebuild_by_role(apps, schema_editor):
+    # The old bitmaps merged a person's teacher and staff days; rebuild them per role
+    DailyAttendanceBitmap = apps.get_model('core', 'DailyAttendanceBitmap')
+    bits = defaultdict(lambda: [0, 0])
+    for role, model_name, field in (
+        ('teacher', 'TeacherDailyAttendance', 'teacher'),
+        ('staff', 'StaffDailyAttendance', 'staff'),
+    ):
+        rows = apps.get_model('core', model_name).objects.filter(status__in=['Present', 'Absent'])
+        for user_id, date, status in rows.values_list(f'{field}__user_id', 'date', 'status').iterator():
+            bits[(user_id, role, date.year)][status == 'Absent'] |= 1 << (date.timetuple().tm_yday - 1)
+
+    DailyAttendanceBitmap.objects.all().delete()
+    DailyAttendanceBitmap.objects.bulk_create(
+        [
+            DailyAttendanceBitmap(
+                user_id=user_id, role=role, year=year,
+                present=present.to_bytes(BITMAP_BYTES, 'little'), absent=absent.to_bytes(BITMAP_BYTES, 'little'),
+            )
+            for (user_id, role, year), (present, absent) in bits.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_daily_attendance_bitmap'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='dailyattendancebitmap',
+            name='unique_attendance_bitmap_year',
+        ),
+        migrations.RemoveIndex(
+            model_name='dailyattendancebitmap',
+            name='attendance_bitmap_year_idx',
+        ),
+        migrations.AddField(
+            model_name='dailyattendancebitmap',
+            name='role',
+            field=models.CharField(choices=[('teacher', 'Teacher'), ('staff', 'Staff')], default='staff', max_length=10),
+            preserve_default=False,
+        ),
+        migrations.RunPython(rebuild_by_role, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='dailyattendancebitmap',
+            index=models.Index(fields=['role', 'year', 'user'], name='attendance_bitmap_role_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyattendancebitmap',
+            constraint=models.UniqueConstraint(fields=('user', 'role', 'year'), name='unique_attendance_bitmap_role_year'),
+        ),
+    ]
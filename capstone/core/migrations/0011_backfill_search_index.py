@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:20
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def _join(*parts):
+    return ' '.join(str(part) for part in parts if part)
+
+
+def backfill(apps, schema_editor):
+    # 0007 created the index empty, and signals only index rows saved since; index
+    # what was already there. Mirrors the document builders in core.search.
+    SearchDocument = apps.get_model('core', 'SearchDocument')
+    CustomUser = apps.get_model('users', 'CustomUser')
+    roles = dict(CustomUser._meta.get_field('role').choices)
+
+    def users():
+        for row in CustomUser.objects.values(
+            'pk', 'username', 'first_name', 'last_name', 'email', 'nrc_no', 'phone_number', 'role'
+        ).iterator(chunk_size=BATCH_SIZE):
+            yield row['pk'], (
+                f"{row['first_name']} {row['last_name']}".strip() or row['username'],
+                _join(row['username'], row['email'], row['nrc_no'], row['phone_number'], roles.get(row['role'], row['role'])),
+            )
+
+    def subjects():
+        for row in apps.get_model('core', 'Subject').objects.values(
+            'pk', 'name', 'grade__name', 'academic_year__year'
+        ).iterator(chunk_size=BATCH_SIZE):
+            yield row['pk'], (row['name'] or '', _join(row['grade__name'], row['academic_year__year']))
+
+    def classes():
+        for row in apps.get_model('core', 'Class').objects.values(
+            'pk', 'name', 'grade__name', 'academic_year__year'
+        ).iterator(chunk_size=BATCH_SIZE):
+            yield row['pk'], (_join(row['name'], row['grade__name']), _join(row['academic_year__year']))
+
+    def notifications():
+        for row in apps.get_model('core', 'Notification').objects.values(
+            'pk', 'title', 'message'
+        ).iterator(chunk_size=BATCH_SIZE):
+            yield row['pk'], (row['title'], row['message'])
+
+    for kind, documents in (
+        ('user', users()), ('subject', subjects()), ('class', classes()), ('notification', notifications()),
+    ):
+        batch = []
+        for object_id, (title, body) in documents:
+            batch.append(SearchDocument(kind=kind, object_id=object_id, title=title[:255], body=body))
+            if len(batch) >= BATCH_SIZE:
+                _upsert(SearchDocument, batch)
+                batch = []
+        _upsert(SearchDocument, batch)
+
+
+def _upsert(SearchDocument, documents):
+    if documents:
+        SearchDocument.objects.bulk_create(
+            documents, update_conflicts=True, unique_fields=['kind', 'object_id'],
+            update_fields=['title', 'body', 'updated_at'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_daily_attendance_bitmap_role'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -5,6 +5,14 @@ class AcademicYear(models.Model):
     year = models.CharField(max_length=20, blank=True, null=True)  # Example: "2024-2025"
     is_active = models.BooleanField(default=True, blank=True, null=True)
 
+    class Meta:
+        constraints = [
+            # Partial unique index: at most one row may have is_active=True
+            models.UniqueConstraint(
+                fields=['is_active'], condition=models.Q(is_active=True), name='single_active_academic_year'
+            ),
+        ]
+
     def __str__(self):
         return self.year
 
@@ -85,6 +93,17 @@ class Schedule(models.Model):
     subject = models.ForeignKey(Subject, on_delete=models.SET_NULL, null=True, related_name="scheduled_sections")
     day_of_week = models.CharField(max_length=10, choices=DAY_CHOICES)
 
+    class Meta:
+        constraints = [
+            # A class has one subject per section; teacher clashes are checked by academic.timetable
+            models.UniqueConstraint(
+                fields=['class_instance', 'day_of_week', 'section'], name='unique_schedule_slot'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['class_instance', 'day_of_week'], name='schedule_class_day_idx'),
+        ]
+
     def __str__(self):
         return f"{self.class_instance.name} - {self.section} ({self.day_of_week}) - {self.subject.name if self.subject else 'No Subject'}"
 
@@ -112,6 +131,11 @@ class StudentEnrollment(models.Model):
     class_assigned = models.ForeignKey(Class, on_delete=models.CASCADE, blank=True, null=True)
     academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['student', 'academic_year'], name='enrollment_student_year_idx'),
+        ]
+
     def __str__(self):
         return f"{self.student.user.username} in {self.class_assigned.name} ({self.academic_year.year})"
     
@@ -131,9 +155,59 @@ class Attendance(models.Model):
     status = models.CharField(max_length=10, choices=[('Present', 'Present'), ('Absent', 'Absent')], blank=True, null=True)
     academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE, blank=True, null=True)
 
+    class Meta:
+        constraints = [
+            # One mark per student per subject per day; bulk roll-calls upsert on this key
+            models.UniqueConstraint(fields=['student', 'subject', 'date'], name='unique_attendance_per_day'),
+        ]
+        indexes = [
+            models.Index(fields=['student', 'academic_year', 'date'], name='attendance_student_year_idx'),
+        ]
+
     def __str__(self):
         return f"{self.student.user.username} - {self.subject.name} - {self.date} ({self.status})"
 
+# Attendance rollups, maintained incrementally by core.rollups
+class StudentAttendanceMonthly(models.Model):
+    student = models.ForeignKey('users.StudentProfile', on_delete=models.CASCADE)
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
+    academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE, blank=True, null=True)
+    month = models.DateField()  # First day of the month
+    present = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'subject', 'academic_year', 'month'], name='unique_student_attendance_month'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['student', 'academic_year'], name='student_monthly_year_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} - {self.subject_id} - {self.month:%Y-%m} ({self.present}/{self.present + self.absent})"
+
+class ClassAttendanceDaily(models.Model):
+    class_instance = models.ForeignKey(Class, on_delete=models.CASCADE)
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
+    academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE, blank=True, null=True)
+    date = models.DateField()
+    present = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['class_instance', 'subject', 'date'], name='unique_class_attendance_day'),
+        ]
+        indexes = [
+            models.Index(fields=['class_instance', 'academic_year', 'date'], name='class_daily_year_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.class_instance_id} - {self.subject_id} - {self.date} ({self.present}/{self.present + self.absent})"
+
 class Exam(models.Model):
     name = models.CharField(max_length=100, blank=True, null=True)  # Example: "Mid-term Exam"
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE, blank=True, null=True)
@@ -151,6 +225,11 @@ class ExamGrade(models.Model):
     grade = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True)  # Example: 95.50
     academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['student', 'academic_year'], name='examgrade_student_year_idx'),
+        ]
+
     def __str__(self):
         return f"{self.student.user.username} - {self.exam.name} - {self.subject.name} ({self.grade})"
 
@@ -161,17 +240,26 @@ class Fees(models.Model):
     due_date = models.DateField(blank=True, null=True)
     academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['academic_year', 'due_date'], name='fees_year_due_idx'),
+        ]
+
     def __str__(self):
         return f"{self.student.user.username} - Due: {self.amount_due}, Paid: {self.amount_paid}"
 
-    @property
-    def fee_status(self):
-        if self.amount_paid == self.amount_due:
+    @staticmethod
+    def status_for(amount_due, amount_paid):
+        if amount_paid == amount_due:
             return "Complete"
-        elif self.amount_paid > 0 and self.amount_paid < self.amount_due:
+        elif amount_paid > 0 and amount_paid < amount_due:
             return "Partially Paid"
         else:
             return "Not Paid"
+
+    @property
+    def fee_status(self):
+        return self.status_for(self.amount_due, self.amount_paid)
         
 class Notification(models.Model):
     SCOPE_CHOICES = [
@@ -226,3 +314,82 @@ class StaffDailyAttendance(models.Model):
     def __str__(self):
         return f"{self.staff.user.username} - {self.date} ({self.status})"
 
+# Daily attendance of one staff member or teacher over one calendar year, bit n of
+# each bitmap standing for day n of the year; maintained by core.daily_attendance
+class DailyAttendanceBitmap(models.Model):
+    ROLE_CHOICES = [
+        ('teacher', 'Teacher'),
+        ('staff', 'Staff'),
+    ]
+
+    user = models.ForeignKey('users.CustomUser', on_delete=models.CASCADE, related_name='attendance_bitmaps')
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES)  # A user may hold both profiles
+    year = models.PositiveSmallIntegerField()
+    present = models.BinaryField(default=bytes)
+    absent = models.BinaryField(default=bytes)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'role', 'year'], name='unique_attendance_bitmap_role_year'),
+        ]
+        indexes = [
+            models.Index(fields=['role', 'year', 'user'], name='attendance_bitmap_role_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.role} - {self.year}"
+
+# Background job queue (see core.jobs); runs on manage.py runworker without a broker
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    task = models.CharField(max_length=200)  # Registered task name, e.g. "core.rebuild_attendance_rollups"
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_at = models.DateTimeField()  # Not picked up before this time (used for retry backoff)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    result = models.JSONField(blank=True, null=True)
+    last_error = models.TextField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.id} ({self.status})"
+
+# Denormalized search text per indexed object, maintained by core.search. The
+# full-text index over it (FTS5 on SQLite, a tsvector GIN index on PostgreSQL)
+# is created in the migration.
+class SearchDocument(models.Model):
+    KIND_CHOICES = [
+        ('user', 'User'),
+        ('subject', 'Subject'),
+        ('class', 'Class'),
+        ('notification', 'Notification'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True, default='')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id}: {self.title}"
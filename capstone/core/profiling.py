@@ -0,0 +1,224 @@
+import heapq
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import Template
+
+# Request-level SQL profiling. A sampled request records every query through an
+# execute wrapper (so it works with DEBUG off), plus time spent in the view and
+# rendering templates, and reports them as one structured log line, an optional
+# Server-Timing header, and the in-memory list of slowest requests.
+#
+# Every connection carries one wrapper that hands the query to the profile in
+# the _current context variable. Under ASGI the ORM runs on sync_to_async threads
+# with connections of their own; the context variable follows the request there,
+# where a wrapper installed on the request's own thread would see nothing.
+
+logger = logging.getLogger('capstone.profiling')
+
+_current = ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    def __init__(self, request):
+        self.method = request.method
+        self.path = request.path
+        self.started = time.perf_counter()
+        self.queries = Counter()
+        self.query_count = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.template_depth = 0
+        self.view_started = None
+        self.view_seconds = 0.0
+        self.total_seconds = 0.0
+        self.status = None
+        self._lock = threading.Lock()  # Concurrent async queries may record from several threads
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            with self._lock:
+                self.db_seconds += time.perf_counter() - started
+                self.query_count += 1
+                self.queries[sql] += 1
+
+    def duplicates(self):
+        threshold = getattr(settings, 'PROFILING_DUPLICATE_THRESHOLD', 3)
+        return [(sql, count) for sql, count in self.queries.most_common() if count >= threshold]
+
+    def as_dict(self):
+        return {
+            'method': self.method,
+            'path': self.path,
+            'status': self.status,
+            'total_ms': round(self.total_seconds * 1000, 1),
+            'view_ms': round(self.view_seconds * 1000, 1),
+            'template_ms': round(self.template_seconds * 1000, 1),
+            'db_ms': round(self.db_seconds * 1000, 1),
+            'queries': self.query_count,
+            'duplicate_queries': [
+                {'sql': sql[:300], 'count': count} for sql, count in self.duplicates()
+            ],
+        }
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.query_count} queries"',
+            f'tpl;dur={self.template_seconds * 1000:.1f}',
+            f'view;dur={self.view_seconds * 1000:.1f}',
+            f'total;dur={self.total_seconds * 1000:.1f}',
+        ])
+
+
+class SlowestRequests:
+    """Keeps the N slowest profiled requests of this process."""
+
+    def __init__(self, size):
+        self.size = size
+        self._heap = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def add(self, profile):
+        entry = (profile.total_seconds, next(self._counter), profile.as_dict())
+        with self._lock:
+            if len(self._heap) < self.size:
+                heapq.heappush(self._heap, entry)
+            elif entry[0] > self._heap[0][0]:
+                heapq.heapreplace(self._heap, entry)
+
+    def items(self):
+        with self._lock:
+            return [entry[2] for entry in sorted(self._heap, reverse=True)]
+
+    def clear(self):
+        with self._lock:
+            self._heap = []
+
+
+slowest_requests = SlowestRequests(getattr(settings, 'PROFILING_SLOWEST_SIZE', 50))
+
+
+def _profile_query(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    return profile(execute, sql, params, many, context)
+
+
+def _install(connection, **kwargs):
+    if _profile_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_profile_query)
+
+
+connection_created.connect(_install, dispatch_uid='core.profiling')
+
+
+def _instrument_templates():
+    # Time template rendering; includes render inside their parent, so only the
+    # outermost render of a request is counted.
+    if getattr(Template.render, '_profiled', False):
+        return
+    original = Template.render
+
+    def render(self, context=None, request=None):
+        profile = _current.get()
+        if profile is None:
+            return original(self, context, request)
+        profile.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            profile.template_depth -= 1
+            if profile.template_depth == 0:
+                profile.template_seconds += time.perf_counter() - started
+
+    render._profiled = True
+    Template.render = render
+
+
+class QueryProfilingMiddleware:
+    # Both sync and async capable: a sync-only middleware at the top of the stack
+    # would make ASGI run every view, async ones included, in a thread
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        _instrument_templates()
+
+    def _sampled(self):
+        return random.random() < getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+
+    def _start(self, request):
+        # Connections opened before this module was imported never saw connection_created
+        for connection in connections.all(initialized_only=True):
+            _install(connection)
+        profile = RequestProfile(request)
+        request._query_profile = profile
+        return profile, _current.set(profile)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+
+        profile, token = self._start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(profile, response)
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+
+        profile, token = self._start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(profile, response)
+
+    def _finish(self, profile, response):
+        profile.total_seconds = time.perf_counter() - profile.started
+        if profile.view_started is not None:
+            profile.view_seconds = time.perf_counter() - profile.view_started
+        profile.status = response.status_code
+
+        self.report(profile)
+        if getattr(settings, 'PROFILING_SERVER_TIMING', False):
+            response['Server-Timing'] = profile.server_timing()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = getattr(request, '_query_profile', None)
+        if profile is not None:
+            profile.view_started = time.perf_counter()
+
+    def report(self, profile):
+        slowest_requests.add(profile)
+        data = profile.as_dict()
+        slow_ms = getattr(settings, 'PROFILING_SLOW_REQUEST_MS', 500)
+        level = logging.WARNING if data['total_ms'] >= slow_ms or data['duplicate_queries'] else logging.INFO
+        logger.log(level, json.dumps(data))
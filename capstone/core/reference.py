@@ -0,0 +1,74 @@
+from functools import lru_cache
+
+from django.core.cache import cache
+
+from capstone.routers import primary_reads
+from core.caching import bump_version, cache_timeout, get_versions
+from core.models import AcademicYear, Class, Grade, Subject
+
+# School reference data (active year, grades, class and subject catalogs) changes a
+# few times a year but is read on nearly every request. It is cached in two layers:
+# a per-process LRU in front of Django's shared cache, both keyed by the version of
+# the 'reference' namespace, which core.signals bumps on any change.
+REFERENCE_NAMESPACE = 'reference'
+
+# Which year is active. Every dashboard depends on it, but on no other reference
+# data as a whole: core.signals scopes other changes to the classes they touch.
+ACTIVE_YEAR_NAMESPACE = 'reference:active-year'
+
+_LOADERS = {
+    'active_academic_year': lambda: AcademicYear.objects.filter(is_active=True).first(),
+    'grades': lambda: list(Grade.objects.order_by('name')),
+    'classes': lambda: list(
+        Class.objects.filter(academic_year__is_active=True)
+        .select_related('grade', 'academic_year')
+        .order_by('grade__name', 'name')
+    ),
+    'subjects': lambda: list(
+        Subject.objects.filter(academic_year__is_active=True)
+        .select_related('grade', 'academic_year')
+        .order_by('grade__name', 'name')
+    ),
+}
+
+# Sentinel so a cached "no active year" (None) is not mistaken for a miss
+_MISSING = object()
+
+
+@lru_cache(maxsize=64)
+def _local(name, version):
+    key = f'reference:{name}:{version}'
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        with primary_reads():
+            value = _LOADERS[name]()
+        cache.set(key, value, cache_timeout('REFERENCE_CACHE_TIMEOUT', 3600))
+    return value
+
+
+def _get(name):
+    (version,) = get_versions(REFERENCE_NAMESPACE)
+    return _local(name, version)
+
+
+def get_active_academic_year():
+    return _get('active_academic_year')
+
+
+def get_grades():
+    return _get('grades')
+
+
+def get_classes():
+    """Classes of the active academic year, with grade and year preloaded."""
+    return _get('classes')
+
+
+def get_subjects():
+    """Subjects of the active academic year, with grade and year preloaded."""
+    return _get('subjects')
+
+
+def invalidate_reference_data():
+    bump_version(REFERENCE_NAMESPACE)
+    _local.cache_clear()
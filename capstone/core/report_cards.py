@@ -0,0 +1,235 @@
+import itertools
+import logging
+import os
+import shutil
+import time
+import zipfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from decimal import Decimal
+
+import django
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Sum
+from django.template.loader import render_to_string
+from django.utils.text import slugify
+
+from capstone.routers import replica_reads
+from core.analytics import year_statistics
+from core.models import ExamGrade, Fees, StudentAttendanceMonthly, StudentEnrollment
+
+try:
+    from weasyprint import HTML
+except ImportError:  # Optional dependency; only PDF output needs it
+    HTML = None
+
+# Term-end report cards for a whole class or grade. Everything a card shows is read
+# up front in a fixed number of grouped queries (enrollments, exam grades, attendance
+# rollups, fee totals, plus the cached exam analytics for ranks), so the worker
+# processes only render. Each worker writes its card into a ``.parts`` directory next
+# to the archive; a rerun skips cards already there, which makes an interrupted run
+# (or a retried job) resumable. The parts are streamed into the zip at the end.
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('html', 'pdf')
+TEMPLATE = 'core/report_card.html'
+PROGRESS_EVERY = 100
+
+
+@dataclass
+class ReportCardRun:
+    total: int = 0
+    rendered: int = 0
+    resumed: int = 0
+    render_seconds: float = 0.0
+    total_seconds: float = 0.0
+    path: str = ''
+
+    @property
+    def cards_per_second(self):
+        return self.rendered / self.render_seconds if self.render_seconds else 0.0
+
+
+def _percent(present, absent):
+    total = present + absent
+    return round(100 * present / total, 1) if total else None
+
+
+def _enrollments(academic_year, grade=None, class_instance=None):
+    enrollments = StudentEnrollment.objects.filter(academic_year=academic_year, student__isnull=False)
+    if grade is not None:
+        enrollments = enrollments.filter(class_assigned__grade=grade)
+    if class_instance is not None:
+        enrollments = enrollments.filter(class_assigned=class_instance)
+    return enrollments
+
+
+def load_cards(academic_year, grade=None, class_instance=None):
+    """
+    The data of every report card in the class or grade, as plain picklable dicts,
+    in five queries however many students it covers.
+    """
+    enrollments = _enrollments(academic_year, grade, class_instance)
+    students = enrollments.values('student_id')
+
+    subjects = defaultdict(dict)
+
+    def subject_row(student_id, name):
+        return subjects[student_id].setdefault(name, {
+            'name': name, 'exams': [], 'average': None, 'present': 0, 'absent': 0, 'attendance': None,
+        })
+
+    exam_grades = (
+        ExamGrade.objects.filter(academic_year=academic_year, student_id__in=students)
+        .values_list('student_id', 'subject__name', 'exam__name', 'grade')
+        .order_by('student_id', 'subject__name', 'exam__exam_date', 'exam_id')
+    )
+    for student_id, subject_name, exam_name, mark in exam_grades:
+        subject_row(student_id, subject_name or '-')['exams'].append({'name': exam_name or '-', 'grade': mark})
+
+    attendance = (
+        StudentAttendanceMonthly.objects.filter(academic_year=academic_year, student_id__in=students)
+        .values('student_id', 'subject__name')
+        .annotate(present=Sum('present'), absent=Sum('absent'))
+        .order_by()
+    )
+    for row in attendance:
+        subject = subject_row(row['student_id'], row['subject__name'] or '-')
+        subject['present'], subject['absent'] = row['present'], row['absent']
+        subject['attendance'] = _percent(row['present'], row['absent'])
+
+    fees = {
+        row['student_id']: row
+        for row in Fees.objects.filter(academic_year=academic_year, student_id__in=students)
+        .values('student_id')
+        .annotate(amount_due=Sum('amount_due'), amount_paid=Sum('amount_paid'))
+        .order_by()
+    }
+
+    try:
+        ranks = year_statistics(academic_year)['students']
+    except ImproperlyConfigured:
+        # Without NumPy the cards simply go out without class and grade ranks
+        ranks = {}
+
+    cards = []
+    for enrollment in enrollments.select_related(
+        'student__user', 'class_assigned__grade', 'academic_year'
+    ).order_by('class_assigned__grade__name', 'class_assigned__name', 'student__user__last_name', 'student_id'):
+        student_id = enrollment.student_id
+        user = enrollment.student.user
+        rows = sorted(subjects.get(student_id, {}).values(), key=lambda subject: subject['name'])
+        for subject in rows:
+            marks = [exam['grade'] for exam in subject['exams'] if exam['grade'] is not None]
+            subject['average'] = round(sum(marks) / len(marks), 2) if marks else None
+        present = sum(subject['present'] for subject in rows)
+        absent = sum(subject['absent'] for subject in rows)
+        fee = fees.get(student_id)
+        amount_due = (fee and fee['amount_due']) or Decimal('0.00')
+        amount_paid = (fee and fee['amount_paid']) or Decimal('0.00')
+        assigned = enrollment.class_assigned
+        cards.append({
+            'entry': '/'.join([
+                slugify(f'{assigned.grade.name}-{assigned.name}') if assigned else 'unassigned',
+                slugify(user.username) or str(student_id),
+            ]),
+            'student': {
+                'id': student_id,
+                'username': user.username,
+                'name': user.get_full_name() or user.username,
+            },
+            'class_name': assigned.name if assigned else None,
+            'grade_name': assigned.grade.name if assigned else None,
+            'academic_year': enrollment.academic_year.year,
+            'subjects': rows,
+            'attendance': {'present': present, 'absent': absent, 'percent': _percent(present, absent)},
+            'fees': {
+                'amount_due': amount_due,
+                'amount_paid': amount_paid,
+                'outstanding': amount_due - amount_paid,
+                'status': Fees.status_for(amount_due, amount_paid) if fee else None,
+            },
+            'ranks': ranks.get(student_id, {}),
+        })
+    return cards
+
+
+def _init_worker():
+    # Forked workers inherit a configured Django; spawned ones need setting up
+    if not apps.ready:
+        django.setup()
+
+
+def _render_card(card, file_format, parts_dir):
+    html = render_to_string(TEMPLATE, card)
+    content = HTML(string=html).write_pdf() if file_format == 'pdf' else html.encode('utf-8')
+    path = os.path.join(parts_dir, f"{card['entry']}.{file_format}")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write then rename, so a killed worker never leaves a half card to be resumed from
+    with open(f'{path}.tmp', 'wb') as part:
+        part.write(content)
+    os.replace(f'{path}.tmp', path)
+    return card['entry']
+
+
+def _write_archive(path, parts_dir, names, file_format):
+    # PDFs are already compressed; HTML shrinks a lot
+    compression = zipfile.ZIP_STORED if file_format == 'pdf' else zipfile.ZIP_DEFLATED
+    with zipfile.ZipFile(f'{path}.tmp', 'w', compression=compression) as archive:
+        for name in names:
+            archive.write(os.path.join(parts_dir, name), arcname=name)
+    os.replace(f'{path}.tmp', path)
+
+
+def generate_report_cards(path, academic_year, grade=None, class_instance=None, file_format='html',
+                          workers=None, progress=None):
+    """
+    Render the report cards of a class or grade into the zip archive at ``path``.
+
+    ``progress`` is called with the run every PROGRESS_EVERY cards. If the run is
+    interrupted, calling it again with the same ``path`` only renders the cards
+    that are still missing.
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f'Unknown report card format {file_format!r}')
+    if file_format == 'pdf' and HTML is None:
+        raise ImproperlyConfigured('PDF report cards need WeasyPrint; install it with "pip install weasyprint".')
+
+    run = ReportCardRun(path=path)
+    started = time.perf_counter()
+    with replica_reads():
+        cards = load_cards(academic_year, grade=grade, class_instance=class_instance)
+    run.total = len(cards)
+
+    parts_dir = f'{path}.parts'
+    names = [f"{card['entry']}.{file_format}" for card in cards]
+    pending = [card for card, name in zip(cards, names) if not os.path.exists(os.path.join(parts_dir, name))]
+    run.resumed = run.total - len(pending)
+    if run.resumed:
+        logger.info('Resuming %s: %s of %s report cards already rendered', path, run.resumed, run.total)
+
+    workers = workers or os.cpu_count() or 1
+    render_started = time.perf_counter()
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            chunksize = max(1, min(50, len(pending) // (4 * workers)))
+            rendered = pool.map(
+                _render_card, pending, itertools.repeat(file_format), itertools.repeat(parts_dir),
+                chunksize=chunksize,
+            )
+            for _ in rendered:
+                run.rendered += 1
+                if progress is not None and run.rendered % PROGRESS_EVERY == 0:
+                    run.render_seconds = time.perf_counter() - render_started
+                    progress(run)
+    run.render_seconds = time.perf_counter() - render_started
+
+    _write_archive(path, parts_dir, names, file_format)
+    shutil.rmtree(parts_dir, ignore_errors=True)
+    run.total_seconds = time.perf_counter() - started
+    if progress is not None:
+        progress(run)
+    return run
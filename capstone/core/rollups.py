@@ -0,0 +1,164 @@
+import datetime
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from core.models import Attendance, ClassAttendanceDaily, StudentAttendanceMonthly
+
+# Attendance rollups. Rather than applying +1/-1 deltas (which needs the old status
+# of every changed row), each write recomputes and replaces only the rollup cells it
+# touches: one (student, subject, month) cell is at most ~23 raw rows and one
+# (class, subject, date) cell is a single roll-call.
+
+PRESENT = Count('id', filter=Q(status='Present'))
+ABSENT = Count('id', filter=Q(status='Absent'))
+BATCH_SIZE = 1000
+
+# Joins each attendance row to the student's class in the row's academic year
+CLASS_OF_ROW = 'student__studentenrollment__class_assigned'
+SAME_YEAR_ENROLLMENT = Q(student__studentenrollment__academic_year=F('academic_year'))
+
+
+def month_start(date):
+    return date.replace(day=1)
+
+
+def _month_end(month):
+    return (month + datetime.timedelta(days=32)).replace(day=1) - datetime.timedelta(days=1)
+
+
+def _refresh_student_months(subject_id, month, student_ids):
+    rows = (
+        Attendance.objects.filter(
+            subject_id=subject_id, student_id__in=student_ids,
+            date__range=(month, _month_end(month)),
+        )
+        .values('student_id', 'academic_year_id')
+        .annotate(present=PRESENT, absent=ABSENT)
+    )
+    cells = [StudentAttendanceMonthly(subject_id=subject_id, month=month, **row) for row in rows]
+    StudentAttendanceMonthly.objects.filter(
+        subject_id=subject_id, month=month, student_id__in=student_ids
+    ).delete()
+    StudentAttendanceMonthly.objects.bulk_create(cells)
+
+
+def _refresh_class_day(subject_id, date):
+    rows = (
+        Attendance.objects.filter(SAME_YEAR_ENROLLMENT, subject_id=subject_id, date=date)
+        .values('academic_year_id', class_instance_id=F(CLASS_OF_ROW))
+        .annotate(present=PRESENT, absent=ABSENT)
+    )
+    cells = [ClassAttendanceDaily(subject_id=subject_id, date=date, **row) for row in rows]
+    ClassAttendanceDaily.objects.filter(subject_id=subject_id, date=date).delete()
+    ClassAttendanceDaily.objects.bulk_create(cells)
+
+
+def refresh_rollups(keys):
+    """
+    Recompute the rollup cells covering ``keys``, an iterable of
+    (student_id, subject_id, date) tuples of attendance rows that changed.
+    A whole roll-call shares one subject and date, so it costs a handful of queries.
+    """
+    months = defaultdict(set)
+    days = set()
+    for student_id, subject_id, date in keys:
+        if student_id is None or subject_id is None or date is None:
+            continue
+        months[(subject_id, month_start(date))].add(student_id)
+        days.add((subject_id, date))
+
+    with transaction.atomic():
+        for (subject_id, month), student_ids in months.items():
+            _refresh_student_months(subject_id, month, student_ids)
+        for subject_id, date in days:
+            _refresh_class_day(subject_id, date)
+
+
+def rebuild_rollups(academic_year=None):
+    """Recompute every rollup from the raw Attendance table, e.g. after a backfill."""
+    attendance = Attendance.objects.filter(
+        student__isnull=False, subject__isnull=False, date__isnull=False
+    )
+    monthly = StudentAttendanceMonthly.objects.all()
+    daily = ClassAttendanceDaily.objects.all()
+    if academic_year is not None:
+        attendance = attendance.filter(academic_year=academic_year)
+        monthly = monthly.filter(academic_year=academic_year)
+        daily = daily.filter(academic_year=academic_year)
+
+    student_rows = (
+        attendance.annotate(month=TruncMonth('date'))
+        .values('student_id', 'subject_id', 'academic_year_id', 'month')
+        .annotate(present=PRESENT, absent=ABSENT)
+        .order_by()
+    )
+    class_rows = (
+        attendance.filter(SAME_YEAR_ENROLLMENT)
+        .values('subject_id', 'academic_year_id', 'date', class_instance_id=F(CLASS_OF_ROW))
+        .annotate(present=PRESENT, absent=ABSENT)
+        .order_by()
+    )
+
+    with transaction.atomic():
+        monthly.delete()
+        daily.delete()
+        counts = (
+            _bulk_insert(StudentAttendanceMonthly, student_rows),
+            _bulk_insert(ClassAttendanceDaily, class_rows),
+        )
+    return counts
+
+
+def _bulk_insert(model, rows):
+    total = 0
+    batch = []
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        batch.append(model(**row))
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_create(batch)
+            total += len(batch)
+            batch = []
+    model.objects.bulk_create(batch)
+    return total + len(batch)
+
+
+def _rate(present, absent):
+    total = present + absent
+    return round(100 * present / total, 1) if total else None
+
+
+def student_attendance_totals(student, academic_year):
+    return (
+        StudentAttendanceMonthly.objects.filter(student=student, academic_year=academic_year)
+        .values('subject_id', subject_name=F('subject__name'))
+        .annotate(present=Sum('present'), absent=Sum('absent'))
+        .order_by('subject__name')
+    )
+
+
+def attendance_summary_rows(totals):
+    return [
+        {'subject': row['subject_name'], 'present': row['present'], 'absent': row['absent'],
+         'rate': _rate(row['present'], row['absent'])}
+        for row in totals
+    ]
+
+
+def student_attendance_summary(student, academic_year):
+    """Per-subject present/absent totals and rate for one student, in one query."""
+    return attendance_summary_rows(student_attendance_totals(student, academic_year))
+
+
+def class_attendance_by_month(class_instance, academic_year):
+    """Month-by-month present/absent totals and rate for one class, in one query."""
+    rows = (
+        ClassAttendanceDaily.objects.filter(class_instance=class_instance, academic_year=academic_year)
+        .annotate(month=TruncMonth('date'))
+        .values('month')
+        .annotate(present=Sum('present'), absent=Sum('absent'))
+        .order_by('month')
+    )
+    return [dict(row, rate=_rate(row['present'], row['absent'])) for row in rows]
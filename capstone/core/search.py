@@ -0,0 +1,244 @@
+import functools
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from core.models import Class, Notification, SearchDocument, Subject
+from users.models import CustomUser
+
+# Full-text search over one denormalized SearchDocument row per user, subject,
+# class and notification. Signals in core.signals keep the rows current; the
+# migration adds the database's own full-text index on top (FTS5 on SQLite, a
+# weighted tsvector GIN index on PostgreSQL). Other databases, or SQLite builds
+# without FTS5, fall back to substring matching on the documents.
+
+BATCH_SIZE = 1000
+
+FTS_TABLE = 'core_searchdocument_fts'
+# Must match the expression of the GIN index in migration 0007
+POSTGRES_VECTOR = (
+    "setweight(to_tsvector('simple', d.title), 'A') || setweight(to_tsvector('simple', d.body), 'B')"
+)
+
+
+def _join(*parts):
+    return ' '.join(str(part) for part in parts if part)
+
+
+def _user_document(user):
+    return (
+        user.get_full_name() or user.username,
+        _join(user.username, user.email, user.nrc_no, user.phone_number, user.get_role_display()),
+    )
+
+
+def _subject_document(subject):
+    return subject.name or '', _join(subject.grade.name, subject.academic_year and subject.academic_year.year)
+
+
+def _class_document(class_instance):
+    return (
+        _join(class_instance.name, class_instance.grade.name),
+        _join(class_instance.academic_year and class_instance.academic_year.year),
+    )
+
+
+def _notification_document(notification):
+    return notification.title, notification.message
+
+
+# kind -> (model, related rows the document reads, document builder)
+SOURCES = {
+    'user': (CustomUser, (), _user_document),
+    'subject': (Subject, ('grade', 'academic_year'), _subject_document),
+    'class': (Class, ('grade', 'academic_year'), _class_document),
+    'notification': (Notification, (), _notification_document),
+}
+KIND_FOR_MODEL = {model: kind for kind, (model, _, _) in SOURCES.items()}
+
+
+def index_queryset(kind, queryset):
+    """Upsert the documents of every object in ``queryset``; returns how many were written."""
+    model, related, build = SOURCES[kind]
+    written = 0
+    batch = []
+    for obj in queryset.select_related(*related).order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        title, body = build(obj)
+        batch.append(SearchDocument(kind=kind, object_id=obj.pk, title=title[:255], body=body))
+        if len(batch) >= BATCH_SIZE:
+            written += _upsert(batch)
+            batch = []
+    return written + _upsert(batch)
+
+
+def _upsert(documents):
+    if not documents:
+        return 0
+    SearchDocument.objects.bulk_create(
+        documents, update_conflicts=True, unique_fields=['kind', 'object_id'],
+        update_fields=['title', 'body', 'updated_at'],
+    )
+    return len(documents)
+
+
+def index_object(obj):
+    kind = KIND_FOR_MODEL[type(obj)]
+    index_queryset(kind, type(obj).objects.filter(pk=obj.pk))
+
+
+def remove_object(obj):
+    SearchDocument.objects.filter(kind=KIND_FOR_MODEL[type(obj)], object_id=obj.pk).delete()
+
+
+def rebuild_index(kinds=None):
+    """Reindex every object of ``kinds`` (default: all) and drop documents of deleted objects."""
+    counts = {}
+    for kind in kinds or SOURCES:
+        model = SOURCES[kind][0]
+        SearchDocument.objects.filter(kind=kind).exclude(object_id__in=model.objects.values('pk')).delete()
+        counts[kind] = index_queryset(kind, model.objects.all())
+    if backend() == 'fts5':
+        with connection.cursor() as cursor:
+            # Rebuild the FTS5 index from the content table, in case it drifted
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return counts
+
+
+def backend():
+    return _backend(connection.vendor, str(connection.settings_dict['NAME']))
+
+
+@functools.lru_cache(maxsize=None)
+def _backend(vendor, database_name):
+    if vendor == 'postgresql':
+        return 'postgres'
+    if vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names():
+        return 'fts5'
+    return 'fallback'
+
+
+def _terms(query):
+    # Words only: user input never reaches the MATCH/tsquery syntax
+    return re.findall(r'\w+', query.lower())
+
+
+def _kind_clause(kinds, params):
+    if not kinds:
+        return ''
+    params.extend(kinds)
+    return f" AND d.kind IN ({', '.join(['%s'] * len(kinds))})"
+
+
+def _fts5_query(terms):
+    # Every term must match, each as a prefix so results appear while typing
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _postgres_query(terms):
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+def _search_fts5(terms, kinds, limit):
+    params = [_fts5_query(terms)]
+    kind_clause = _kind_clause(kinds, params)
+    params.append(limit)
+    sql = (
+        f"SELECT d.kind, d.object_id, d.title, snippet({FTS_TABLE}, 1, '[', ']', '...', 12), "
+        f"bm25({FTS_TABLE}, 10.0, 1.0) AS rank "
+        f"FROM {FTS_TABLE} JOIN core_searchdocument d ON d.id = {FTS_TABLE}.rowid "
+        f"WHERE {FTS_TABLE} MATCH %s{kind_clause} ORDER BY rank LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        # bm25() is lower-is-better; flip it so every backend ranks higher-is-better
+        return [(kind, object_id, title, snippet, -rank) for kind, object_id, title, snippet, rank in cursor.fetchall()]
+
+
+def _search_postgres(terms, kinds, limit):
+    params = [_postgres_query(terms)]
+    kind_clause = _kind_clause(kinds, params)
+    params.append(limit)
+    sql = (
+        "SELECT d.kind, d.object_id, d.title, "
+        "ts_headline('simple', d.body, q, 'StartSel=[, StopSel=], MaxWords=12, MinWords=4'), "
+        f"ts_rank({POSTGRES_VECTOR}, q) AS rank "
+        "FROM core_searchdocument d, to_tsquery('simple', %s) q "
+        f"WHERE ({POSTGRES_VECTOR}) @@ q{kind_clause} ORDER BY rank DESC LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _search_fallback(terms, kinds, limit):
+    documents = SearchDocument.objects.all()
+    if kinds:
+        documents = documents.filter(kind__in=kinds)
+    for term in terms:
+        documents = documents.filter(Q(title__icontains=term) | Q(body__icontains=term))
+    return [
+        (document.kind, document.object_id, document.title, document.body[:80], 0.0)
+        for document in documents.order_by('title', 'id')[:limit]
+    ]
+
+
+SEARCHERS = {
+    'fts5': _search_fts5,
+    'postgres': _search_postgres,
+    'fallback': _search_fallback,
+}
+
+
+def search(query, kinds=None, limit=20):
+    """Ranked hits for ``query``, best first, as dicts of kind, object_id, title, snippet and score."""
+    terms = _terms(query)
+    if not terms:
+        return []
+    rows = SEARCHERS[backend()](terms, list(kinds or []), limit)
+    return [
+        {'kind': kind, 'object_id': object_id, 'title': title, 'snippet': snippet, 'score': round(score, 4)}
+        for kind, object_id, title, snippet, score in rows
+    ]
+
+
+# Every matching document id as a subquery, unranked and unlimited, for filters
+# that must see all matches (the admin changelist counts and pages them)
+MATCHING_IDS = {
+    'fts5': lambda terms: RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [_fts5_query(terms)]),
+    'postgres': lambda terms: RawSQL(
+        f"SELECT d.id FROM core_searchdocument d WHERE ({POSTGRES_VECTOR}) @@ to_tsquery('simple', %s)",
+        [_postgres_query(terms)],
+    ),
+}
+
+
+def matching_object_ids(kind, query):
+    """Ids of every ``kind`` object matching ``query``, as a subquery; needs a full-text backend."""
+    return SearchDocument.objects.filter(
+        kind=kind, id__in=MATCHING_IDS[backend()](_terms(query))
+    ).values('object_id')
+
+
+class IndexedSearchMixin:
+    """
+    ModelAdmin mixin answering the changelist search box from the search index.
+    ``search_index`` maps a document kind to the lookup that points at it (e.g.
+    {'user': 'student__user'}); ``search_index_fields`` are extra columns still
+    matched with icontains. The plain ``search_fields`` search is used when the
+    database has no full-text index.
+    """
+    search_index = {}
+    search_index_fields = ()
+
+    def get_search_results(self, request, queryset, search_term):
+        if not _terms(search_term) or backend() == 'fallback':
+            return super().get_search_results(request, queryset, search_term)
+
+        condition = Q()
+        for kind, lookup in self.search_index.items():
+            condition |= Q(**{f'{lookup}__in': matching_object_ids(kind, search_term)})
+        for field in self.search_index_fields:
+            condition |= Q(**{f'{field}__icontains': search_term.strip()})
+        return queryset.filter(condition), False
@@ -0,0 +1,244 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from core.analytics import exam_namespace, year_grades_namespace
+from core.caching import bump_version, bump_versions
+from core.dashboard import class_roster_namespace, class_timetable_namespace, student_namespace, teacher_namespace
+from core.models import (
+    AcademicYear, Attendance, Class, Exam, ExamGrade, Fees, Grade, Notification, Schedule, StaffDailyAttendance,
+    StudentEnrollment, Subject, TeacherAssignment, TeacherDailyAttendance
+)
+from core.daily_attendance import DAILY_ATTENDANCE, apply_marks
+from core.reference import ACTIVE_YEAR_NAMESPACE, invalidate_reference_data
+from core.rollups import refresh_rollups
+from core.search import index_object, index_queryset, remove_object
+from users.models import CustomUser
+
+
+# Per-student dashboard payloads and family summaries depend on that student's rows only
+@receiver([post_save, post_delete], sender=Attendance)
+@receiver([post_save, post_delete], sender=ExamGrade)
+@receiver([post_save, post_delete], sender=StudentEnrollment)
+@receiver([post_save, post_delete], sender=Fees)
+def invalidate_student_dashboard(sender, instance, **kwargs):
+    if instance.student_id:
+        bump_version(student_namespace(instance.student_id))
+
+
+# Keep attendance rollups current. pre_save remembers the row's old key so moving
+# a mark to another subject or date also refreshes the cell it left.
+@receiver(pre_save, sender=Attendance)
+def remember_attendance_key(sender, instance, raw=False, **kwargs):
+    instance._rollup_keys = []
+    if instance.pk and not raw:
+        instance._rollup_keys = list(
+            Attendance.objects.filter(pk=instance.pk).values_list('student_id', 'subject_id', 'date')
+        )
+
+
+@receiver([post_save, post_delete], sender=Attendance)
+def refresh_attendance_rollups(sender, instance, **kwargs):
+    keys = getattr(instance, '_rollup_keys', [])
+    keys.append((instance.student_id, instance.subject_id, instance.date))
+    refresh_rollups(set(keys))
+
+
+# Staff and teacher attendance bitmaps. As with the rollups, pre_save remembers the
+# row's old person and day so a mark moved elsewhere is cleared where it was.
+def _daily_attendance_role(sender):
+    return next((role, field) for role, (model, field, _) in DAILY_ATTENDANCE.items() if model is sender)
+
+
+@receiver(pre_save, sender=TeacherDailyAttendance)
+@receiver(pre_save, sender=StaffDailyAttendance)
+def remember_daily_attendance_day(sender, instance, raw=False, **kwargs):
+    instance._bitmap_marks = []
+    if instance.pk and not raw:
+        _, field = _daily_attendance_role(sender)
+        instance._bitmap_marks = [
+            (user_id, date, None)
+            for user_id, date in sender.objects.filter(pk=instance.pk).values_list(f'{field}__user_id', 'date')
+        ]
+
+
+@receiver([post_save, post_delete], sender=TeacherDailyAttendance)
+@receiver([post_save, post_delete], sender=StaffDailyAttendance)
+def update_daily_attendance_bitmap(sender, instance, signal, **kwargs):
+    role, field = _daily_attendance_role(sender)
+    profile_model = sender._meta.get_field(field).related_model
+    # Looked up rather than followed, since a cascade may already have deleted the profile
+    user_id = profile_model.objects.filter(pk=getattr(instance, f'{field}_id')).values_list('user_id', flat=True).first()
+    marks = getattr(instance, '_bitmap_marks', [])
+    marks.append((user_id, instance.date, instance.status if signal is post_save else None))
+    apply_marks(role, marks)
+
+
+# Exam analytics are cached per exam and per academic year. As with the rollups,
+# pre_save remembers where a grade was so moving it stales both sides.
+@receiver(pre_save, sender=ExamGrade)
+def remember_exam_grade_scope(sender, instance, raw=False, **kwargs):
+    instance._analytics_scopes = []
+    if instance.pk and not raw:
+        instance._analytics_scopes = list(
+            ExamGrade.objects.filter(pk=instance.pk).values_list('exam_id', 'academic_year_id')
+        )
+
+
+@receiver([post_save, post_delete], sender=ExamGrade)
+def invalidate_exam_analytics(sender, instance, **kwargs):
+    scopes = set(getattr(instance, '_analytics_scopes', []))
+    scopes.add((instance.exam_id, instance.academic_year_id))
+    namespaces = set()
+    for exam_id, academic_year_id in scopes:
+        if exam_id:
+            namespaces.add(exam_namespace(exam_id))
+        if academic_year_id:
+            namespaces.add(year_grades_namespace(academic_year_id))
+    bump_versions(namespaces)
+
+
+# Moving an exam to another class regroups its grades in the class and grade summaries
+@receiver([post_save, post_delete], sender=Exam)
+def invalidate_exam_scope(sender, instance, **kwargs):
+    namespaces = [exam_namespace(instance.pk)]
+    if instance.academic_year_id:
+        namespaces.append(year_grades_namespace(instance.academic_year_id))
+    bump_versions(namespaces)
+
+
+# Rosters and timetables are cached per class and teacher, so a change only
+# rebuilds the dashboards showing it. pre_save remembers the class (and
+# teacher) a row belonged to, so moving it stales the side it left too.
+CLASS_SCOPED = {
+    StudentEnrollment: ('class_assigned_id', class_roster_namespace),
+    Schedule: ('class_instance_id', class_timetable_namespace),
+    TeacherAssignment: ('class_assigned_id', class_timetable_namespace),
+}
+
+
+def _class_scoped_namespaces(sender, class_id, teacher_id=None):
+    namespaces = {CLASS_SCOPED[sender][1](class_id)} if class_id else set()
+    if teacher_id:
+        namespaces.add(teacher_namespace(teacher_id))
+    return namespaces
+
+
+@receiver(pre_save, sender=StudentEnrollment)
+@receiver(pre_save, sender=Schedule)
+@receiver(pre_save, sender=TeacherAssignment)
+def remember_class_scope(sender, instance, raw=False, **kwargs):
+    instance._class_namespaces = set()
+    if instance.pk and not raw:
+        attname = CLASS_SCOPED[sender][0]
+        fields = [attname, 'teacher_id'] if sender is TeacherAssignment else [attname]
+        for values in sender.objects.filter(pk=instance.pk).values_list(*fields):
+            instance._class_namespaces |= _class_scoped_namespaces(sender, *values)
+
+
+@receiver([post_save, post_delete], sender=StudentEnrollment)
+@receiver([post_save, post_delete], sender=Schedule)
+@receiver([post_save, post_delete], sender=TeacherAssignment)
+def invalidate_class_scope(sender, instance, **kwargs):
+    namespaces = getattr(instance, '_class_namespaces', set())
+    namespaces |= _class_scoped_namespaces(
+        sender, getattr(instance, CLASS_SCOPED[sender][0]), getattr(instance, 'teacher_id', None)
+    )
+    bump_versions(namespaces)
+
+
+# Reference data. Its cached lists (core.reference) go stale on any change, but a
+# dashboard only where the changed class, grade or subject shows: the namespaces
+# of the classes involved, and of their students for the family summaries. Which
+# year is active is the one change every dashboard depends on.
+def _reference_class_namespaces(class_ids):
+    class_ids = set(class_ids) - {None}
+    namespaces = {class_timetable_namespace(class_id) for class_id in class_ids}
+    namespaces |= {class_roster_namespace(class_id) for class_id in class_ids}
+    namespaces |= {
+        student_namespace(student_id)
+        for student_id in StudentEnrollment.objects.filter(class_assigned__in=class_ids, student__isnull=False)
+        .values_list('student_id', flat=True)
+    }
+    return namespaces
+
+
+def _subject_class_ids(subject):
+    # The classes whose timetable, assignments or exams show the subject's name
+    return (
+        set(subject.classes.values_list('id', flat=True))
+        | set(Schedule.objects.filter(subject=subject).values_list('class_instance_id', flat=True))
+        | set(TeacherAssignment.objects.filter(subject=subject).values_list('class_assigned_id', flat=True))
+        | set(Exam.objects.filter(subject=subject).values_list('class_assigned_id', flat=True))
+    )
+
+
+@receiver([post_save, post_delete], sender=AcademicYear)
+def invalidate_academic_year(sender, **kwargs):
+    invalidate_reference_data()
+    bump_version(ACTIVE_YEAR_NAMESPACE)
+
+
+@receiver([post_save, post_delete], sender=Grade)
+def invalidate_grade(sender, instance, **kwargs):
+    # Deleting a grade deletes its classes, which invalidate themselves
+    invalidate_reference_data()
+    bump_versions(_reference_class_namespaces(Class.objects.filter(grade=instance).values_list('id', flat=True)))
+
+
+@receiver([post_save, post_delete], sender=Class)
+def invalidate_class(sender, instance, **kwargs):
+    invalidate_reference_data()
+    bump_versions(_reference_class_namespaces([instance.pk]))
+
+
+@receiver(pre_delete, sender=Subject)
+def remember_subject_classes(sender, instance, **kwargs):
+    # Deleting a subject clears it from the timetable with an UPDATE, which sends no signals
+    instance._class_ids = _subject_class_ids(instance)
+
+
+@receiver([post_save, post_delete], sender=Subject)
+def invalidate_subject(sender, instance, **kwargs):
+    invalidate_reference_data()
+    class_ids = getattr(instance, '_class_ids', None)
+    bump_versions(_reference_class_namespaces(_subject_class_ids(instance) if class_ids is None else class_ids))
+
+
+@receiver(m2m_changed, sender=Subject.classes.through)
+def invalidate_subject_classes(sender, action, **kwargs):
+    # Only the catalogs list which classes take a subject
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_reference_data()
+
+
+# Search documents
+@receiver(post_save, sender=CustomUser)
+@receiver(post_save, sender=Subject)
+@receiver(post_save, sender=Class)
+@receiver(post_save, sender=Notification)
+def index_search_document(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_object(instance)
+
+
+@receiver(post_delete, sender=CustomUser)
+@receiver(post_delete, sender=Subject)
+@receiver(post_delete, sender=Class)
+@receiver(post_delete, sender=Notification)
+def remove_search_document(sender, instance, **kwargs):
+    remove_object(instance)
+
+
+# Subject and class documents include their grade and year names
+@receiver(post_save, sender=Grade)
+def reindex_grade_documents(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_queryset('subject', Subject.objects.filter(grade=instance))
+        index_queryset('class', Class.objects.filter(grade=instance))
+
+
+@receiver(post_save, sender=AcademicYear)
+def reindex_year_documents(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_queryset('subject', Subject.objects.filter(academic_year=instance))
+        index_queryset('class', Class.objects.filter(academic_year=instance))
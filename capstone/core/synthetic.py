@@ -0,0 +1,305 @@
+import datetime
+import math
+import random
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.db import transaction
+
+from core.caching import bump_versions
+from core.dashboard import TIMETABLE_NAMESPACE
+from core.models import (
+    AcademicYear, Attendance, Class, Exam, ExamGrade, Fees, Grade, Notification, Schedule,
+    StudentEnrollment, Subject, TeacherAssignment
+)
+from core.reference import invalidate_reference_data
+from core.rollups import rebuild_rollups
+from core.search import rebuild_index
+from finance.ledger import rebuild_balances
+from finance.models import FeeTransaction
+from academic.timetable import SLOTS, Lesson, even_hours, solve
+from communication.fanout import sync_deliveries
+from users.models import CustomUser, ParentProfile
+from users.signals import ROLE_PROFILES
+
+# Synthetic school generator for load tests and benchmarks. Everything is written
+# with bulk_create in dependency order, so signals are bypassed; caches and rollups
+# are refreshed once at the end instead.
+
+BATCH_SIZE = 2000
+DAYS = [choice for choice, _ in Schedule.DAY_CHOICES]
+TEACHER_LOAD = 18  # Sections a week per teacher
+SUBJECT_NAMES = [
+    'Mathematics', 'English', 'Science', 'History', 'Geography', 'Art', 'Music',
+    'Physical Education', 'Computing', 'Literature', 'Chemistry', 'Physics', 'Biology',
+]
+CLASS_NAMES = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+class SchoolSpec:
+    def __init__(self, years=1, grades=6, classes_per_grade=3, students_per_class=30,
+                 subjects_per_grade=6, school_days=180, exams_per_subject=2,
+                 parent_ratio=0.8, staff=10, seed=1):
+        self.years = years
+        self.grades = grades
+        self.classes_per_grade = classes_per_grade
+        self.students_per_class = students_per_class
+        self.subjects_per_grade = min(subjects_per_grade, len(SUBJECT_NAMES))
+        self.school_days = school_days
+        self.exams_per_subject = exams_per_subject
+        self.parent_ratio = parent_ratio
+        self.staff = staff
+        self.seed = seed
+
+
+def _bulk(model, objects):
+    return model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+
+
+def _school_days(start, count):
+    day = start
+    while count:
+        if day.weekday() < 5:
+            yield day
+            count -= 1
+        day += datetime.timedelta(days=1)
+
+
+class SchoolGenerator:
+    def __init__(self, spec, stdout=None):
+        self.spec = spec
+        self.random = random.Random(spec.seed)
+        self.stdout = stdout
+        self.password = make_password('password')  # One hash shared by every generated account
+        self.counts = {}
+
+    def log(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    def _users(self, role, prefix, count):
+        start = CustomUser.objects.filter(username__startswith=f'{prefix}_').count()
+        users = _bulk(CustomUser, [
+            CustomUser(
+                username=f'{prefix}_{start + i:05d}',
+                first_name=prefix.title(),
+                last_name=f'{prefix.title()}{start + i:05d}',
+                role=role,
+                password=self.password,
+                gender=self.random.choice(['male', 'female']),
+            )
+            for i in range(count)
+        ])
+        profile_model, group_name = ROLE_PROFILES[role]
+        profiles = _bulk(profile_model, [profile_model(user=user) for user in users])
+        group, _ = Group.objects.get_or_create(name=group_name)
+        Membership = CustomUser.groups.through
+        _bulk(Membership, [Membership(customuser_id=user.pk, group_id=group.pk) for user in users])
+        self.counts[role] = self.counts.get(role, 0) + len(users)
+        return profiles
+
+    def generate(self):
+        spec = self.spec
+        with transaction.atomic():
+            if not CustomUser.objects.filter(is_superuser=True).exists():
+                admin_user = CustomUser.objects.create(
+                    username='admin', role='admin', password=self.password, is_staff=True, is_superuser=True
+                )
+                self.log(f'Created superuser {admin_user.username} (password: "password")')
+
+            grades = _bulk(Grade, [Grade(name=f'Grade {n + 1}') for n in range(spec.grades)])
+            staff = self._users('staff', 'staff', spec.staff)
+            # Enough teachers per grade to cover every class's week; a teacher moves on
+            # once the next class would take them past TEACHER_LOAD sections
+            longest = math.ceil(len(SLOTS) / spec.subjects_per_grade)
+            per_grade = math.ceil(spec.classes_per_grade * len(SLOTS) / max(1, TEACHER_LOAD - longest + 1))
+            teachers = self._users('teacher', 'teacher', spec.grades * per_grade)
+            students = self._users(
+                'student', 'student', spec.grades * spec.classes_per_grade * spec.students_per_class
+            )
+            parent_count = int(len(students) * spec.parent_ratio / 2)
+            parents = self._users('parent', 'parent', parent_count)
+            self._link_parents(parents, students)
+
+            # Students are dealt into classes once and keep their seat every year
+            seats = {}
+            per_grade = spec.classes_per_grade * spec.students_per_class
+            for index, student in enumerate(students):
+                grade_index, offset = divmod(index, per_grade)
+                seats[student.pk] = (grade_index, offset // spec.students_per_class)
+
+            first_year = datetime.date.today().year - spec.years + 1
+            AcademicYear.objects.filter(is_active=True).update(is_active=False)
+            for n in range(spec.years):
+                start = first_year + n
+                year = AcademicYear.objects.create(
+                    year=f'{start}-{start + 1}', is_active=(n == spec.years - 1)
+                )
+                self.log(f'Generating academic year {year.year}')
+                self._generate_year(year, datetime.date(start, 9, 1), grades, teachers, students, seats, staff)
+
+            self._notifications(staff, grades)
+
+        invalidate_reference_data()
+        bump_versions([TIMETABLE_NAMESPACE])
+        self.log('Rebuilding attendance rollups')
+        rebuild_rollups()
+        self.log('Summarising fee balances')
+        rebuild_balances()
+        self.log('Indexing search documents')
+        rebuild_index()
+        self.log('Filling notification inboxes')
+        for notification_id in Notification.objects.values_list('id', flat=True):
+            sync_deliveries(notification_id)
+        return self.counts
+
+    def _link_parents(self, parents, students):
+        Link = ParentProfile.students.through
+        links = []
+        for index, parent in enumerate(parents):
+            # Two children per parent, siblings spread across grades
+            for student in (students[index], students[-index - 1]):
+                links.append(Link(parentprofile_id=parent.pk, studentprofile_id=student.pk))
+        _bulk(Link, links)
+
+    def _generate_year(self, year, start, grades, teachers, students, seats, staff):
+        spec = self.spec
+        classes = {}
+        for grade_index, grade in enumerate(grades):
+            for class_index in range(spec.classes_per_grade):
+                classes[(grade_index, class_index)] = Class(
+                    name=f'Class {CLASS_NAMES[class_index % len(CLASS_NAMES)]}', grade=grade, academic_year=year
+                )
+        _bulk(Class, list(classes.values()))
+
+        subjects = {}
+        for grade_index, grade in enumerate(grades):
+            subjects[grade_index] = _bulk(Subject, [
+                Subject(name=name, grade=grade, academic_year=year)
+                for name in SUBJECT_NAMES[:spec.subjects_per_grade]
+            ])
+        SubjectClasses = Subject.classes.through
+        _bulk(SubjectClasses, [
+            SubjectClasses(subject_id=subject.pk, class_id=classes[(grade_index, class_index)].pk)
+            for grade_index, grade_subjects in subjects.items()
+            for subject in grade_subjects
+            for class_index in range(spec.classes_per_grade)
+        ])
+
+        # Each subject's classes are dealt to the grade's teachers, filling one
+        # teacher up to TEACHER_LOAD sections before moving to the next
+        assignments = []
+        lessons = []
+        teachers_per_grade = len(teachers) // len(grades)
+        for grade_index, grade_subjects in subjects.items():
+            pool = iter(teachers[grade_index * teachers_per_grade:(grade_index + 1) * teachers_per_grade])
+            hours = even_hours([subject.pk for subject in grade_subjects])
+            teacher, load = next(pool), 0
+            for subject in grade_subjects:
+                for class_index in range(spec.classes_per_grade):
+                    if load and load + hours[subject.pk] > TEACHER_LOAD:
+                        teacher, load = next(pool), 0
+                    load += hours[subject.pk]
+                    class_instance = classes[(grade_index, class_index)]
+                    assignments.append(TeacherAssignment(
+                        teacher=teacher, subject=subject, class_assigned=class_instance, academic_year=year,
+                    ))
+                    lessons.append(Lesson(class_instance.pk, subject.pk, teacher.pk, hours[subject.pk]))
+        _bulk(TeacherAssignment, assignments)
+
+        # Clash-free timetable from the solver
+        subject_by_id = {subject.pk: subject for grade_subjects in subjects.values() for subject in grade_subjects}
+        schedules = []
+        timetable = {}
+        for (class_id, slot), subject_id in solve(lessons, seed=spec.seed).placements.items():
+            day, section = SLOTS[slot]
+            schedules.append(Schedule(class_instance_id=class_id, section=section, subject_id=subject_id, day_of_week=day))
+            timetable.setdefault((class_id, day), []).append(subject_by_id[subject_id])
+        _bulk(Schedule, schedules)
+
+        class_of = {pk: classes[seat] for pk, seat in seats.items()}
+        _bulk(StudentEnrollment, [
+            StudentEnrollment(student=student, class_assigned=class_of[student.pk], academic_year=year)
+            for student in students
+        ])
+
+        self._attendance(year, start, students, class_of, timetable)
+        self._exams(year, start, classes, subjects, students, class_of)
+        self._fees(year, start, students)
+
+    def _attendance(self, year, start, students, class_of, timetable):
+        batch = []
+        total = 0
+        for day in _school_days(start, self.spec.school_days):
+            weekday = DAYS[day.weekday()]
+            for student in students:
+                # One mark per subject per day, however many sections it has
+                for subject in set(timetable[(class_of[student.pk].pk, weekday)]):
+                    batch.append(Attendance(
+                        student=student, subject=subject, date=day, academic_year=year,
+                        status='Present' if self.random.random() < 0.93 else 'Absent',
+                    ))
+            if len(batch) >= BATCH_SIZE * 5:
+                total += len(_bulk(Attendance, batch))
+                batch = []
+        total += len(_bulk(Attendance, batch))
+        self.counts['attendance'] = self.counts.get('attendance', 0) + total
+
+    def _exams(self, year, start, classes, subjects, students, class_of):
+        exams = []
+        for (grade_index, _), class_instance in classes.items():
+            for subject in subjects[grade_index]:
+                for n in range(self.spec.exams_per_subject):
+                    exams.append(Exam(
+                        name=f'Exam {n + 1}', subject=subject, class_assigned=class_instance,
+                        exam_date=start + datetime.timedelta(days=60 + 90 * n), academic_year=year,
+                    ))
+        exams = _bulk(Exam, exams)
+
+        by_class = {}
+        for exam in exams:
+            by_class.setdefault(exam.class_assigned_id, []).append(exam)
+        grades = []
+        for student in students:
+            ability = self.random.gauss(70, 10)
+            for exam in by_class[class_of[student.pk].pk]:
+                score = max(0.0, min(100.0, self.random.gauss(ability, 8)))
+                grades.append(ExamGrade(
+                    student=student, exam=exam, subject_id=exam.subject_id,
+                    grade=Decimal(f'{score:.2f}'), academic_year=year,
+                ))
+        self.counts['exam_grades'] = self.counts.get('exam_grades', 0) + len(_bulk(ExamGrade, grades))
+
+    def _fees(self, year, start, students):
+        fees = []
+        for student in students:
+            for term in range(3):
+                amount_due = Decimal('500.00')
+                amount_paid = self.random.choice([amount_due, amount_due, Decimal('250.00'), Decimal('0.00')])
+                fees.append(Fees(
+                    student=student, amount_due=amount_due, amount_paid=amount_paid,
+                    due_date=start + datetime.timedelta(days=30 + 120 * term), academic_year=year,
+                ))
+        fees = _bulk(Fees, fees)
+        # Payments go through the ledger; amount_paid is the running total of these
+        _bulk(FeeTransaction, [
+            FeeTransaction(fee=fee, kind='payment', amount=fee.amount_paid) for fee in fees if fee.amount_paid
+        ])
+        self.counts['fees'] = self.counts.get('fees', 0) + len(fees)
+
+    def _notifications(self, staff, grades):
+        sender = staff[0]
+        notifications = _bulk(Notification, [
+            Notification(title=f'School notice {n + 1}', message='Synthetic school-wide notice.', sender=sender)
+            for n in range(5)
+        ] + [
+            Notification(title=f'{grade.name} notice', message='Synthetic grade notice.', sender=sender, scope='Grade')
+            for grade in grades
+        ])
+        GradeTarget = Notification.grade_target.through
+        _bulk(GradeTarget, [
+            GradeTarget(notification_id=notification.pk, grade_id=grade.pk)
+            for notification, grade in zip(notifications[5:], grades)
+        ])
+        self.counts['notifications'] = len(notifications)
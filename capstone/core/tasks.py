@@ -0,0 +1,46 @@
+import logging
+
+from capstone.routers import replica_alias
+from core.daily_attendance import rebuild_bitmaps
+from core.exports import EXPORTS, stream_export
+from core.jobs import task
+from core.models import AcademicYear
+from core.report_cards import generate_report_cards
+from core.rollups import rebuild_rollups
+
+logger = logging.getLogger(__name__)
+
+
+@task('core.rebuild_attendance_rollups')
+def rebuild_attendance_rollups(academic_year=None):
+    monthly, daily = rebuild_rollups(academic_year)
+    return {'monthly': monthly, 'daily': daily}
+
+
+@task('core.rebuild_attendance_bitmaps')
+def rebuild_attendance_bitmaps(year=None):
+    return {'bitmaps': rebuild_bitmaps(year)}
+
+
+@task('core.export_records')
+def export_records(name, path, file_format='csv', academic_year=None, grade=None, class_instance=None):
+    export = EXPORTS[name]
+    queryset = export.queryset(academic_year=academic_year, grade=grade, class_instance=class_instance)
+    queryset = queryset.using(replica_alias())
+    size = 0
+    with open(path, 'wb') as output:
+        for chunk in stream_export(export, queryset, file_format):
+            output.write(chunk)
+            size += len(chunk)
+    return {'path': path, 'bytes': size}
+
+
+@task('core.generate_report_cards')
+def generate_report_cards_archive(path, academic_year, grade=None, class_instance=None, file_format='html', workers=None):
+    # A retried job resumes from the cards the failed attempt already rendered
+    year = AcademicYear.objects.get(pk=academic_year)
+    run = generate_report_cards(
+        path, year, grade=grade, class_instance=class_instance, file_format=file_format, workers=workers,
+        progress=lambda run: logger.info('%s: %s of %s report cards', path, run.resumed + run.rendered, run.total),
+    )
+    return {'path': path, 'cards': run.total, 'rendered': run.rendered, 'resumed': run.resumed}
@@ -0,0 +1,67 @@
+import datetime
+
+from django.contrib import admin
+from django.core.cache import cache
+from django.db.models.signals import post_save
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.admin_base import CoreModelAdmin, count_namespace
+from core.attendance import record_roll_call
+from core.caching import get_versions
+from core.models import AcademicYear, Attendance, Class, Grade
+
+from .utils import FAST_HASHER, make_student, make_subject, make_user
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class ChangelistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        year = AcademicYear.objects.create(year='2024-2025', is_active=True)
+        grade = Grade.objects.create(name='Grade 1')
+        cls.class_a = Class.objects.create(name='A', grade=grade, academic_year=year)
+        cls.subject = make_subject('Maths', grade, year)
+        cls.students = [make_student(f'student{index}', cls.class_a) for index in range(6)]
+        cls.admin_user = make_user('root', 'admin')
+        cls.admin_user.is_staff = cls.admin_user.is_superuser = True
+        cls.admin_user.save()
+
+    def setUp(self):
+        cache.clear()
+
+    def changelist(self):
+        request = RequestFactory().get('/')
+        request.user = self.admin_user
+        response = admin.site._registry[Attendance].changelist_view(request)
+        response.render()
+        return response
+
+    def roll_call(self, day, students):
+        date = datetime.date(2024, 9, 2) + datetime.timedelta(days=day)
+        record_roll_call(self.class_a, self.subject, date, {student.id: 'Present' for student in students})
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        # Filter choices, count, rows and the date hierarchy's two
+        self.roll_call(0, self.students[:1])
+        with self.assertNumQueries(5):
+            self.changelist()
+        for day in range(1, 5):
+            self.roll_call(day, self.students)
+        cache.clear()
+        with self.assertNumQueries(5):
+            self.assertContains(self.changelist(), 'student5')
+
+    def test_counts_are_invalidated_once_per_change(self):
+        receivers = len(post_save._live_receivers(Class)[0])
+        CoreModelAdmin(Class, admin.AdminSite())
+        self.assertEqual(len(post_save._live_receivers(Class)[0]), receivers)
+
+        (version,) = get_versions(count_namespace(Class))
+        Class.objects.create(name='B', grade=self.class_a.grade, academic_year=self.class_a.academic_year)
+        self.assertEqual(get_versions(count_namespace(Class)), (version + 1,))
+
+    def test_bulk_roll_call_recounts_attendance(self):
+        (version,) = get_versions(count_namespace(Attendance))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.roll_call(0, self.students)
+        self.assertEqual(get_versions(count_namespace(Attendance)), (version + 1,))
@@ -0,0 +1,72 @@
+from decimal import Decimal
+from unittest import skipIf
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from core.analytics import HISTOGRAM_BINS, GroupStats, exam_statistics, np
+from core.models import AcademicYear, Class, Exam, ExamGrade, Grade
+
+from .utils import FAST_HASHER, make_student, make_subject
+
+
+@skipIf(np is None, 'NumPy is not installed')
+class GroupStatsTests(TestCase):
+    def test_ranks_percentiles_and_summaries(self):
+        keys = np.array([1, 1, 1, 1, 2, 2])
+        values = np.array([90.0, 80.0, 80.0, 70.0, 50.0, 60.0])
+        stats = GroupStats(keys, values)
+        # Competition ranks: the tied 80s share 2nd place and 70 is 4th
+        self.assertEqual(stats.rank.tolist(), [1, 2, 2, 4, 2, 1])
+        self.assertEqual(stats.percentile.tolist(), [75.0, 25.0, 25.0, 0.0, 0.0, 50.0])
+
+        summaries = stats.summaries()
+        self.assertEqual(sorted(summaries), [1, 2])
+        first = summaries[1]
+        group = values[:4]
+        self.assertEqual((first['count'], first['mean'], first['min'], first['max']), (4, 80.0, 70.0, 90.0))
+        self.assertEqual(first['stdev'], round(float(np.std(group)), 2))
+        for p, value in first['percentiles'].items():
+            self.assertEqual(value, round(float(np.percentile(group, p)), 2))
+        self.assertEqual(first['histogram'], np.histogram(group, bins=HISTOGRAM_BINS)[0].tolist())
+
+    def test_averages_tie_to_the_hundredth(self):
+        stats = GroupStats(np.zeros(3, dtype=np.int64), np.array([200 / 3, 66.67, 50.0]))
+        self.assertEqual(stats.rank.tolist(), [1, 1, 3])
+
+    def test_empty_input(self):
+        stats = GroupStats(np.array([], dtype=np.int64), np.array([]))
+        self.assertEqual(stats.summaries(), {})
+
+
+@skipIf(np is None, 'NumPy is not installed')
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class ExamStatisticsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_cached_statistics_follow_grade_changes(self):
+        year = AcademicYear.objects.create(year='2024-2025', is_active=True)
+        grade = Grade.objects.create(name='Grade 1')
+        class_a = Class.objects.create(name='A', grade=grade, academic_year=year)
+        subject = make_subject('Maths', grade, year)
+        exam = Exam.objects.create(name='Mid-term', subject=subject, class_assigned=class_a, academic_year=year)
+        students = [make_student(f'student{index}', class_a) for index in range(3)]
+        grades = [
+            ExamGrade.objects.create(student=student, exam=exam, subject=subject, grade=mark, academic_year=year)
+            for student, mark in zip(students, [Decimal('70.00'), Decimal('85.50'), Decimal('85.50')])
+        ]
+
+        statistics = exam_statistics(exam)
+        self.assertEqual((statistics['count'], statistics['max']), (3, 85.5))
+        self.assertEqual(
+            [(row['student'], row['rank']) for row in statistics['ranking']],
+            [(students[1].id, 1), (students[2].id, 1), (students[0].id, 3)],
+        )
+
+        grades[0].grade = Decimal('95.00')
+        grades[0].save()
+        statistics = exam_statistics(exam)
+        self.assertEqual(statistics['ranking'][0], {
+            'student': students[0].id, 'score': 95.0, 'rank': 1, 'percentile': 66.7,
+        })
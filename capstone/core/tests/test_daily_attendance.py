@@ -0,0 +1,105 @@
+import datetime
+from io import StringIO
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.daily_attendance import BITMAP_BYTES, absent_on, presence_by_month, presence_summary, record_check_in
+from core.models import DailyAttendanceBitmap, StaffDailyAttendance
+from users.models import StaffProfile, TeacherProfile
+
+from .utils import FAST_HASHER, make_user
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class DailyAttendanceBitmapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = [StaffProfile.objects.get(user=make_user(f'staff{index}', 'staff')) for index in range(3)]
+
+    def bitmaps(self):
+        return {
+            (bitmap.user_id, bitmap.role, bitmap.year): (bytes(bitmap.present), bytes(bitmap.absent))
+            for bitmap in DailyAttendanceBitmap.objects.all()
+        }
+
+    def test_check_in_feeds_the_summaries(self):
+        first, second, third = self.staff
+        record_check_in('staff', datetime.date(2024, 3, 1), {second.id: 'Absent'}, default_status='Present')
+        record_check_in('staff', datetime.date(2024, 3, 4), {first.id: 'Present', second.id: 'Present'})
+        # The last day of a leap year is bit 365, the last bit the bitmap holds
+        record_check_in('staff', datetime.date(2024, 12, 31), {third.id: 'Absent'})
+
+        bitmap = DailyAttendanceBitmap.objects.get(user=third.user, role='staff', year=2024)
+        self.assertEqual(len(bytes(bitmap.absent)), BITMAP_BYTES)
+        march = {row['id']: (row['present'], row['absent']) for row in presence_summary('staff', 2024, 3)}
+        self.assertEqual(march, {first.user_id: (2, 0), second.user_id: (1, 1), third.user_id: (1, 0)})
+        year = {row['id']: (row['present'], row['absent']) for row in presence_summary('staff', 2024)}
+        self.assertEqual(year[third.user_id], (1, 1))
+        self.assertEqual(
+            [(row['month'].month, row['present'], row['absent']) for row in presence_by_month('staff', 2024)],
+            [(3, 4, 1), (12, 0, 1)],
+        )
+        on_fourth = absent_on('staff', datetime.date(2024, 3, 4))
+        self.assertEqual(on_fourth['absent'], [])
+        self.assertEqual([person['id'] for person in on_fourth['unmarked']], [third.user_id])
+
+    def test_single_rows_and_rebuild_agree(self):
+        first, second, _ = self.staff
+        date = datetime.date(2025, 1, 10)
+        row = StaffDailyAttendance.objects.create(staff=first, date=date, status='Present')
+        StaffDailyAttendance.objects.create(staff=second, date=date, status='Absent')
+        row.status = 'Absent'
+        row.save()
+        self.assertEqual([person['id'] for person in absent_on('staff', date)['absent']], [first.user_id, second.user_id])
+
+        # Moving a row to another year clears the day it left
+        row.date = datetime.date(2024, 1, 10)
+        row.save()
+        self.assertEqual([person['id'] for person in absent_on('staff', date)['absent']], [second.user_id])
+        incremental = self.bitmaps()
+
+        DailyAttendanceBitmap.objects.all().delete()
+        call_command('rebuild_attendance_bitmaps', stdout=StringIO())
+        rebuilt = self.bitmaps()
+        # The rebuild has no bitmap for a person whose year is now empty
+        self.assertEqual(rebuilt, {key: bits for key, bits in incremental.items() if any(any(b) for b in bits)})
+
+        row.delete()
+        self.assertEqual(presence_summary('staff', 2024, 1)[0]['absent'], 0)
+
+    def test_roles_follow_profiles_and_keep_their_own_days(self):
+        # A teacher who also works in the office, and an admin with a staff profile
+        teacher = TeacherProfile.objects.get(user=make_user('teacher', 'teacher'))
+        desk = StaffProfile.objects.create(user=teacher.user)
+        office = StaffProfile.objects.create(user=make_user('head', 'admin'))
+        date = datetime.date(2024, 3, 1)
+        record_check_in('teacher', date, {teacher.id: 'Absent'})
+        record_check_in('staff', date, {desk.id: 'Present', office.id: 'Absent'})
+
+        self.assertEqual(
+            sorted(DailyAttendanceBitmap.objects.filter(user=teacher.user).values_list('role', flat=True)),
+            ['staff', 'teacher'],
+        )
+        self.assertEqual([person['id'] for person in absent_on('teacher', date)['absent']], [teacher.user_id])
+        staff = absent_on('staff', date)
+        self.assertEqual([person['id'] for person in staff['absent']], [office.user_id])
+        self.assertNotIn(teacher.user_id, [person['id'] for person in staff['unmarked']])
+        self.assertEqual(
+            {row['id']: row['present'] for row in presence_summary('staff', 2024, 3)}[teacher.user_id], 1
+        )
+
+        incremental = self.bitmaps()
+        DailyAttendanceBitmap.objects.all().delete()
+        call_command('rebuild_attendance_bitmaps', stdout=StringIO())
+        self.assertEqual(self.bitmaps(), incremental)
+
+    def test_invalid_marks_are_rejected(self):
+        with self.assertRaises(ValidationError):
+            record_check_in('staff', datetime.date(2024, 3, 1), {}, default_status='Late')
+        with self.assertRaises(ValidationError):
+            record_check_in('staff', datetime.date(2024, 3, 1), {0: 'Present'})
+        with self.assertRaises(ValidationError):
+            record_check_in('janitor', datetime.date(2024, 3, 1), {})
+        self.assertFalse(DailyAttendanceBitmap.objects.exists())
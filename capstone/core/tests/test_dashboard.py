@@ -0,0 +1,191 @@
+import datetime
+import json
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from communication.inbox import rendered_inbox
+from communication.models import InboxDelivery
+from core import views
+from core.async_dashboard import abuild_student_dashboard, abuild_teacher_dashboard
+from core.attendance import record_roll_call
+from core.dashboard import RECENT_ATTENDANCE, build_student_dashboard, build_teacher_dashboard, get_teacher_dashboard
+from core.family import get_family_summary
+from core.models import (
+    AcademicYear, Attendance, Class, Exam, ExamGrade, Grade, Notification, Schedule, TeacherAssignment
+)
+from core.reference import get_active_academic_year
+from users.models import ParentProfile, StaffProfile, TeacherProfile
+
+from .utils import FAST_HASHER, make_student, make_subject, make_user
+
+
+def request_for(user):
+    request = RequestFactory().get('/')
+    request.user = user
+
+    async def auser():
+        return user
+
+    request.auser = auser
+    return request
+
+
+def deliver(user, count):
+    sender = StaffProfile.objects.get(user=make_user(f'office-{user.username}', 'staff'))
+    now = timezone.now()
+    for index in range(count):
+        notification = Notification.objects.create(title=f'Notice {index}', message='m', sender=sender)
+        # Fan-out runs on commit, which a TestCase never reaches; deliver directly
+        InboxDelivery.objects.create(user=user, notification=notification, created_at=now)
+    Notification.objects.create(title='Not delivered', message='m', sender=sender)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class StudentDashboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.year = AcademicYear.objects.create(year='2024-2025', is_active=True)
+        grade = Grade.objects.create(name='Grade 1')
+        cls.class_a = Class.objects.create(name='A', grade=grade, academic_year=cls.year)
+        cls.subjects = [make_subject(f'Subject {index}', grade, cls.year) for index in range(3)]
+        cls.student = make_student('student', cls.class_a)
+        start = datetime.date(2024, 9, 2)
+        for section, subject in zip(['1st Section', '2nd Section', '3rd Section'], cls.subjects):
+            Schedule.objects.create(class_instance=cls.class_a, day_of_week='Monday', section=section, subject=subject)
+            exam = Exam.objects.create(
+                name='Mid-term', subject=subject, class_assigned=cls.class_a, exam_date=start, academic_year=cls.year
+            )
+            ExamGrade.objects.create(student=cls.student, exam=exam, subject=subject, grade=80, academic_year=cls.year)
+            for day in range(15):
+                Attendance.objects.create(
+                    student=cls.student, subject=subject, date=start + datetime.timedelta(days=day),
+                    status='Present', academic_year=cls.year,
+                )
+
+    def setUp(self):
+        cache.clear()
+        # Reference data is cached for the whole process; load it outside the budget
+        get_active_academic_year()
+
+    def test_dashboard_is_built_in_a_fixed_number_of_queries(self):
+        with self.assertNumQueries(6):
+            dashboard = build_student_dashboard(self.student)
+        self.assertEqual(len(dashboard['schedule']), 3)
+        self.assertEqual(len(dashboard['exam_grades']), 3)
+        # 45 marks: the list keeps the latest, the summary counts them all
+        records = dashboard['attendance_records']
+        self.assertEqual(len(records), RECENT_ATTENDANCE)
+        self.assertEqual(records[0]['date'], datetime.date(2024, 9, 16))
+        self.assertEqual(sum(row['present'] for row in dashboard['attendance_summary']), 45)
+
+    def test_async_dashboard_matches_in_the_same_queries(self):
+        expected = build_student_dashboard(self.student)
+        with self.assertNumQueries(6):
+            self.assertEqual(async_to_sync(abuild_student_dashboard)(self.student), expected)
+
+    def test_summary_lists_the_inbox_the_page_shows(self):
+        user = self.student.user
+        deliver(user, 3)
+        payload = json.loads(async_to_sync(views.student_summary)(request_for(user)).content)
+        deliveries, cursor = rendered_inbox(user)
+        self.assertEqual([row['id'] for row in payload['notifications']], [delivery.id for delivery in deliveries])
+        self.assertEqual(payload['inbox_cursor'], cursor)
+        self.assertEqual(len(payload['notifications']), 3)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class FamilySummaryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        year = AcademicYear.objects.create(year='2024-2025', is_active=True)
+        grade = Grade.objects.create(name='Grade 1')
+        class_a = Class.objects.create(name='A', grade=grade, academic_year=year)
+        subject = make_subject('Maths', grade, year)
+        exam = Exam.objects.create(name='Mid-term', subject=subject, class_assigned=class_a, academic_year=year)
+        cls.children = [make_student(f'child{index}', class_a) for index in range(3)]
+        for child in cls.children:
+            ExamGrade.objects.create(student=child, exam=exam, subject=subject, grade=70, academic_year=year)
+            Attendance.objects.create(
+                student=child, subject=subject, date=datetime.date(2024, 9, 2), status='Present', academic_year=year
+            )
+        cls.parent = ParentProfile.objects.get(user=make_user('parent', 'parent'))
+        cls.parent.students.set(cls.children[:1])
+        cls.busy_parent = ParentProfile.objects.get(user=make_user('busy-parent', 'parent'))
+        cls.busy_parent.students.set(cls.children)
+
+    def setUp(self):
+        cache.clear()
+        get_active_academic_year()
+
+    def test_query_count_does_not_grow_with_children(self):
+        for parent in (self.parent, self.busy_parent):
+            with self.subTest(children=parent.students.count()), self.assertNumQueries(5):
+                summary = get_family_summary(parent)
+            self.assertEqual(summary['totals']['attendance_rate'], 100.0)
+        # Cached children cost nothing more to list
+        with self.assertNumQueries(1):
+            self.assertEqual(len(get_family_summary(self.busy_parent)['children']), 3)
+
+    def test_summary_lists_the_inbox_the_page_shows(self):
+        user = self.parent.user
+        deliver(user, 2)
+        payload = json.loads(views.family_summary(request_for(user)).content)
+        deliveries, cursor = rendered_inbox(user)
+        self.assertEqual([row['id'] for row in payload['notifications']], [delivery.id for delivery in deliveries])
+        self.assertEqual((len(deliveries), payload['inbox_cursor']), (2, cursor))
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class TeacherDashboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.year = AcademicYear.objects.create(year='2024-2025', is_active=True)
+        grade = Grade.objects.create(name='Grade 1')
+        cls.maths = make_subject('Maths', grade, cls.year)
+        art = make_subject('Art', grade, cls.year)
+        cls.teacher = TeacherProfile.objects.get(user=make_user('teacher', 'teacher'))
+        cls.busy_teacher = TeacherProfile.objects.get(user=make_user('busy-teacher', 'teacher'))
+        cls.classes = [Class.objects.create(name=name, grade=grade, academic_year=cls.year) for name in 'ABC']
+        for index, class_instance in enumerate(cls.classes):
+            for number in range(4):
+                make_student(f'{class_instance.name}-student{number}', class_instance)
+            for teacher in (cls.busy_teacher,) if index else (cls.teacher, cls.busy_teacher):
+                TeacherAssignment.objects.create(
+                    teacher=teacher, subject=cls.maths, class_assigned=class_instance, academic_year=cls.year
+                )
+            Schedule.objects.create(
+                class_instance=class_instance, day_of_week='Monday', section='1st Section', subject=cls.maths
+            )
+            # Taught by someone else: not on either dashboard
+            Schedule.objects.create(
+                class_instance=class_instance, day_of_week='Monday', section='2nd Section', subject=art
+            )
+        cls.monday = datetime.date(2024, 9, 2)
+
+    def setUp(self):
+        cache.clear()
+        get_active_academic_year()
+
+    def test_query_count_does_not_grow_with_classes(self):
+        for teacher, classes in ((self.teacher, 1), (self.busy_teacher, 3)):
+            with self.subTest(classes=classes), self.assertNumQueries(4):
+                dashboard = build_teacher_dashboard(teacher, self.monday)
+            self.assertEqual(len(dashboard['classes']), classes)
+            self.assertEqual(len(dashboard['today']), classes)
+            self.assertEqual({row['subject'] for row in dashboard['schedule']}, {'Maths'})
+            self.assertEqual([len(row['students']) for row in dashboard['classes']], [4] * classes)
+        with self.assertNumQueries(4):
+            self.assertEqual(async_to_sync(abuild_teacher_dashboard)(self.busy_teacher, self.monday), dashboard)
+
+    def test_todays_progress_is_current_under_the_cache(self):
+        get_teacher_dashboard(self.teacher, self.monday)
+        class_a = self.classes[0]
+        students = [enrollment.student_id for enrollment in class_a.studentenrollment_set.all()]
+        record_roll_call(class_a, self.maths, self.monday, {student_id: 'Present' for student_id in students[:3]})
+        # The payload comes from the cache; the progress is one query on top
+        with self.assertNumQueries(1):
+            (section,) = get_teacher_dashboard(self.teacher, self.monday)['today']
+        self.assertEqual((section['marked'], section['roster_size'], section['complete']), (3, 4, False))
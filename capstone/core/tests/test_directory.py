@@ -0,0 +1,78 @@
+import json
+
+from django.test import RequestFactory, TestCase, override_settings
+
+from core import views
+from core.directory import directory_page, directory_queryset
+from core.models import AcademicYear, Class, Grade
+from users.models import CustomUser
+
+from .utils import FAST_HASHER, make_student, make_user
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class DirectoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        year = AcademicYear.objects.create(year='2024-2025', is_active=True)
+        grade = Grade.objects.create(name='Grade 1')
+        cls.class_a = Class.objects.create(name='A', grade=grade, academic_year=year)
+        cls.enrolled = [make_student(f'student{index}', cls.class_a, 'Smith') for index in range(3)]
+        for index, last_name in enumerate(['Adams', 'Smith', 'Smith', 'Young', 'Brown']):
+            make_user(f'teacher{index}', 'teacher', last_name)
+        gone = make_user('gone', 'teacher', 'Adams')
+        gone.is_active = False
+        gone.save()
+
+    def walk(self, users, limit):
+        ids, after, pages = [], None, 0
+        while True:
+            rows, after = directory_page(users, after=after, limit=limit)
+            ids += [row.id for row in rows]
+            pages += 1
+            if after is None:
+                return ids, pages
+
+    def test_pages_cover_every_row_once_in_order(self):
+        users = directory_queryset()
+        expected = list(users.order_by('last_name', 'id').values_list('id', flat=True))
+        self.assertEqual(len(expected), 8)
+        for limit in (1, 2, 3, 8):
+            ids, pages = self.walk(users, limit)
+            self.assertEqual(ids, expected)
+            # The last full page already knows nothing follows it
+            self.assertEqual(pages, -(-len(expected) // limit))
+
+    def test_filters_combine_with_the_cursor(self):
+        teachers, _ = self.walk(directory_queryset(role='teacher'), 2)
+        self.assertEqual(
+            list(CustomUser.objects.filter(id__in=teachers).order_by('last_name', 'id').values_list('last_name', flat=True)),
+            ['Adams', 'Brown', 'Smith', 'Smith', 'Young'],
+        )
+        smiths, _ = self.walk(directory_queryset(search='smi'), 2)
+        self.assertEqual(len(smiths), 5)
+        enrolled, _ = self.walk(directory_queryset(class_id=self.class_a.id), 2)
+        self.assertEqual(enrolled, [student.user_id for student in self.enrolled])
+
+    def get(self, view, user, **params):
+        request = RequestFactory().get('/', params)
+        request.user = user
+        return view(request)
+
+    def test_views_are_staff_only_and_agree_on_bad_input(self):
+        office = make_user('office', 'admin', 'Office')
+        office.is_staff = True
+        office.save()
+        student = self.enrolled[0].user
+        for view in (views.student_list, views.directory_api):
+            with self.subTest(view=view.__name__):
+                self.assertEqual(self.get(view, student).status_code, 302)
+                self.assertEqual(self.get(view, office).status_code, 200)
+                for params in ({'after': 'Smith|x'}, {'class': 'a'}, {'limit': 'many'}):
+                    self.assertEqual(self.get(view, office, **params).status_code, 400)
+
+        payload = json.loads(self.get(views.directory_api, office, role='teacher', limit=2).content)
+        self.assertEqual([row['last_name'] for row in payload['results']], ['Adams', 'Brown'])
+        self.assertEqual(payload['next'], f"Brown|{payload['results'][1]['id']}")
+        html = self.get(views.student_list, office, q='smi').content.decode()
+        self.assertIn('About 5 people', html)
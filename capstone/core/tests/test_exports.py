@@ -0,0 +1,90 @@
+import csv
+import datetime
+import io
+import zipfile
+from decimal import Decimal
+
+from django.test import RequestFactory, TestCase, override_settings
+
+from core import views
+from core.exports import EXPORTS
+from core.models import AcademicYear, Attendance, Class, Fees, Grade
+
+from .utils import FAST_HASHER, make_student, make_subject, make_user
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.year = AcademicYear.objects.create(year='2024-2025', is_active=True)
+        grade = Grade.objects.create(name='Grade 1')
+        cls.class_a = Class.objects.create(name='A', grade=grade, academic_year=cls.year)
+        class_b = Class.objects.create(name='B', grade=grade, academic_year=cls.year)
+        subject = make_subject('Maths', grade, cls.year)
+        cls.student = make_student('ann', cls.class_a)
+        other = make_student('bob', class_b)
+        for student, status in ((cls.student, 'Present'), (other, 'Absent')):
+            Attendance.objects.create(
+                student=student, subject=subject, date=datetime.date(2024, 9, 2), status=status,
+                academic_year=cls.year,
+            )
+        cls.admin = make_user('office', 'admin')
+        cls.admin.is_staff = True
+        cls.admin.save()
+
+    def export(self, name, **params):
+        request = RequestFactory().get('/', params)
+        request.user = self.admin
+        return views.export_records(request, name)
+
+    def csv_rows(self, response):
+        return list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+    def test_csv_filters_by_class(self):
+        response = self.export('attendance', **{'class': self.class_a.id})
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="attendance.csv"')
+        self.assertEqual(self.csv_rows(response), [
+            ['Student', 'Subject', 'Date', 'Status', 'Academic Year'],
+            ['ann', 'Maths', '2024-09-02', 'Present', '2024-2025'],
+        ])
+
+    def test_fee_status_handles_missing_amounts(self):
+        due = datetime.date(2024, 9, 30)
+        for amount_due, amount_paid in [
+            (Decimal('100.00'), Decimal('100.00')), (Decimal('100.00'), Decimal('40.00')),
+            (Decimal('100.00'), None), (None, None),
+        ]:
+            Fees.objects.create(
+                student=self.student, amount_due=amount_due, amount_paid=amount_paid, due_date=due,
+                academic_year=self.year,
+            )
+        rows = self.csv_rows(self.export('fees'))
+        self.assertEqual(rows[0][-1], 'Status')
+        self.assertEqual(
+            [row[1:3] + row[-1:] for row in rows[1:]],
+            [
+                ['100.00', '100.00', 'Complete'], ['100.00', '40.00', 'Partially Paid'],
+                ['100.00', '', 'Not Paid'], ['', '', 'Not Paid'],
+            ],
+        )
+
+    def test_xlsx_is_a_workbook_of_every_row(self):
+        response = self.export('attendance', format='xlsx')
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(archive.testzip())
+        sheet = archive.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(sheet.count('<row>'), 1 + Attendance.objects.count())
+        self.assertIn('<t>bob</t>', sheet)
+
+    def test_streams_rows_in_chunks(self):
+        export = EXPORTS['attendance']
+        with self.assertNumQueries(1):
+            rows = list(export.rows(export.queryset()))
+        self.assertEqual(len(rows), 2)
+
+    def test_bad_requests(self):
+        self.assertEqual(self.export('attendance', grade='x').status_code, 400)
+        for name, params in (('salaries', {}), ('attendance', {'format': 'pdf'})):
+            with self.subTest(name=name, params=params), self.assertRaises(views.Http404):
+                self.export(name, **params)
@@ -0,0 +1,89 @@
+import datetime
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core.jobs import RETRY_BASE_SECONDS, enqueue, requeue_stale, run_job, task, work
+from core.models import Job
+
+calls = []
+
+
+@task('tests.record')
+def record(value):
+    calls.append(value)
+    return {'value': value}
+
+
+@task('tests.fail')
+def fail():
+    raise RuntimeError('boom')
+
+
+@task('tests.unserializable')
+def unserializable():
+    return object()
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_burst_runs_due_jobs_in_order(self):
+        enqueue('tests.record', 1)
+        later = enqueue(record, 3, delay=60)
+        enqueue('tests.record', 2)
+        self.assertEqual(work(burst=True), 2)
+        self.assertEqual(calls, [1, 2])
+        self.assertEqual(Job.objects.get(task='tests.record', args=[1]).result, {'value': 1})
+        later.refresh_from_db()
+        self.assertEqual((later.status, later.attempts), ('queued', 0))
+
+    def test_failures_back_off_then_fail(self):
+        job = enqueue('tests.fail', max_attempts=2)
+        self.assertEqual(work(burst=True), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertIn('RuntimeError: boom', job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + datetime.timedelta(seconds=RETRY_BASE_SECONDS - 1))
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        work(burst=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_unknown_task_and_unserializable_result(self):
+        unknown = enqueue('tests.missing', max_attempts=1)
+        dropped = enqueue('tests.unserializable')
+        work(burst=True)
+        unknown.refresh_from_db()
+        dropped.refresh_from_db()
+        self.assertEqual(unknown.status, 'failed')
+        self.assertIn('LookupError', unknown.last_error)
+        self.assertEqual((dropped.status, dropped.result), ('done', None))
+
+    def test_stale_jobs_are_requeued_until_out_of_attempts(self):
+        started = timezone.now() - datetime.timedelta(hours=2)
+        retried = enqueue('tests.record', 1, max_attempts=3)
+        exhausted = enqueue('tests.record', 2, max_attempts=3)
+        recent = enqueue('tests.record', 3)
+        Job.objects.filter(pk=retried.pk).update(status='running', attempts=1, started_at=started)
+        Job.objects.filter(pk=exhausted.pk).update(status='running', attempts=3, started_at=started)
+        Job.objects.filter(pk=recent.pk).update(status='running', attempts=1, started_at=timezone.now())
+
+        self.assertEqual(requeue_stale(3600), (1, 1))
+        statuses = dict(Job.objects.values_list('pk', 'status'))
+        self.assertEqual(
+            [statuses[job.pk] for job in (retried, exhausted, recent)], ['queued', 'failed', 'running']
+        )
+        # The requeued job gets its last attempt, and a crash then fails it for good
+        job = Job.objects.get(pk=retried.pk)
+        Job.objects.filter(pk=job.pk).update(status='running', attempts=3, started_at=started)
+        self.assertEqual(requeue_stale(3600), (0, 1))
+
+    def test_run_job_reports_success(self):
+        job = enqueue('tests.record', 5)
+        job.attempts = 1
+        self.assertTrue(run_job(job))
+        self.assertEqual(calls, [5])
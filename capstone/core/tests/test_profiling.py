@@ -0,0 +1,65 @@
+import json
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.models import Grade
+from core.profiling import QueryProfilingMiddleware, RequestProfile, SlowestRequests, slowest_requests
+
+
+def grades_view(request):
+    # The same query three times over: a duplicate
+    for _ in range(3):
+        list(Grade.objects.all())
+    Grade.objects.count()
+    return HttpResponse('ok')
+
+
+async def async_grades_view(request):
+    await sync_to_async(grades_view)(request)
+    return HttpResponse('ok')
+
+
+@override_settings(PROFILING_SAMPLE_RATE=1.0, PROFILING_SERVER_TIMING=True, PROFILING_SLOW_REQUEST_MS=60000)
+class QueryProfilingTests(TestCase):
+    def setUp(self):
+        slowest_requests.clear()
+        self.addCleanup(slowest_requests.clear)
+
+    def profile(self, middleware, request):
+        middleware.process_view(request, None, (), {})
+        with self.assertLogs('capstone.profiling') as logs:
+            response = async_to_sync(middleware)(request) if middleware.is_async else middleware(request)
+        (record,) = logs.records
+        return response, record, json.loads(record.getMessage())
+
+    def test_sampled_request_reports_its_queries(self):
+        request = RequestFactory().get('/grades/')
+        response, record, data = self.profile(QueryProfilingMiddleware(grades_view), request)
+        self.assertEqual(data['queries'], 4)
+        self.assertEqual([row['count'] for row in data['duplicate_queries']], [3])
+        self.assertEqual(record.levelname, 'WARNING')  # Because of the duplicate
+        self.assertIn('desc="4 queries"', response['Server-Timing'])
+        self.assertEqual([entry['path'] for entry in slowest_requests.items()], ['/grades/'])
+
+    def test_queries_on_async_threads_are_counted(self):
+        request = RequestFactory().get('/grades/')
+        _, _, data = self.profile(QueryProfilingMiddleware(async_grades_view), request)
+        self.assertEqual(data['queries'], 4)
+
+    @override_settings(PROFILING_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_are_left_alone(self):
+        response = QueryProfilingMiddleware(grades_view)(RequestFactory().get('/'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(slowest_requests.items(), [])
+
+
+class SlowestRequestsTests(TestCase):
+    def test_keeps_the_slowest(self):
+        slowest = SlowestRequests(2)
+        for seconds in (0.3, 0.1, 0.5, 0.2):
+            profile = RequestProfile(RequestFactory().get(f'/{seconds}/'))
+            profile.total_seconds = seconds
+            slowest.add(profile)
+        self.assertEqual([entry['path'] for entry in slowest.items()], ['/0.5/', '/0.3/'])
@@ -0,0 +1,87 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+
+from core import views
+from core.context_processors import reference_data
+from core.dashboard import student_dashboard_cache_key, teacher_dashboard_cache_key
+from core.family import _child_cache_keys
+from core.models import AcademicYear, Class, Grade, Schedule
+from core.reference import get_active_academic_year, get_classes, get_grades, invalidate_reference_data
+from users.models import CustomUser
+
+from .utils import FAST_HASHER, make_student, make_subject
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class ReferenceDataTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.year = AcademicYear.objects.create(year='2024-2025', is_active=True)
+        cls.grade_1 = Grade.objects.create(name='Grade 1')
+        cls.grade_2 = Grade.objects.create(name='Grade 2')
+        cls.class_a = Class.objects.create(name='A', grade=cls.grade_1, academic_year=cls.year)
+        cls.class_b = Class.objects.create(name='B', grade=cls.grade_2, academic_year=cls.year)
+        cls.maths = make_subject('Maths', cls.grade_1, cls.year)
+        Schedule.objects.create(class_instance=cls.class_a, day_of_week='Monday', section='1st Section', subject=cls.maths)
+        cls.student = make_student('student', cls.class_a)
+
+    def setUp(self):
+        cache.clear()
+        invalidate_reference_data()
+
+    def test_reference_data_is_cached_per_process(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(get_active_academic_year(), self.year)
+            self.assertEqual([grade.name for grade in get_grades()], ['Grade 1', 'Grade 2'])
+        with self.assertNumQueries(0):
+            get_active_academic_year()
+            get_grades()
+        # A change reloads it, once
+        self.class_b.name = 'B2'
+        self.class_b.save()
+        with self.assertNumQueries(1):
+            self.assertIn('B2', [class_instance.name for class_instance in get_classes()])
+        with self.assertNumQueries(0):
+            get_classes()
+
+    def test_templates_see_reference_data_under_one_name(self):
+        request = RequestFactory().get('/')
+        self.assertEqual(set(reference_data(request)), {'reference'})
+
+        request.user = CustomUser.objects.create(username='office', password='x', role='staff', is_staff=True)
+        response = views.student_list(request)
+        self.assertContains(response, f'<option value="{self.grade_2.id}">Grade 2</option>', html=True)
+
+    def keys(self):
+        # The teacher teaches none of these classes
+        return (
+            student_dashboard_cache_key(self.student.id),
+            _child_cache_keys([self.student.id])[self.student.id],
+            teacher_dashboard_cache_key(0, datetime.date(2024, 9, 2)),
+        )
+
+    def test_changes_only_invalidate_the_dashboards_that_show_them(self):
+        before = self.keys()
+        for instance in (self.class_b, self.grade_2):
+            instance.name += ' (renamed)'
+            instance.save()
+        self.assertEqual(self.keys(), before)
+
+        for change in (
+            lambda: Class.objects.get(pk=self.class_a.pk).save(),
+            lambda: Grade.objects.get(pk=self.grade_1.pk).save(),
+            lambda: self.maths.save(),
+        ):
+            student_key, child_key, teacher_key = self.keys()
+            change()
+            after = self.keys()
+            self.assertNotEqual(after[0], student_key)
+            self.assertNotEqual(after[1], child_key)
+            self.assertEqual(after[2], teacher_key)
+
+        # Which year is active shows everywhere
+        before = self.keys()
+        self.year.save()
+        self.assertTrue(all(old != new for old, new in zip(before, self.keys())))
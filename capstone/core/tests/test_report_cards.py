@@ -0,0 +1,88 @@
+import datetime
+import os
+import tempfile
+import unittest
+import zipfile
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+
+from core.analytics import year_statistics
+from core.models import AcademicYear, Attendance, Class, Exam, ExamGrade, Fees, Grade
+from core import report_cards
+from core.report_cards import generate_report_cards, load_cards
+
+from .utils import FAST_HASHER, make_student, make_subject
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class ReportCardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.year = AcademicYear.objects.create(year='2024-2025', is_active=True)
+        grade = Grade.objects.create(name='Grade 1')
+        cls.class_a = Class.objects.create(name='A', grade=grade, academic_year=cls.year)
+        cls.class_b = Class.objects.create(name='B', grade=grade, academic_year=cls.year)
+        subjects = [make_subject(name, grade, cls.year) for name in ('Maths', 'Art')]
+        cls.students = [make_student(f'student{index}', cls.class_a, 'Smith') for index in range(4)]
+        cls.students.append(make_student('other', cls.class_b, 'Jones'))
+        for subject in subjects:
+            exam = Exam.objects.create(
+                name='Final', subject=subject, class_assigned=cls.class_a, exam_date=datetime.date(2024, 12, 1),
+                academic_year=cls.year,
+            )
+            for index, student in enumerate(cls.students):
+                ExamGrade.objects.create(
+                    student=student, exam=exam, subject=subject, grade=60 + 10 * index, academic_year=cls.year
+                )
+                Attendance.objects.create(
+                    student=student, subject=subject, date=datetime.date(2024, 9, 2),
+                    status='Present' if index else 'Absent', academic_year=cls.year,
+                )
+        Fees.objects.create(
+            student=cls.students[0], amount_due=Decimal('100.00'), due_date=datetime.date(2024, 9, 30),
+            academic_year=cls.year,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cards_load_in_a_fixed_number_of_queries(self):
+        year_statistics(self.year)  # The ranks come from the cached analytics
+        with self.assertNumQueries(4):
+            one_class = load_cards(self.year, class_instance=self.class_b)
+        with self.assertNumQueries(4):
+            cards = load_cards(self.year, grade=self.class_a.grade)
+        self.assertEqual([card['student']['username'] for card in one_class], ['other'])
+        self.assertEqual(len(cards), 5)
+
+        card = next(card for card in cards if card['student']['id'] == self.students[0].id)
+        self.assertEqual(card['entry'], 'grade-1-a/student0')
+        self.assertEqual([(row['name'], row['average']) for row in card['subjects']], [('Art', 60), ('Maths', 60)])
+        self.assertEqual(card['attendance'], {'present': 0, 'absent': 2, 'percent': 0.0})
+        self.assertEqual((card['fees']['outstanding'], card['fees']['status']), (Decimal('100.00'), 'Not Paid'))
+
+    def test_archive_holds_every_card_and_a_rerun_resumes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cards.zip')
+            # A card left behind by an interrupted run
+            os.makedirs(os.path.join(f'{path}.parts', 'grade-1-b'))
+            with open(os.path.join(f'{path}.parts', 'grade-1-b', 'other.html'), 'w') as part:
+                part.write('resumed')
+
+            run = generate_report_cards(path, self.year, grade=self.class_a.grade, workers=1)
+            self.assertEqual((run.total, run.rendered, run.resumed), (5, 4, 1))
+            with zipfile.ZipFile(path) as archive:
+                names = sorted(archive.namelist())
+                self.assertEqual(names[-1], 'grade-1-b/other.html')
+                self.assertEqual(archive.read('grade-1-b/other.html'), b'resumed')
+                self.assertIn(b'student2', archive.read('grade-1-a/student2.html'))
+            self.assertEqual(len(names), 5)
+            self.assertFalse(os.path.exists(f'{path}.parts'))
+
+    @unittest.skipIf(report_cards.HTML is not None, 'WeasyPrint is installed')
+    def test_pdf_needs_weasyprint(self):
+        with self.assertRaises(ImproperlyConfigured):
+            generate_report_cards('unused.zip', self.year, file_format='pdf')
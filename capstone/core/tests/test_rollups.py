@@ -0,0 +1,93 @@
+import datetime
+from io import StringIO
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.attendance import record_roll_call
+from core.models import AcademicYear, Attendance, Class, ClassAttendanceDaily, Grade, StudentAttendanceMonthly
+from core.rollups import class_attendance_by_month, student_attendance_summary
+
+from .utils import FAST_HASHER, make_student, make_subject
+
+
+def rollup_rows():
+    return (
+        sorted(StudentAttendanceMonthly.objects.values_list(
+            'student_id', 'subject_id', 'academic_year_id', 'month', 'present', 'absent'
+        )),
+        sorted(ClassAttendanceDaily.objects.values_list(
+            'class_instance_id', 'subject_id', 'academic_year_id', 'date', 'present', 'absent'
+        )),
+    )
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class AttendanceRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.year = AcademicYear.objects.create(year='2024-2025', is_active=True)
+        grade = Grade.objects.create(name='Grade 1')
+        cls.class_a = Class.objects.create(name='A', grade=grade, academic_year=cls.year)
+        cls.class_b = Class.objects.create(name='B', grade=grade, academic_year=cls.year)
+        cls.subject = make_subject('Maths', grade, cls.year)
+        cls.students = [make_student(f'a{index}', cls.class_a) for index in range(3)]
+        cls.other = make_student('b0', cls.class_b)
+
+    def mark(self, student, date, status):
+        return Attendance.objects.create(
+            student=student, subject=self.subject, date=date, status=status, academic_year=self.year
+        )
+
+    def test_saved_rows_update_their_cells(self):
+        monday, tuesday = datetime.date(2024, 9, 2), datetime.date(2024, 9, 3)
+        first = self.mark(self.students[0], monday, 'Present')
+        self.mark(self.students[0], tuesday, 'Absent')
+        self.mark(self.students[1], monday, 'Absent')
+        self.mark(self.other, monday, 'Present')
+        monthly, daily = rollup_rows()
+        september = datetime.date(2024, 9, 1)
+        self.assertIn((self.students[0].id, self.subject.id, self.year.id, september, 1, 1), monthly)
+        self.assertIn((self.class_a.id, self.subject.id, self.year.id, monday, 1, 1), daily)
+        self.assertIn((self.class_b.id, self.subject.id, self.year.id, monday, 1, 0), daily)
+
+        # Moving a row to another month refreshes the cell it left as well
+        first.date = datetime.date(2024, 10, 1)
+        first.status = 'Absent'
+        first.save()
+        monthly, daily = rollup_rows()
+        self.assertIn((self.students[0].id, self.subject.id, self.year.id, september, 0, 1), monthly)
+        self.assertIn((self.students[0].id, self.subject.id, self.year.id, datetime.date(2024, 10, 1), 0, 1), monthly)
+        self.assertIn((self.class_a.id, self.subject.id, self.year.id, monday, 0, 1), daily)
+
+        first.delete()
+        monthly, _ = rollup_rows()
+        self.assertEqual([row for row in monthly if row[3].month == 10], [])
+
+    def test_roll_calls_match_a_rebuild(self):
+        for day in range(2, 7):
+            date = datetime.date(2024, 9, day)
+            absent = self.students[day % 3].id
+            record_roll_call(self.class_a, self.subject, date, {absent: 'Absent'}, default_status='Present')
+        # Re-marking a day replaces its counts instead of adding to them
+        record_roll_call(self.class_a, self.subject, datetime.date(2024, 9, 2), {}, default_status='Absent')
+        record_roll_call(self.class_b, self.subject, datetime.date(2024, 9, 2), {}, default_status='Present')
+        incremental = rollup_rows()
+
+        StudentAttendanceMonthly.objects.all().delete()
+        ClassAttendanceDaily.objects.all().delete()
+        call_command('rebuild_attendance_rollups', stdout=StringIO())
+        self.assertEqual(rollup_rows(), incremental)
+
+        self.assertEqual(
+            class_attendance_by_month(self.class_a, self.year),
+            [{'month': datetime.date(2024, 9, 1), 'present': 8, 'absent': 7, 'rate': 53.3}],
+        )
+        summary = student_attendance_summary(self.students[0], self.year)
+        self.assertEqual(summary, [{'subject': 'Maths', 'present': 2, 'absent': 3, 'rate': 40.0}])
+
+    def test_roll_call_rejects_students_of_other_classes(self):
+        with self.assertRaises(ValidationError):
+            record_roll_call(self.class_a, self.subject, datetime.date(2024, 9, 2), {self.other.id: 'Present'})
+        self.assertFalse(Attendance.objects.exists())
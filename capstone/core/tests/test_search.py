@@ -0,0 +1,78 @@
+import importlib
+from io import StringIO
+
+from django.apps import apps
+from django.contrib import admin
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.models import AcademicYear, Class, Grade, Notification, SearchDocument
+from core.search import backend, search
+from users.models import CustomUser, StaffProfile
+
+from .utils import FAST_HASHER, make_subject
+
+backfill = importlib.import_module('core.migrations.0011_backfill_search_index').backfill
+
+
+def documents():
+    return sorted(SearchDocument.objects.values_list('kind', 'object_id', 'title', 'body'))
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class SearchIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        year = AcademicYear.objects.create(year='2024-2025', is_active=True)
+        grade = Grade.objects.create(name='Grade 7')
+        cls.class_a = Class.objects.create(name='Rosewood', grade=grade, academic_year=year)
+        cls.subject = make_subject('Chemistry', grade, year)
+        cls.ann = CustomUser.objects.create(
+            username='ann', password='x', role='student', first_name='Ann', last_name='Rosenberg',
+            email='ann@school.test',
+        )
+        cls.bob = CustomUser.objects.create(username='bob', password='x', role='teacher', last_name='Chemist')
+        sender = StaffProfile.objects.get(
+            user=CustomUser.objects.create(username='office', password='x', role='staff')
+        )
+        cls.notice = Notification.objects.create(
+            title='Chemistry fair', message='Bring goggles', scope='School', sender=sender
+        )
+
+    def test_saves_keep_the_index_current(self):
+        self.assertEqual(backend(), 'fts5')
+        hits = search('ros')
+        self.assertEqual({(hit['kind'], hit['object_id']) for hit in hits}, {
+            ('user', self.ann.id), ('class', self.class_a.id),
+        })
+        self.assertEqual([hit['object_id'] for hit in search('ann school', kinds=['user'])], [self.ann.id])
+        # Every term must match, and punctuation never reaches the MATCH syntax
+        self.assertEqual(search('chem goggles'), [search('goggles')[0]])
+        self.assertEqual(search('"*) OR ('), [])
+
+        self.ann.last_name = 'Hart'
+        self.ann.save()
+        self.assertEqual([hit['kind'] for hit in search('ros')], ['class'])
+        self.notice.delete()
+        self.assertEqual(search('goggles'), [])
+
+    def test_migration_backfills_what_a_rebuild_indexes(self):
+        indexed = documents()
+        self.assertEqual(len(indexed), 6)
+        SearchDocument.objects.all().delete()
+        self.assertEqual(search('chemistry'), [])
+
+        backfill(apps, None)
+        self.assertEqual(documents(), indexed)
+        self.assertEqual(len(search('chemistry')), 2)
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(documents(), indexed)
+
+    def test_admin_changelists_search_through_the_index(self):
+        request = RequestFactory().get('/')
+        user_admin = admin.site._registry[CustomUser]
+        results, distinct = user_admin.get_search_results(request, CustomUser.objects.all(), 'chem')
+        self.assertEqual((list(results), distinct), ([self.bob], False))
+        subject_admin = admin.site._registry[type(self.subject)]
+        results, _ = subject_admin.get_search_results(request, type(self.subject).objects.all(), 'chemis')
+        self.assertEqual(list(results), [self.subject])
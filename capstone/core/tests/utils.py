@@ -0,0 +1,23 @@
+from core.models import StudentEnrollment, Subject
+from users.models import CustomUser, StudentProfile
+
+FAST_HASHER = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+def make_subject(name, grade, year):
+    # Subject.save saves twice, which Subject.objects.create (a forced insert) can't do
+    subject = Subject(name=name, grade=grade, academic_year=year)
+    subject.save()
+    return subject
+
+
+def make_user(username, role, last_name=''):
+    return CustomUser.objects.create(username=username, password='x', role=role, last_name=last_name)
+
+
+def make_student(username, class_instance, last_name=''):
+    student = StudentProfile.objects.get(user=make_user(username, 'student', last_name))
+    StudentEnrollment.objects.create(
+        student=student, class_assigned=class_instance, academic_year=class_instance.academic_year
+    )
+    return student
@@ -5,11 +5,28 @@ urlpatterns = [
     path('sign-in/', views.sign_in_view, name='sign-in'),
     path('sign-out/', views.sign_out_view, name='sign-out'),
     path('list/', views.student_list, name='list'),
+    path('directory/', views.directory_api, name='directory-api'),
+    path('search/', views.search, name='search'),
     
     # Role-based dashboards
     path('admin-dashboard/', views.admin_dashboard, name='admin-dashboard'),
     path('staff-dashboard/', views.staff_dashboard, name='staff-dashboard'),
     path('teacher-dashboard/', views.teacher_dashboard, name='teacher-dashboard'),
+    path('teacher-dashboard/summary/', views.teacher_summary, name='teacher-summary'),
     path('student-dashboard/', views.student_dashboard, name='student-dashboard'),
+    path('student-dashboard/summary/', views.student_summary, name='student-summary'),
     path('parent-dashboard/', views.parent_dashboard, name='parent-dashboard'),
+    path('parent-dashboard/summary/', views.family_summary, name='family-summary'),
+
+    # Attendance
+    path('attendance/roll-call/', views.attendance_roll_call, name='attendance-roll-call'),
+    path('attendance/check-in/', views.daily_check_in, name='daily-check-in'),
+    path('attendance/daily/', views.daily_attendance_summary, name='daily-attendance-summary'),
+    path('attendance/daily/absent/', views.daily_absences, name='daily-absences'),
+
+    # Reports
+    path('exports/<str:name>/', views.export_records, name='export-records'),
+    path('slow-requests/', views.slow_requests, name='slow-requests'),
+    path('analytics/exams/<int:exam_id>/', views.exam_analytics, name='exam-analytics'),
+    path('analytics/years/<int:year_id>/', views.year_analytics, name='year-analytics'),
 ]
@@ -1,13 +1,36 @@
 # core/views.py
-from django.shortcuts import render, get_object_or_404
+from django.shortcuts import render, get_object_or_404, aget_object_or_404
 from users.models import StudentProfile, CustomUser
 from core.models import ExamGrade, Fees
 from django.contrib.auth import authenticate, login, logout, get_user_model
 from django.shortcuts import render, redirect
-from django.http import HttpResponse
+import datetime
+import json
+from django.core.exceptions import ValidationError
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse
+from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.hashers import check_password
 from django.views.decorators.csrf import csrf_exempt
+from core.analytics import exam_statistics, year_statistics
+from core.async_dashboard import aget_student_dashboard, aget_teacher_dashboard
+from core.attendance import record_roll_call
+from core.daily_attendance import absent_on, presence_by_month, presence_summary, record_check_in
+from core.dashboard import get_student_dashboard, get_teacher_dashboard
+from core.family import get_family_summary
+from core.directory import MAX_PAGE_SIZE, PAGE_SIZE, approximate_total, directory_page, directory_queryset
+from core.exports import EXPORTS, FORMATS, export_response
+from core.profiling import slowest_requests
+from core.search import SOURCES, search as search_documents
+from capstone.routers import replica_alias, replica_reads
+from asgiref.sync import sync_to_async
+from communication.inbox import rendered_inbox, rendered_inbox_payload
+from django.conf import settings
+import logging
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404
+from django.core.paginator import Paginator
+from finance.models import SalaryTotal
 # Import models from core
 from core.models import (
     AcademicYear, Grade, Class, Subject, Schedule, TeacherAssignment,
@@ -23,10 +46,75 @@ from users.models import (
 
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
+
+def _directory_cursor(cursor):
+    return f'{cursor[0]}|{cursor[1]}' if cursor else None
+
+def _directory_query(request):
+    # ?role=student&grade=3&class=12&q=smi&after=<cursor>&limit=50
+    filters = {
+        'role': request.GET.get('role') or None,
+        'grade': request.GET.get('grade') or None,
+        'class_id': request.GET.get('class') or None,
+        'search': request.GET.get('q') or None,
+    }
+    after = None
+    if request.GET.get('after'):
+        last_name, _, user_id = request.GET['after'].rpartition('|')
+        after = (last_name, int(user_id))
+    limit = min(max(int(request.GET.get('limit', PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    if filters['grade']:
+        filters['grade'] = int(filters['grade'])
+    if filters['class_id']:
+        filters['class_id'] = int(filters['class_id'])
+    return filters, after, limit
+
+# The directory lists every account's name, email and role: staff only
+@staff_member_required
 def student_list(request):
-    students = CustomUser.objects.all()
-    print("Number of students:", students.count())  # Add this line
-    return render(request, 'core/student_list.html', {'students': students})
+    try:
+        filters, after, limit = _directory_query(request)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid filter or cursor.")
+
+    users = directory_queryset(**filters)
+    rows, next_cursor = directory_page(users, after=after, limit=limit)
+    query = request.GET.copy()
+    query.pop('after', None)
+    return render(request, 'core/student_list.html', {
+        'students': rows,
+        'total': approximate_total(users, filters),
+        'filters': filters,
+        'next_cursor': _directory_cursor(next_cursor),
+        'query': query.urlencode(),
+        'roles': CustomUser.ROLE_CHOICES,
+    })
+
+@staff_member_required
+def directory_api(request):
+    try:
+        filters, after, limit = _directory_query(request)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid filter or cursor.'}, status=400)
+
+    users = directory_queryset(**filters)
+    rows, next_cursor = directory_page(users, after=after, limit=limit)
+    return JsonResponse({
+        'total': approximate_total(users, filters),
+        'results': [
+            {
+                'id': user.id,
+                'username': user.username,
+                'first_name': user.first_name,
+                'last_name': user.last_name,
+                'email': user.email,
+                'role': user.role,
+            }
+            for user in rows
+        ],
+        'next': _directory_cursor(next_cursor),
+    })
 
 from django.contrib.auth.hashers import check_password
 from django.shortcuts import redirect, render
@@ -41,9 +129,8 @@ def sign_in_view(request):
         # Authenticate the user
         user = authenticate(request, username=username, password=password)
         if user is not None:
-            print("User authenticated successfully:", user)
             login(request, user)  # Log the user in
-            print("Is authenticated after login:", request.user.is_authenticated)  # Debugging statement
+            logger.info("User %s signed in", user)
             
             # Redirect based on user role
             role = user.role
@@ -58,7 +145,7 @@ def sign_in_view(request):
             elif role == 'parent':
                 return redirect('parent-dashboard')
         else:
-            print("Invalid login credentials.")
+            logger.info("Failed sign-in for %s", username)
             return render(request, 'core/sign_in.html', {'error': 'Invalid username or password.'})
 
     return render(request, 'core/sign_in.html')
@@ -67,6 +154,7 @@ def sign_out_view(request):
     logout(request)
     return redirect('sign-in')  # Redirect to sign-in page after logging out
 
+@replica_reads()
 def admin_dashboard(request):
     academic_years = AcademicYear.objects.all()
     staff_profiles = StaffProfile.objects.all()
@@ -82,88 +170,219 @@ def admin_dashboard(request):
         'exams': exams,
     })
 
+SALARY_PAGE_SIZE = 24
+
+@login_required(login_url='/core/sign-in/')
+@replica_reads()
 def staff_dashboard(request):
+    # Teachers and staff alike: salary is on whichever profile the user has
     user = request.user
-    staff_profile = StaffProfile.objects.get(user=user)
-    salary_payments = SalaryPayment.objects.filter(profile=user)
+    profile = (
+        StaffProfile.objects.filter(user=user).first()
+        or get_object_or_404(TeacherProfile, user=user)
+    )
+    # Newest first along the (profile, payment_date) index
+    payments = Paginator(
+        SalaryPayment.objects.filter(profile=user).order_by('-payment_date', '-id'), SALARY_PAGE_SIZE
+    ).get_page(request.GET.get('page'))
 
-    return render(request, 'staff_dashboard.html', {
-        'staff_profile': staff_profile,
-        'salary_payments': salary_payments,
+    return render(request, 'core/staff_dashboard.html', {
+        'profile': profile,
+        'salary_payments': payments,
+        'salary_totals': SalaryTotal.objects.filter(profile=user).order_by('-year'),
     })
 
+@login_required(login_url='/core/sign-in/')
+@replica_reads()
 def teacher_dashboard(request):
-    user = request.user
-    teacher_profile = TeacherProfile.objects.get(user=user)
-    assigned_classes = TeacherAssignment.objects.filter(teacher=teacher_profile)
-    schedules = Schedule.objects.filter(class_instance__in=[a.class_assigned for a in assigned_classes])
+    teacher_profile = get_object_or_404(TeacherProfile.objects.select_related('user'), user=request.user)
+    dashboard = get_teacher_dashboard(teacher_profile)
 
-    return render(request, 'teacher_dashboard.html', {
+    return render(request, 'core/teacher_dashboard.html', {
         'teacher_profile': teacher_profile,
-        'assigned_classes': assigned_classes,
-        'schedules': schedules,
+        **dashboard,
     })
 
-@login_required
+@login_required(login_url='/core/sign-in/')
+@replica_reads()
 def student_dashboard(request):
-    user = request.user
-    print(user)
-    return  render(request, 'core/student_dashboard.html')
-
-# @login_required(login_url='/core/sign-in/')
-# def student_dashboard(request):
-#     user = request.user
-#     student_profile = StudentProfile.objects.get(user=user)
-    
-#     # Get active academic year
-#     active_academic_year = AcademicYear.objects.filter(is_active=True).first()
-    
-#     # Enrollments for the active academic year
-#     enrollments = StudentEnrollment.objects.filter(student=student_profile, academic_year=active_academic_year)
-    
-#     # Attendance records for the active academic year
-#     attendance_records = Attendance.objects.filter(student=student_profile, academic_year=active_academic_year)
-    
-#     # Exams and exam grades for the active academic year
-#     exam_grades = ExamGrade.objects.filter(student=student_profile, academic_year=active_academic_year)
-    
-#     # Class details for the active academic year
-#     class_instance = enrollments.first().class_assigned if enrollments.exists() else None
-    
-#     # Schedule for the student's class in the active academic year
-#     schedule = Schedule.objects.filter(class_instance=class_instance)
-    
-#     # Notifications targeting the student’s class or grade in the active academic year
-#     notifications = Notification.objects.filter(
-#         is_active=True,
-#         scope__in=['Class', 'Grade', 'School']
-#     ).filter(
-#         class_target=class_instance  # For class-specific notifications
-#     ) | Notification.objects.filter(
-#         grade_target=class_instance.grade  # For grade-specific notifications
-#     ) | Notification.objects.filter(
-#         scope='School'  # For school-wide notifications
-#     ).distinct()
-
-#     return render(request, 'student_dashboard.html', {
-#         'student_profile': student_profile,
-#         'enrollments': enrollments,
-#         'attendance_records': attendance_records,
-#         'exam_grades': exam_grades,
-#         'class_instance': class_instance,
-#         'schedule': schedule,
-#         'notifications': notifications,
-#     })
+    student_profile = get_object_or_404(StudentProfile.objects.select_related('user'), user=request.user)
+    dashboard = get_student_dashboard(student_profile)
+    # The notifications come from the inbox the live channels resume from
+    inbox, inbox_cursor = rendered_inbox(request.user)
+
+    return render(request, 'core/student_dashboard.html', {
+        'student_profile': student_profile,
+        **dashboard,
+        'inbox': inbox,
+        'inbox_cursor': inbox_cursor,
+    })
 
+@login_required(login_url='/core/sign-in/')
+@replica_reads()
 def parent_dashboard(request):
-    user = request.user
-    parent_profile = ParentProfile.objects.get(user=user)
-    children = parent_profile.students.all()
+    parent_profile = get_object_or_404(ParentProfile.objects.select_related('user'), user=request.user)
+    summary = get_family_summary(parent_profile)
+    inbox, inbox_cursor = rendered_inbox(request.user)
 
-    return render(request, 'parent_dashboard.html', {
+    return render(request, 'core/parent_dashboard.html', {
         'parent_profile': parent_profile,
-        'children': children,
+        **summary,
+        'inbox': inbox,
+        'inbox_cursor': inbox_cursor,
+    })
+
+@login_required(login_url='/core/sign-in/')
+@replica_reads()
+def family_summary(request):
+    parent_profile = get_object_or_404(ParentProfile, user=request.user)
+    # The same inbox the HTML dashboard lists
+    return JsonResponse({**get_family_summary(parent_profile), **rendered_inbox_payload(request.user)})
+
+# Async JSON dashboards for ASGI deployments (see capstone.asgi_server). replica_reads()
+# is entered inside the coroutine; as a decorator it would exit before the view ran.
+@login_required(login_url='/core/sign-in/')
+async def student_summary(request):
+    user = await request.auser()
+    with replica_reads():
+        student_profile = await aget_object_or_404(StudentProfile.objects.select_related('user'), user=user)
+        dashboard = await aget_student_dashboard(student_profile)
+        # The same inbox the HTML dashboard lists
+        inbox = await sync_to_async(rendered_inbox_payload)(user)
+    return JsonResponse({**dashboard, **inbox})
+
+@login_required(login_url='/core/sign-in/')
+async def teacher_summary(request):
+    user = await request.auser()
+    with replica_reads():
+        teacher_profile = await aget_object_or_404(TeacherProfile.objects.select_related('user'), user=user)
+        dashboard = await aget_teacher_dashboard(teacher_profile)
+    return JsonResponse(dashboard)
+
+@login_required(login_url='/core/sign-in/')
+@require_POST
+def attendance_roll_call(request):
+    # Body: {"class": id, "subject": id, "date": "YYYY-MM-DD", "statuses": {"<student id>": "Present"}, "default_status": "Present"}
+    try:
+        payload = json.loads(request.body)
+        class_instance = get_object_or_404(Class.objects.select_related('academic_year'), pk=payload['class'])
+        subject = get_object_or_404(Subject, pk=payload['subject'])
+        date = datetime.date.fromisoformat(payload['date'])
+        statuses = {int(student_id): status for student_id, status in payload.get('statuses', {}).items()}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return JsonResponse({'error': 'Expected class, subject, date and statuses.'}, status=400)
+
+    is_assigned = TeacherAssignment.objects.filter(
+        teacher__user=request.user, class_assigned=class_instance, subject=subject
+    ).exists()
+    if not (request.user.is_staff or is_assigned):
+        return JsonResponse({'error': 'You are not assigned to this class and subject.'}, status=403)
+
+    try:
+        marked = record_roll_call(class_instance, subject, date, statuses, payload.get('default_status'))
+    except ValidationError as e:
+        return JsonResponse({'error': e.messages}, status=400)
+
+    return JsonResponse({'marked': len(marked)})
+
+@staff_member_required
+@require_POST
+def daily_check_in(request):
+    # Body: {"role": "staff", "date": "YYYY-MM-DD", "statuses": {"<profile id>": "Absent"}, "default_status": "Present"}
+    try:
+        payload = json.loads(request.body)
+        date = datetime.date.fromisoformat(payload['date'])
+        statuses = {int(profile_id): status for profile_id, status in payload.get('statuses', {}).items()}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return JsonResponse({'error': 'Expected role, date and statuses.'}, status=400)
+
+    try:
+        marked = record_check_in(payload.get('role'), date, statuses, payload.get('default_status'))
+    except ValidationError as e:
+        return JsonResponse({'error': e.messages}, status=400)
+
+    return JsonResponse({'marked': len(marked)})
+
+@staff_member_required
+@replica_reads()
+def daily_attendance_summary(request):
+    # ?role=teacher&year=2026&month=10; people over the month (or year) plus the year month by month
+    try:
+        year = int(request.GET.get('year') or datetime.date.today().year)
+        month = int(request.GET['month']) if request.GET.get('month') else None
+        people = presence_summary(request.GET.get('role', 'staff'), year, month)
+    except ValueError:
+        return JsonResponse({'error': 'year and month must be numbers.'}, status=400)
+    except ValidationError as e:
+        return JsonResponse({'error': e.messages}, status=400)
+
+    months = presence_by_month(request.GET.get('role', 'staff'), year)
+    return JsonResponse({
+        'year': year,
+        'month': month,
+        'people': people,
+        'months': [dict(row, month=row['month'].strftime('%Y-%m')) for row in months],
     })
 
+@staff_member_required
+@replica_reads()
+def daily_absences(request):
+    # ?role=teacher&date=YYYY-MM-DD, today by default
+    try:
+        date = datetime.date.fromisoformat(request.GET['date']) if request.GET.get('date') else datetime.date.today()
+        absences = absent_on(request.GET.get('role', 'staff'), date)
+    except ValueError:
+        return JsonResponse({'error': 'date must be YYYY-MM-DD.'}, status=400)
+    except ValidationError as e:
+        return JsonResponse({'error': e.messages}, status=400)
+
+    return JsonResponse(dict(absences, date=date))
+
+@staff_member_required
+def export_records(request, name):
+    # e.g. /core/exports/attendance/?format=xlsx&academic_year=1&grade=2&class=5
+    export = EXPORTS.get(name)
+    file_format = request.GET.get('format', 'csv')
+    if export is None or file_format not in FORMATS:
+        raise Http404("Unknown export")
+
+    try:
+        filters = {
+            field: int(request.GET[param]) if request.GET.get(param) else None
+            for field, param in (('academic_year', 'academic_year'), ('grade', 'grade'), ('class_instance', 'class'))
+        }
+    except ValueError:
+        return JsonResponse({'error': 'academic_year, grade and class must be ids.'}, status=400)
 
+    queryset = export.queryset(**filters)
+    # The rows are read while the response streams, after the view has returned
+    return export_response(export, queryset.using(replica_alias()), file_format)
 
+@staff_member_required
+def search(request):
+    # ?q=smith&kind=user&kind=class&limit=20
+    kinds = [kind for kind in request.GET.getlist('kind') if kind in SOURCES]
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), 100)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid limit.'}, status=400)
+    return JsonResponse({'results': search_documents(request.GET.get('q', ''), kinds=kinds, limit=limit)})
+
+@staff_member_required
+@replica_reads()
+def exam_analytics(request, exam_id):
+    exam = get_object_or_404(Exam, pk=exam_id)
+    return JsonResponse({'exam': exam.id, 'statistics': exam_statistics(exam)})
+
+@staff_member_required
+@replica_reads()
+def year_analytics(request, year_id):
+    academic_year = get_object_or_404(AcademicYear, pk=year_id)
+    return JsonResponse({'academic_year': academic_year.id, 'statistics': year_statistics(academic_year)})
+
+@staff_member_required
+def slow_requests(request):
+    return render(request, 'core/slow_requests.html', {
+        'requests': slowest_requests.items(),
+        'sample_rate': getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0),
+    })
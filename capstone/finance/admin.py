@@ -1,3 +1,133 @@
 from django.contrib import admin
+from django.forms.models import BaseInlineFormSet
 
-# Register your models here.
+from core.models import Fees
+from users.models import CustomUser
+
+from .ledger import STATUSES
+from .models import FeeBalance, FeeTransaction, PayrollRun, SalaryMonthly, SalaryTotal
+
+class FeeStatusFilter(admin.SimpleListFilter):
+    # Filters on the status annotation added by finance.ledger.with_balance
+    title = 'status'
+    parameter_name = 'status'
+
+    def lookups(self, request, model_admin):
+        return [(status, status) for status in STATUSES]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(status=self.value())
+        return queryset
+
+class FeeTransactionFormSet(BaseInlineFormSet):
+    def clean(self):
+        # Each new transaction was checked against the fee on its own (FeeTransaction.clean);
+        # added together they must stay within the balance as well
+        super().clean()
+        paid = self.instance.amount_paid
+        for form in self.extra_forms:
+            amount = getattr(form, 'cleaned_data', {}).get('amount')
+            if amount is None or not form.has_changed():
+                continue
+            FeeTransaction.check_balance(amount, self.instance.amount_due, paid)
+            paid = (paid or 0) + amount
+
+class FeeTransactionInline(admin.TabularInline):
+    # Append-only: existing transactions show read-only, new ones can be added.
+    # FeeTransaction.save checks each one against the locked fee row as well
+    model = FeeTransaction
+    formset = FeeTransactionFormSet
+    fields = ['kind', 'amount', 'note', 'recorded_by', 'created_at']
+    readonly_fields = ['recorded_by', 'created_at']
+    extra = 0
+    can_delete = False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+def save_fee_transactions(request, formset):
+    # Stamp who recorded each new transaction when the admin user is a CustomUser
+    for transaction in formset.save(commit=False):
+        if transaction.pk is None and isinstance(request.user, CustomUser):
+            transaction.recorded_by = request.user
+        transaction.save()
+
+class FeeTransactionAdmin(admin.ModelAdmin):
+    list_display = ['fee', 'kind', 'amount', 'recorded_by', 'created_at']
+    search_fields = ['fee__student__user__username', 'note']
+    list_filter = ['kind', 'created_at']
+    list_select_related = ['fee__student__user', 'recorded_by']
+    raw_id_fields = ['fee']
+    readonly_fields = ['recorded_by', 'created_at']
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def save_model(self, request, obj, form, change):
+        if isinstance(request.user, CustomUser):
+            obj.recorded_by = request.user
+        super().save_model(request, obj, form, change)
+
+class FeeBalanceAdmin(admin.ModelAdmin):
+    list_display = ['due_date', 'academic_year', 'fee_count', 'open_count', 'amount_due', 'amount_paid', 'outstanding']
+    list_filter = ['academic_year']
+    ordering = ['-due_date']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+class PayrollRunAdmin(admin.ModelAdmin):
+    list_display = ['month', 'paid_on', 'employee_count', 'total', 'created_by', 'created_at']
+    list_select_related = ['created_by']
+    ordering = ['-month']
+    readonly_fields = ['employee_count', 'total', 'created_by', 'created_at']
+
+    # Runs are made with manage.py run_payroll or /finance/payroll/runs/, which pay everyone in bulk
+    def has_add_permission(self, request):
+        return False
+
+class SalaryMonthlyAdmin(admin.ModelAdmin):
+    list_display = ['month', 'role', 'payment_count', 'total']
+    list_filter = ['role']
+    ordering = ['-month', 'role']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+class SalaryTotalAdmin(admin.ModelAdmin):
+    list_display = ['profile', 'year', 'payment_count', 'total', 'last_payment_date']
+    search_fields = ['profile__username']
+    list_filter = ['year']
+    list_select_related = ['profile']
+    ordering = ['-year', 'profile__username']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+admin.site.register(FeeTransaction, FeeTransactionAdmin)
+admin.site.register(FeeBalance, FeeBalanceAdmin)
+admin.site.register(PayrollRun, PayrollRunAdmin)
+admin.site.register(SalaryMonthly, SalaryMonthlyAdmin)
+admin.site.register(SalaryTotal, SalaryTotalAdmin)
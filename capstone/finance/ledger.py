@@ -0,0 +1,162 @@
+import datetime
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Min, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from core.models import Fees
+
+from .models import FeeBalance, FeeTransaction
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+ZERO = Value(Decimal('0.00'), output_field=MONEY)
+
+# Database-side versions of Fees.fee_status and the outstanding balance, so lists
+# can sort, filter and aggregate on them without loading rows into Python
+OUTSTANDING = Coalesce('amount_due', ZERO, output_field=MONEY) - Coalesce('amount_paid', ZERO, output_field=MONEY)
+FEE_STATUS = Case(
+    When(amount_paid=F('amount_due'), then=Value('Complete')),
+    When(amount_paid__gt=0, amount_paid__lt=F('amount_due'), then=Value('Partially Paid')),
+    default=Value('Not Paid'),
+)
+STATUSES = ['Complete', 'Partially Paid', 'Not Paid']
+KINDS = {kind for kind, _ in FeeTransaction.KIND_CHOICES}
+
+AGING_BUCKETS = ['current', '1-30', '31-60', '61-90', '90+']
+
+
+def with_balance(queryset=None):
+    """Annotate fees with ``outstanding`` and ``status`` (same rules as Fees.status_for)."""
+    queryset = Fees.objects.all() if queryset is None else queryset
+    return queryset.annotate(outstanding=OUTSTANDING, status=FEE_STATUS)
+
+
+def record_transaction(fee, amount, kind='payment', recorded_by=None, note=''):
+    """
+    Append a transaction to ``fee``'s ledger; finance.signals moves amount_paid
+    and the balance summary with it. Payments are positive and refunds negative;
+    FeeTransaction.save checks, on the locked fee row, that amount_paid stays
+    between zero and what is owed.
+    """
+    amount = Decimal(amount)
+    if kind not in KINDS:
+        raise ValidationError(f"Unknown transaction kind: {kind}")
+    if not amount.is_finite() or amount != amount.quantize(Decimal('0.01')):
+        raise ValidationError(f"Invalid amount: {amount}")
+    if kind == 'payment' and amount <= 0:
+        raise ValidationError("A payment must be a positive amount.")
+    if kind == 'refund' and amount >= 0:
+        raise ValidationError("A refund must be a negative amount.")
+    return FeeTransaction.objects.create(fee=fee, amount=amount, kind=kind, recorded_by=recorded_by, note=note)
+
+
+def _balance_rows(fees):
+    return (
+        fees.filter(due_date__isnull=False)
+        .annotate(balance=OUTSTANDING)
+        .values('academic_year_id', 'due_date')
+        .annotate(
+            fee_count=Count('id'),
+            open_count=Count('id', filter=Q(balance__gt=0)),
+            amount_due=Coalesce(Sum('amount_due'), ZERO, output_field=MONEY),
+            amount_paid=Coalesce(Sum('amount_paid'), ZERO, output_field=MONEY),
+            outstanding=Coalesce(Sum('balance'), ZERO, output_field=MONEY),
+        )
+        .order_by()
+    )
+
+
+def _cell(academic_year_id, due_date):
+    if academic_year_id is None:
+        return Q(academic_year__isnull=True, due_date=due_date)
+    return Q(academic_year_id=academic_year_id, due_date=due_date)
+
+
+def refresh_balances(keys):
+    """
+    Recompute the FeeBalance rows covering ``keys``, an iterable of
+    (academic_year_id, due_date) pairs of fees that changed. Like the attendance
+    rollups, touched cells are recomputed rather than patched with deltas.
+    """
+    cells = Q()
+    for academic_year_id, due_date in set(keys):
+        if due_date is not None:
+            cells |= _cell(academic_year_id, due_date)
+    if not cells:
+        return
+    with transaction.atomic():
+        rows = list(_balance_rows(Fees.objects.filter(cells)))
+        FeeBalance.objects.filter(cells).delete()
+        FeeBalance.objects.bulk_create([FeeBalance(**row) for row in rows])
+
+
+def rebuild_balances(academic_year=None):
+    fees = Fees.objects.all()
+    balances = FeeBalance.objects.all()
+    if academic_year is not None:
+        fees = fees.filter(academic_year=academic_year)
+        balances = balances.filter(academic_year=academic_year)
+    with transaction.atomic():
+        balances.delete()
+        return len(FeeBalance.objects.bulk_create([FeeBalance(**row) for row in _balance_rows(fees)]))
+
+
+def aging_report(academic_year=None, as_of=None):
+    """Outstanding money by days past due, in one query over the balance summary."""
+    as_of = as_of or datetime.date.today()
+    bucket = Case(
+        When(due_date__gte=as_of, then=Value('current')),
+        When(due_date__gte=as_of - datetime.timedelta(days=30), then=Value('1-30')),
+        When(due_date__gte=as_of - datetime.timedelta(days=60), then=Value('31-60')),
+        When(due_date__gte=as_of - datetime.timedelta(days=90), then=Value('61-90')),
+        default=Value('90+'),
+    )
+    balances = FeeBalance.objects.filter(outstanding__gt=0)
+    if academic_year is not None:
+        balances = balances.filter(academic_year=academic_year)
+    rows = {
+        row['bucket']: row
+        for row in balances.annotate(bucket=bucket).values('bucket')
+        .annotate(outstanding=Sum('outstanding'), fees=Sum('open_count')).order_by()
+    }
+    return [
+        {
+            'bucket': name,
+            'outstanding': rows.get(name, {}).get('outstanding') or Decimal('0.00'),
+            'fees': rows.get(name, {}).get('fees') or 0,
+        }
+        for name in AGING_BUCKETS
+    ]
+
+
+def outstanding_by_student(academic_year=None, grade=None, class_instance=None, students=None):
+    """
+    Students who owe money, largest balance first, as one grouped aggregate over
+    Fees however many students it covers.
+    """
+    fees = Fees.objects.filter(student__isnull=False)
+    if academic_year is not None:
+        fees = fees.filter(academic_year=academic_year)
+    if students is not None:
+        fees = fees.filter(student__in=students)
+    if grade is not None or class_instance is not None:
+        enrollment = Q(student__studentenrollment__academic_year=F('academic_year'))
+        if grade is not None:
+            enrollment &= Q(student__studentenrollment__class_assigned__grade=grade)
+        if class_instance is not None:
+            enrollment &= Q(student__studentenrollment__class_assigned=class_instance)
+        fees = fees.filter(enrollment)
+    return (
+        fees.annotate(balance=OUTSTANDING)
+        .values('student_id', username=F('student__user__username'))
+        .annotate(
+            amount_due=Coalesce(Sum('amount_due'), ZERO, output_field=MONEY),
+            amount_paid=Coalesce(Sum('amount_paid'), ZERO, output_field=MONEY),
+            outstanding=Coalesce(Sum('balance'), ZERO, output_field=MONEY),
+            oldest_due=Min('due_date', filter=Q(balance__gt=0)),
+        )
+        .filter(outstanding__gt=0)
+        .order_by('-outstanding', 'student_id')
+    )
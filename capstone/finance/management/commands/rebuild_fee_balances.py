@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from finance.ledger import rebuild_balances
+
+
+class Command(BaseCommand):
+    help = 'Recompute the fee balance summary (used by the aging report) from the Fees rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--academic-year', type=int, help='Only rebuild this AcademicYear id')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = rebuild_balances(options['academic_year'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {count} fee balance rows in {time.perf_counter() - started:.2f}s.'
+        ))
@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from finance.payroll import rebuild_payroll_aggregates
+
+
+class Command(BaseCommand):
+    help = 'Recompute the monthly and per-person salary totals from the SalaryPayment rows.'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        months, totals = rebuild_payroll_aggregates()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {months} monthly and {totals} per-person salary rows in {time.perf_counter() - started:.2f}s.'
+        ))
@@ -0,0 +1,32 @@
+import datetime
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.payroll import run_payroll
+
+
+class Command(BaseCommand):
+    help = 'Pay every salaried staff member and teacher for a month in one bulk transaction.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('month', help='Month to pay, as YYYY-MM')
+        parser.add_argument('--paid-on', help='Payment date, as YYYY-MM-DD (defaults to today)')
+
+    def handle(self, *args, **options):
+        try:
+            month = datetime.date.fromisoformat(f"{options['month']}-01")
+            paid_on = datetime.date.fromisoformat(options['paid_on']) if options['paid_on'] else None
+        except ValueError:
+            raise CommandError('Expected a month as YYYY-MM and --paid-on as YYYY-MM-DD.')
+
+        started = time.perf_counter()
+        try:
+            run = run_payroll(month, paid_on=paid_on)
+        except ValidationError as e:
+            raise CommandError(' '.join(e.messages))
+        self.stdout.write(self.style.SUCCESS(
+            f'Paid {run.total} to {run.employee_count} people for {run.month:%B %Y} '
+            f'in {time.perf_counter() - started:.2f}s.'
+        ))
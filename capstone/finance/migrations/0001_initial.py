@@ -0,0 +1,82 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:31
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def open_ledger(apps, schema_editor):
+    # Carry existing payments into the ledger so every fee's amount_paid equals
+    # the sum of its transactions, then build the balance summary
+    Fees = apps.get_model('core', 'Fees')
+    FeeTransaction = apps.get_model('finance', 'FeeTransaction')
+    FeeBalance = apps.get_model('finance', 'FeeBalance')
+    FeeTransaction.objects.bulk_create([
+        FeeTransaction(fee_id=fee_id, kind='opening', amount=amount_paid, note='Paid before the ledger')
+        for fee_id, amount_paid in Fees.objects.exclude(amount_paid=0).exclude(amount_paid__isnull=True)
+        .values_list('id', 'amount_paid').iterator()
+    ], batch_size=1000)
+
+    cells = {}
+    for academic_year_id, due_date, amount_due, amount_paid in (
+        Fees.objects.filter(due_date__isnull=False)
+        .values_list('academic_year_id', 'due_date', 'amount_due', 'amount_paid').iterator()
+    ):
+        amount_due = amount_due or Decimal('0.00')
+        amount_paid = amount_paid or Decimal('0.00')
+        cell = cells.setdefault((academic_year_id, due_date), FeeBalance(
+            academic_year_id=academic_year_id, due_date=due_date,
+            amount_due=Decimal('0.00'), amount_paid=Decimal('0.00'), outstanding=Decimal('0.00'),
+        ))
+        cell.fee_count += 1
+        cell.open_count += amount_due > amount_paid
+        cell.amount_due += amount_due
+        cell.amount_paid += amount_paid
+        cell.outstanding += amount_due - amount_paid
+    FeeBalance.objects.bulk_create(cells.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('core', '0007_search_index'),
+        ('users', '0002_directory_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeeBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_date', models.DateField()),
+                ('fee_count', models.PositiveIntegerField(default=0)),
+                ('open_count', models.PositiveIntegerField(default=0)),
+                ('amount_due', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('amount_paid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('outstanding', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('academic_year', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='core.academicyear')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('academic_year', 'due_date'), name='unique_fee_balance_day')],
+            },
+        ),
+        migrations.CreateModel(
+            name='FeeTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('opening', 'Opening Balance'), ('payment', 'Payment'), ('refund', 'Refund'), ('adjustment', 'Adjustment')], default='payment', max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('note', models.CharField(blank=True, default='', max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('fee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transactions', to='core.fees')),
+                ('recorded_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='users.customuser')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['fee', 'created_at'], name='fee_transaction_fee_idx')],
+            },
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
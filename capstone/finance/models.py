@@ -1,3 +1,137 @@
-from django.db import models
+from decimal import Decimal
 
-# Create your models here.
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+
+# Append-only ledger of money received against a Fees row. Fees.amount_paid is
+# kept as the running total of its transactions (see finance.signals), so
+# corrections are recorded as refunds or adjustments, never as edits.
+class FeeTransaction(models.Model):
+    KIND_CHOICES = [
+        ('opening', 'Opening Balance'),  # Amounts paid before the ledger existed
+        ('payment', 'Payment'),
+        ('refund', 'Refund'),
+        ('adjustment', 'Adjustment'),
+    ]
+
+    fee = models.ForeignKey('core.Fees', on_delete=models.CASCADE, related_name='transactions')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default='payment')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)  # Signed: refunds are negative
+    note = models.CharField(max_length=200, blank=True, default='')
+    recorded_by = models.ForeignKey('users.CustomUser', on_delete=models.SET_NULL, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['fee', 'created_at'], name='fee_transaction_fee_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} of {self.amount} on fee #{self.fee_id}"
+
+    @staticmethod
+    def check_balance(amount, amount_due, amount_paid):
+        # No transaction may take amount_paid below zero or past what is owed
+        paid = amount_paid or Decimal('0.00')
+        outstanding = (amount_due or Decimal('0.00')) - paid
+        if amount > outstanding:
+            raise ValidationError(f"{amount} exceeds the outstanding balance of {outstanding}.")
+        if paid + amount < 0:
+            raise ValidationError(f"{-amount} exceeds the {paid} paid so far.")
+
+    def _check_sign(self):
+        if self.amount == 0:
+            raise ValidationError("A transaction amount cannot be zero.")
+        if self.kind == 'payment' and self.amount < 0:
+            raise ValidationError("Payments must be positive; record a refund instead.")
+        if self.kind == 'refund' and self.amount > 0:
+            raise ValidationError("Refunds must be negative.")
+
+    def clean(self):
+        if self.amount is None:
+            return
+        self._check_sign()
+        if self.fee_id is not None:
+            self.check_balance(self.amount, self.fee.amount_due, self.fee.amount_paid)
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValidationError("Fee transactions cannot be changed once recorded.")
+        self._check_sign()
+        fees = self._meta.get_field('fee').related_model.objects
+        with transaction.atomic():
+            # Checked against the locked fee row, so two concurrent transactions
+            # can't both pass on the same balance
+            amount_due, amount_paid = fees.select_for_update().filter(pk=self.fee_id).values_list(
+                'amount_due', 'amount_paid'
+            ).get()
+            self.check_balance(self.amount, amount_due, amount_paid)
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValidationError("Fee transactions cannot be deleted; record a refund or adjustment instead.")
+
+# Fees totals per academic year and due date, maintained by finance.ledger. Aging
+# buckets are derived from due_date at query time, so the summary never goes stale
+# as days pass and a report reads one row per due date instead of every fee.
+class FeeBalance(models.Model):
+    academic_year = models.ForeignKey('core.AcademicYear', on_delete=models.CASCADE, blank=True, null=True)
+    due_date = models.DateField()
+    fee_count = models.PositiveIntegerField(default=0)
+    open_count = models.PositiveIntegerField(default=0)  # Fees with money still owed
+    amount_due = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    amount_paid = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    outstanding = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['academic_year', 'due_date'], name='unique_fee_balance_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.due_date}: {self.outstanding} outstanding on {self.open_count} fees"
+
+# One monthly payroll run; the unique month keeps a month from being paid twice.
+# The SalaryPayment rows it created point back at it.
+class PayrollRun(models.Model):
+    month = models.DateField(unique=True)  # First day of the month paid
+    paid_on = models.DateField()
+    employee_count = models.PositiveIntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    created_by = models.ForeignKey('users.CustomUser', on_delete=models.SET_NULL, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Payroll {self.month:%Y-%m}: {self.total} to {self.employee_count} people"
+
+# Salary payments per pay period and role, and per person and calendar year of
+# payment, maintained by finance.payroll like the fee balances: touched cells are
+# recomputed.
+class SalaryMonthly(models.Model):
+    month = models.DateField()  # First day of the month paid for (SalaryPayment.period)
+    role = models.CharField(max_length=10)  # CustomUser.role of the people paid
+    payment_count = models.PositiveIntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['month', 'role'], name='unique_salary_month_role'),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.role}: {self.total} in {self.payment_count} payments"
+
+class SalaryTotal(models.Model):
+    profile = models.ForeignKey('users.CustomUser', on_delete=models.CASCADE, related_name='salary_totals')
+    year = models.PositiveIntegerField()
+    payment_count = models.PositiveIntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    last_payment_date = models.DateField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['profile', 'year'], name='unique_salary_total_year'),
+        ]
+
+    def __str__(self):
+        return f"{self.profile_id} {self.year}: {self.total}"
@@ -0,0 +1,136 @@
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import ExtractYear
+
+from core.admin_base import invalidate_counts
+from users.models import SalaryPayment, StaffProfile, TeacherProfile
+
+from .models import PayrollRun, SalaryMonthly, SalaryTotal
+
+BATCH_SIZE = 1000
+
+# Roles paid by a payroll run, with the profile holding each one's monthly salary.
+# Someone with both profiles is paid once, from the first of them with a salary.
+SALARIED_PROFILES = [StaffProfile, TeacherProfile]
+
+
+def month_start(date):
+    return date.replace(day=1)
+
+
+def run_payroll(month, paid_on=None, created_by=None):
+    """
+    Pay every active staff member and teacher with a salary for ``month``, in one
+    transaction and a handful of queries however many people are paid. The
+    payments count towards ``month`` in the aggregates whenever they are paid.
+    Raises ValidationError if the month has already been run.
+    """
+    month = month_start(month)
+    paid_on = paid_on or datetime.date.today()
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                run = PayrollRun.objects.create(month=month, paid_on=paid_on, created_by=created_by)
+        except IntegrityError:
+            raise ValidationError(f"Payroll for {month:%B %Y} has already been run.")
+
+        salaries = {}
+        for profile_model in SALARIED_PROFILES:
+            for user_id, salary in (
+                profile_model.objects.filter(salary__gt=0, user__is_active=True)
+                .values_list('user_id', 'salary').order_by('user_id')
+            ):
+                salaries.setdefault(user_id, salary)
+        note = f'Payroll {month:%Y-%m}'
+        payments = [
+            SalaryPayment(
+                profile_id=user_id, payment_date=paid_on, period=month, amount_paid=salary, notes=note, run=run
+            )
+            for user_id, salary in sorted(salaries.items())
+        ]
+        SalaryPayment.objects.bulk_create(payments, batch_size=BATCH_SIZE)
+
+        run.employee_count = len(payments)
+        run.total = sum((payment.amount_paid for payment in payments), Decimal('0.00'))
+        run.save(update_fields=['employee_count', 'total'])
+
+        # bulk_create skips the signals that keep the aggregates current
+        refresh_salary_months([month])
+        refresh_salary_totals((payment.profile_id, paid_on.year) for payment in payments)
+        transaction.on_commit(lambda: invalidate_counts(SalaryPayment))
+    return run
+
+
+def refresh_salary_months(periods):
+    """Recompute the SalaryMonthly rows of the pay periods containing ``periods``."""
+    months = {month_start(period) for period in periods if period is not None}
+    if not months:
+        return
+    rows = (
+        SalaryPayment.objects.filter(period__in=months)
+        .values(month=F('period'), role=F('profile__role'))
+        .annotate(payment_count=Count('id'), total=Sum('amount_paid'))
+        .order_by()
+    )
+    with transaction.atomic():
+        built = [SalaryMonthly(**row) for row in rows]
+        SalaryMonthly.objects.filter(month__in=months).delete()
+        SalaryMonthly.objects.bulk_create(built)
+
+
+def refresh_salary_totals(keys):
+    """Recompute the SalaryTotal rows of ``keys``, (profile id, year) pairs that changed."""
+    # One condition per year rather than per person, so a whole payroll run stays
+    # one short query
+    by_year = defaultdict(set)
+    for profile_id, year in keys:
+        by_year[year].add(profile_id)
+    if not by_year:
+        return
+    cells = Q()
+    stale = Q()
+    for year, profile_ids in by_year.items():
+        cells |= Q(payment_date__year=year, profile_id__in=profile_ids)
+        stale |= Q(year=year, profile_id__in=profile_ids)
+    rows = (
+        SalaryPayment.objects.filter(cells)
+        .values('profile_id', year=ExtractYear('payment_date'))
+        .annotate(payment_count=Count('id'), total=Sum('amount_paid'), last_payment_date=Max('payment_date'))
+        .order_by()
+    )
+    with transaction.atomic():
+        built = [SalaryTotal(**row) for row in rows]
+        SalaryTotal.objects.filter(stale).delete()
+        SalaryTotal.objects.bulk_create(built, batch_size=BATCH_SIZE)
+
+
+def rebuild_payroll_aggregates():
+    with transaction.atomic():
+        SalaryMonthly.objects.all().delete()
+        SalaryTotal.objects.all().delete()
+        months = SalaryMonthly.objects.bulk_create([
+            SalaryMonthly(**row) for row in SalaryPayment.objects.filter(period__isnull=False)
+            .values(month=F('period'), role=F('profile__role'))
+            .annotate(payment_count=Count('id'), total=Sum('amount_paid'))
+            .order_by()
+        ])
+        totals = SalaryTotal.objects.bulk_create([
+            SalaryTotal(**row) for row in SalaryPayment.objects
+            .values('profile_id', year=ExtractYear('payment_date'))
+            .annotate(payment_count=Count('id'), total=Sum('amount_paid'), last_payment_date=Max('payment_date'))
+            .order_by()
+        ], batch_size=BATCH_SIZE)
+    return len(months), len(totals)
+
+
+def payroll_summary(year=None):
+    """Monthly payroll totals by role from the aggregate table, newest month first."""
+    months = SalaryMonthly.objects.all()
+    if year is not None:
+        months = months.filter(month__year=year)
+    return months.order_by('-month', 'role')
@@ -0,0 +1,68 @@
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.caching import bump_version
+from core.dashboard import student_namespace
+from core.models import Fees
+from users.models import SalaryPayment
+
+from .ledger import MONEY, ZERO, refresh_balances
+from .models import FeeTransaction
+from .payroll import refresh_salary_months, refresh_salary_totals
+
+
+# Each new transaction moves the fee's running total; update() with F() so
+# concurrent transactions on the same fee add up instead of overwriting
+@receiver(post_save, sender=FeeTransaction)
+def apply_fee_transaction(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    Fees.objects.filter(pk=instance.fee_id).update(
+        amount_paid=Coalesce(F('amount_paid'), ZERO, output_field=MONEY) + Value(instance.amount, output_field=MONEY)
+    )
+    academic_year_id, due_date, student_id = Fees.objects.filter(pk=instance.fee_id).values_list(
+        'academic_year_id', 'due_date', 'student_id'
+    ).get()
+    refresh_balances([(academic_year_id, due_date)])
+    # update() skips Fees' post_save, so the family summary is invalidated here
+    if student_id:
+        bump_version(student_namespace(student_id))
+
+
+# Keep the balance summary current for fees edited directly; pre_save remembers
+# the old cell so moving a due date refreshes the day it left
+@receiver(pre_save, sender=Fees)
+def remember_fee_cell(sender, instance, raw=False, **kwargs):
+    instance._balance_keys = []
+    if instance.pk and not raw:
+        instance._balance_keys = list(
+            Fees.objects.filter(pk=instance.pk).values_list('academic_year_id', 'due_date')
+        )
+
+
+@receiver([post_save, post_delete], sender=Fees)
+def refresh_fee_balances(sender, instance, **kwargs):
+    keys = getattr(instance, '_balance_keys', [])
+    keys.append((instance.academic_year_id, instance.due_date))
+    refresh_balances(keys)
+
+
+# Salary payments saved one at a time (admin, SalaryPayment.objects.create) keep the
+# payroll aggregates current; payroll runs refresh them once for the whole batch
+@receiver(pre_save, sender=SalaryPayment)
+def remember_salary_cells(sender, instance, raw=False, **kwargs):
+    instance._salary_cells = []
+    if instance.pk and not raw:
+        instance._salary_cells = list(
+            SalaryPayment.objects.filter(pk=instance.pk).values_list('profile_id', 'payment_date', 'period')
+        )
+
+
+@receiver([post_save, post_delete], sender=SalaryPayment)
+def refresh_salary_aggregates(sender, instance, **kwargs):
+    cells = getattr(instance, '_salary_cells', [])
+    cells.append((instance.profile_id, instance.payment_date, instance.period))
+    refresh_salary_months(period for _, _, period in cells)
+    refresh_salary_totals((profile_id, date.year) for profile_id, date, _ in cells if date is not None)
@@ -1,3 +1,206 @@
-from django.test import TestCase
+import datetime
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.contrib import admin
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.models import AcademicYear, Fees
+from users.models import CustomUser, SalaryPayment, StaffProfile, StudentProfile, TeacherProfile
+
+from .ledger import aging_report, record_transaction, with_balance
+from .models import FeeBalance, FeeTransaction, PayrollRun, SalaryMonthly, SalaryTotal
+from .payroll import run_payroll
+
+FAST_HASHER = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+def make_user(username, role, **fields):
+    return CustomUser.objects.create(username=username, password='x', role=role, **fields)
+
+
+def balance_rows():
+    return sorted(FeeBalance.objects.values_list(
+        'academic_year_id', 'due_date', 'fee_count', 'open_count', 'amount_due', 'amount_paid', 'outstanding'
+    ))
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class LedgerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.year = AcademicYear.objects.create(year='2024-2025', is_active=True)
+        cls.student = StudentProfile.objects.get(user=make_user('student', 'student'))
+        cls.due = datetime.date(2024, 9, 30)
+
+    def setUp(self):
+        self.fee = Fees.objects.create(
+            student=self.student, amount_due=Decimal('100.00'), amount_paid=Decimal('0.00'),
+            due_date=self.due, academic_year=self.year,
+        )
+
+    def fee_state(self):
+        fee = with_balance(Fees.objects.filter(pk=self.fee.pk)).get()
+        return fee.amount_paid, fee.outstanding, fee.status
+
+    def test_transactions_move_the_running_total(self):
+        record_transaction(self.fee, '60.00')
+        self.assertEqual(self.fee_state(), (Decimal('60.00'), Decimal('40.00'), 'Partially Paid'))
+        record_transaction(self.fee, '40.00')
+        self.assertEqual(self.fee_state(), (Decimal('100.00'), Decimal('0.00'), 'Complete'))
+        record_transaction(self.fee, '-100.00', kind='refund')
+        self.assertEqual(self.fee_state(), (Decimal('0.00'), Decimal('100.00'), 'Not Paid'))
+        self.assertEqual(
+            sum(FeeTransaction.objects.filter(fee=self.fee).values_list('amount', flat=True)), Decimal('0.00')
+        )
+
+    def test_invalid_transactions_leave_the_fee_alone(self):
+        record_transaction(self.fee, '30.00')
+        for amount, kind in [
+            ('10.00', 'gift'),
+            ('0.00', 'payment'),
+            ('-5.00', 'payment'),
+            ('5.00', 'refund'),
+            ('0.001', 'payment'),
+            ('NaN', 'payment'),
+            ('Infinity', 'payment'),
+            ('70.01', 'payment'),  # More than is owed
+            ('-30.01', 'refund'),  # More than was paid
+            ('-40.00', 'adjustment'),
+        ]:
+            with self.subTest(amount=amount, kind=kind), self.assertRaises(ValidationError):
+                record_transaction(self.fee, amount, kind=kind)
+        self.assertEqual(self.fee_state(), (Decimal('30.00'), Decimal('70.00'), 'Partially Paid'))
+        self.assertEqual(FeeTransaction.objects.filter(fee=self.fee).count(), 1)
+
+    def test_transactions_are_append_only(self):
+        transaction = record_transaction(self.fee, '10.00')
+        transaction.amount = Decimal('20.00')
+        with self.assertRaises(ValidationError):
+            transaction.save()
+        with self.assertRaises(ValidationError):
+            transaction.delete()
+        self.assertEqual(self.fee_state()[0], Decimal('10.00'))
+
+    def test_direct_and_admin_transactions_are_checked_too(self):
+        with self.assertRaises(ValidationError):
+            FeeTransaction.objects.create(fee=self.fee, amount=Decimal('500.00'))
+        request = RequestFactory().post('/')
+        request.user = make_user('bursar', 'admin', is_staff=True, is_superuser=True)
+
+        transaction_admin = admin.site._registry[FeeTransaction]
+        form_class = transaction_admin.get_form(request)
+        form = form_class({'fee': self.fee.pk, 'kind': 'payment', 'amount': '500.00', 'note': ''})
+        self.assertFalse(form.is_valid())
+        self.assertIn('exceeds the outstanding balance', str(form.errors))
+        form = form_class({'fee': self.fee.pk, 'kind': 'payment', 'amount': '40.00', 'note': ''})
+        self.assertTrue(form.is_valid(), form.errors)
+        transaction_admin.save_model(request, form.save(commit=False), form, change=False)
+        self.assertEqual(self.fee_state()[0], Decimal('40.00'))
+
+        # Two inline payments that each fit, but not together
+        self.fee.refresh_from_db()
+        inline = admin.site._registry[Fees].get_inline_instances(request, self.fee)[0]
+        formset_class = inline.get_formset(request, self.fee)
+        prefix = formset_class.get_default_prefix()
+        data = {f'{prefix}-TOTAL_FORMS': '2', f'{prefix}-INITIAL_FORMS': '0'}
+        for index in range(2):
+            data.update({f'{prefix}-{index}-kind': 'payment', f'{prefix}-{index}-amount': '35.00'})
+        formset = formset_class(data, instance=self.fee, prefix=prefix)
+        self.assertFalse(formset.is_valid())
+        self.assertIn('exceeds the outstanding balance', str(formset.non_form_errors()))
+        data[f'{prefix}-1-amount'] = '20.00'
+        self.assertTrue(formset_class(data, instance=self.fee, prefix=prefix).is_valid())
+
+    def test_balance_summary_matches_a_rebuild(self):
+        later = Fees.objects.create(
+            student=self.student, amount_due=Decimal('50.00'), due_date=datetime.date(2024, 12, 1),
+            academic_year=self.year,
+        )
+        record_transaction(self.fee, '25.00')
+        record_transaction(later, '50.00')
+        # Moving a due date refreshes the day it left
+        self.fee.refresh_from_db()
+        self.fee.due_date = datetime.date(2024, 10, 31)
+        self.fee.save()
+        incremental = balance_rows()
+        self.assertEqual([row[1] for row in incremental], [datetime.date(2024, 10, 31), datetime.date(2024, 12, 1)])
+
+        FeeBalance.objects.all().delete()
+        call_command('rebuild_fee_balances', stdout=StringIO())
+        self.assertEqual(balance_rows(), incremental)
+
+        report = {row['bucket']: (row['outstanding'], row['fees']) for row in aging_report(as_of=datetime.date(2024, 12, 15))}
+        self.assertEqual(report['31-60'], (Decimal('75.00'), 1))
+        self.assertEqual(sum(fees for _, fees in report.values()), 1)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class PayrollTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.clerk = make_user('clerk', 'staff')
+        StaffProfile.objects.filter(user=cls.clerk).update(salary=Decimal('1000.00'))
+        cls.teacher = make_user('teacher', 'teacher')
+        TeacherProfile.objects.filter(user=cls.teacher).update(salary=Decimal('1500.00'))
+        # Holds both profiles, and is paid once from the staff one
+        cls.head = make_user('head', 'staff')
+        StaffProfile.objects.filter(user=cls.head).update(salary=Decimal('2000.00'))
+        TeacherProfile.objects.create(user=cls.head, salary=Decimal('1800.00'))
+        left = make_user('left', 'teacher', is_active=False)
+        TeacherProfile.objects.filter(user=left).update(salary=Decimal('1200.00'))
+        make_user('volunteer', 'teacher')
+
+    def aggregates(self):
+        return (
+            sorted(SalaryMonthly.objects.values_list('month', 'role', 'payment_count', 'total')),
+            sorted(SalaryTotal.objects.values_list('profile_id', 'year', 'payment_count', 'total', 'last_payment_date')),
+        )
+
+    def test_run_pays_everyone_once_for_the_period(self):
+        # December's payroll paid in January counts towards December
+        run = run_payroll(datetime.date(2024, 12, 15), paid_on=datetime.date(2025, 1, 3))
+        self.assertEqual((run.month, run.employee_count, run.total), (datetime.date(2024, 12, 1), 3, Decimal('4500.00')))
+        self.assertEqual(
+            sorted(SalaryPayment.objects.values_list('profile__username', 'amount_paid', 'period')),
+            [
+                ('clerk', Decimal('1000.00'), datetime.date(2024, 12, 1)),
+                ('head', Decimal('2000.00'), datetime.date(2024, 12, 1)),
+                ('teacher', Decimal('1500.00'), datetime.date(2024, 12, 1)),
+            ],
+        )
+        monthly, totals = self.aggregates()
+        self.assertEqual(monthly, [
+            (datetime.date(2024, 12, 1), 'staff', 2, Decimal('3000.00')),
+            (datetime.date(2024, 12, 1), 'teacher', 1, Decimal('1500.00')),
+        ])
+        self.assertEqual({row[1] for row in totals}, {2025})
+
+        with self.assertRaises(ValidationError):
+            run_payroll(datetime.date(2024, 12, 1))
+        with self.assertRaises(CommandError):
+            call_command('run_payroll', '2024-12', stdout=StringIO())
+        self.assertEqual(PayrollRun.objects.count(), 1)
+        self.assertEqual(SalaryPayment.objects.count(), 3)
+
+    def test_single_payments_match_a_rebuild(self):
+        run_payroll(datetime.date(2024, 11, 1), paid_on=datetime.date(2024, 11, 28))
+        bonus = SalaryPayment.objects.create(
+            profile=self.teacher, payment_date=datetime.date(2024, 11, 30), amount_paid=Decimal('250.00')
+        )
+        self.assertEqual(bonus.period, datetime.date(2024, 11, 1))
+        # Moving a payment to another period and year refreshes the cells it left
+        bonus.payment_date = datetime.date(2025, 1, 2)
+        bonus.period = datetime.date(2024, 12, 1)
+        bonus.save()
+        SalaryPayment.objects.filter(profile=self.clerk).first().delete()
+        incremental = self.aggregates()
+        self.assertIn((datetime.date(2024, 12, 1), 'teacher', 1, Decimal('250.00')), incremental[0])
+        self.assertIn((datetime.date(2024, 11, 1), 'staff', 1, Decimal('2000.00')), incremental[0])
+
+        SalaryMonthly.objects.all().delete()
+        SalaryTotal.objects.all().delete()
+        call_command('rebuild_payroll_aggregates', stdout=StringIO())
+        self.assertEqual(self.aggregates(), incremental)
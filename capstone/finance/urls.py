@@ -0,0 +1,10 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('outstanding/', views.outstanding_report, name='finance-outstanding'),
+    path('aging/', views.aging, name='finance-aging'),
+    path('fees/<int:fee_id>/transactions/', views.record_fee_transaction, name='finance-record-transaction'),
+    path('payroll/', views.payroll_report, name='finance-payroll'),
+    path('payroll/runs/', views.payroll_run, name='finance-payroll-run'),
+]
@@ -1,3 +1,143 @@
-from django.shortcuts import render
+import datetime
+import json
+from decimal import Decimal, InvalidOperation
 
-# Create your views here.
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_POST
+
+from capstone.routers import replica_reads
+from core.models import Fees
+from users.models import CustomUser
+
+from .ledger import aging_report, outstanding_by_student, record_transaction
+from .payroll import payroll_summary, run_payroll
+
+MAX_REPORT_ROWS = 500
+# Opening balances and adjustments are entered through the admin
+ENDPOINT_KINDS = ('payment', 'refund')
+
+
+def _money(value):
+    return str(Decimal(value).quantize(Decimal('0.01'))) if value is not None else None
+
+
+@staff_member_required
+@replica_reads()
+def outstanding_report(request):
+    # ?academic_year=1&grade=2&class=5
+    try:
+        filters = {
+            name: int(request.GET[param]) if request.GET.get(param) else None
+            for name, param in [('academic_year', 'academic_year'), ('grade', 'grade'), ('class_instance', 'class')]
+        }
+    except ValueError:
+        return JsonResponse({'error': 'Filters must be ids.'}, status=400)
+
+    rows = outstanding_by_student(**filters)[:MAX_REPORT_ROWS]
+    return JsonResponse({
+        'students': [
+            {
+                'student': row['student_id'],
+                'username': row['username'],
+                'amount_due': _money(row['amount_due']),
+                'amount_paid': _money(row['amount_paid']),
+                'outstanding': _money(row['outstanding']),
+                'oldest_due': row['oldest_due'].isoformat() if row['oldest_due'] else None,
+            }
+            for row in rows
+        ],
+    })
+
+
+@staff_member_required
+@replica_reads()
+def aging(request):
+    try:
+        academic_year = int(request.GET['academic_year']) if request.GET.get('academic_year') else None
+    except ValueError:
+        return JsonResponse({'error': 'academic_year must be an id.'}, status=400)
+    return JsonResponse({
+        'buckets': [
+            {**row, 'outstanding': _money(row['outstanding'])} for row in aging_report(academic_year)
+        ],
+    })
+
+
+@staff_member_required
+@require_POST
+def record_fee_transaction(request, fee_id):
+    # Body: {"amount": "250.00", "kind": "payment", "note": "Receipt 1042"}; refunds are negative
+    fee = get_object_or_404(Fees, pk=fee_id)
+    try:
+        payload = json.loads(request.body)
+        amount = Decimal(str(payload['amount']))
+        kind = payload.get('kind', 'payment')
+    except (ValueError, KeyError, TypeError, AttributeError, InvalidOperation):
+        return JsonResponse({'error': 'Expected an amount.'}, status=400)
+    if kind not in ENDPOINT_KINDS:
+        return JsonResponse({'error': f"kind must be one of {', '.join(ENDPOINT_KINDS)}."}, status=400)
+
+    try:
+        entry = record_transaction(
+            fee, amount, kind=kind, note=str(payload.get('note', ''))[:200],
+            recorded_by=request.user if isinstance(request.user, CustomUser) else None,
+        )
+    except ValidationError as e:
+        return JsonResponse({'error': e.messages}, status=400)
+
+    fee.refresh_from_db(fields=['amount_paid'])
+    return JsonResponse({
+        'transaction': entry.id,
+        'amount_paid': _money(fee.amount_paid),
+        'status': fee.fee_status,
+    })
+
+
+@staff_member_required
+@require_POST
+def payroll_run(request):
+    # Body: {"month": "2026-10", "paid_on": "2026-10-28"}; pays every salaried staff member and teacher
+    try:
+        payload = json.loads(request.body)
+        month = datetime.date.fromisoformat(f"{payload['month']}-01")
+        paid_on = datetime.date.fromisoformat(payload['paid_on']) if payload.get('paid_on') else None
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Expected a month (YYYY-MM).'}, status=400)
+
+    try:
+        run = run_payroll(
+            month, paid_on=paid_on,
+            created_by=request.user if isinstance(request.user, CustomUser) else None,
+        )
+    except ValidationError as e:
+        return JsonResponse({'error': e.messages}, status=409)
+
+    return JsonResponse({
+        'run': run.id,
+        'month': run.month.strftime('%Y-%m'),
+        'employees': run.employee_count,
+        'total': _money(run.total),
+    }, status=201)
+
+
+@staff_member_required
+@replica_reads()
+def payroll_report(request):
+    try:
+        year = int(request.GET['year']) if request.GET.get('year') else None
+    except ValueError:
+        return JsonResponse({'error': 'year must be a number.'}, status=400)
+    return JsonResponse({
+        'months': [
+            {
+                'month': row.month.strftime('%Y-%m'),
+                'role': row.role,
+                'payments': row.payment_count,
+                'total': _money(row.total),
+            }
+            for row in payroll_summary(year)
+        ],
+    })
@@ -0,0 +1,71 @@
+// Live notifications for the dashboards. Listens on the inbox event stream and
+// falls back to long polling where EventSource is missing or never connects.
+// Both resume from the id of the last delivery received, starting from the
+// cursor the page was rendered at (data-cursor), so nothing shows twice and
+// nothing added while the page loaded is missed.
+(function () {
+    var list = document.querySelector('[data-live-notifications]');
+    if (!list) {
+        return;
+    }
+    var cursor = list.dataset.cursor || null;
+
+    function show(notification) {
+        var item = document.createElement('li');
+        var title = document.createElement('strong');
+        var message = document.createElement('p');
+        var posted = document.createElement('small');
+        title.textContent = notification.title;
+        message.textContent = notification.message;
+        posted.textContent = 'Posted on: ' + notification.created_at.slice(0, 10);
+        item.append(title, document.createElement('br'), message, posted);
+        list.prepend(item);
+        var empty = document.querySelector('[data-live-notifications-empty]');
+        if (empty) {
+            empty.remove();
+        }
+        cursor = notification.id;
+    }
+
+    function poll() {
+        var url = list.dataset.poll + (cursor === null ? '' : '?cursor=' + cursor);
+        fetch(url, {credentials: 'same-origin'})
+            .then(function (response) {
+                if (!response.ok) {
+                    throw new Error(response.status);
+                }
+                return response.json();
+            })
+            .then(function (data) {
+                data.notifications.forEach(show);
+                cursor = data.cursor;
+                poll();
+            })
+            .catch(function () {
+                setTimeout(poll, 5000);
+            });
+    }
+
+    if (!window.EventSource) {
+        poll();
+        return;
+    }
+    var failures = 0;
+    // Reconnects send Last-Event-ID, which the server prefers over ?cursor=
+    var source = new EventSource(list.dataset.stream + (cursor === null ? '' : '?cursor=' + cursor));
+    source.onopen = function () {
+        failures = 0;
+    };
+    source.addEventListener('notification', function (event) {
+        show(JSON.parse(event.data));
+    });
+    source.onerror = function () {
+        // EventSource reconnects by itself (a stream ends every few minutes); switch
+        // to long polling only if it keeps failing to connect
+        failures += 1;
+        if (failures >= 3) {
+            source.close();
+            poll();
+        }
+    };
+})();
@@ -1,35 +1,44 @@
 from django.contrib import admin
+from core.admin_base import CoreModelAdmin
+from core.search import IndexedSearchMixin
 from .models import CustomUser, AdminProfile, StaffProfile, TeacherProfile, SalaryPayment, StudentProfile, ParentProfile
 
-class CustomUserAdmin(admin.ModelAdmin):
+class CustomUserAdmin(IndexedSearchMixin, CoreModelAdmin):
     list_display = ['username', 'email', 'first_name', 'last_name', 'role', 'nrc_no', 'gender', 'religion']
     search_fields = ['username', 'email', 'first_name', 'last_name', 'nrc_no']
+    search_index = {'user': 'pk'}
     list_filter = ['role', 'gender', 'religion']
 
-class AdminProfileAdmin(admin.ModelAdmin):
+class AdminProfileAdmin(CoreModelAdmin):
     list_display = ['user']
     search_fields = ['user__username']
+    raw_id_fields = ['user']
 
-class StaffProfileAdmin(admin.ModelAdmin):
+class StaffProfileAdmin(CoreModelAdmin):
     list_display = ['user', 'salary']
     search_fields = ['user__username']
+    raw_id_fields = ['user']
     
-class TeacherProfileAdmin(admin.ModelAdmin):
+class TeacherProfileAdmin(CoreModelAdmin):
     list_display = ['user', 'salary']
     search_fields = ['user__username']
+    raw_id_fields = ['user']
 
-class SalaryPaymentAdmin(admin.ModelAdmin):
-    list_display = ['profile', 'payment_date', 'amount_paid', 'notes']
+class SalaryPaymentAdmin(CoreModelAdmin):
+    list_display = ['profile', 'payment_date', 'period', 'amount_paid', 'notes']
     search_fields = ['profile__username', 'notes']
-    list_filter = ['payment_date']
+    date_hierarchy = 'payment_date'
+    raw_id_fields = ['profile']
 
-class StudentProfileAdmin(admin.ModelAdmin):
+class StudentProfileAdmin(CoreModelAdmin):
     list_display = ['user']
     search_fields = ['user__username']
+    raw_id_fields = ['user']
 
-class ParentProfileAdmin(admin.ModelAdmin):
+class ParentProfileAdmin(CoreModelAdmin):
     list_display = ['user']
     search_fields = ['user__username']
+    raw_id_fields = ['user', 'students']
 
 # Register models
 admin.site.register(CustomUser, CustomUserAdmin)
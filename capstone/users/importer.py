@@ -0,0 +1,168 @@
+import csv
+import datetime
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import django
+from django.apps import apps
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.db import transaction
+
+from communication.fanout import schedule_inbox_sync
+from core.admin_base import invalidate_counts
+from core.search import index_queryset
+
+from .models import CustomUser
+from .signals import ROLE_PROFILES, profile_signal_suppressed
+
+# Bulk onboarding of users from CSV. The per-user post_save signal costs about five
+# queries plus a PBKDF2 hash on the request thread; here hashing runs in a process
+# pool and users, profiles and group memberships are written with bulk_create.
+
+USER_FIELDS = [
+    'username', 'first_name', 'last_name', 'email', 'role', 'nrc_no', 'gender',
+    'religion', 'phone_number', 'address', 'date_of_birth',
+]
+
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    skipped: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+    hash_seconds: float = 0.0
+    write_seconds: float = 0.0
+    total_seconds: float = 0.0
+
+    @property
+    def users_per_second(self):
+        return self.created / self.total_seconds if self.total_seconds else 0.0
+
+
+def _init_worker():
+    # Forked workers inherit a configured Django; spawned ones need setting up
+    if not apps.ready:
+        django.setup()
+
+
+def _hash_password(raw_password):
+    # Blank passwords become unusable ones, like set_unusable_password()
+    return make_password(raw_password or None)
+
+
+def _parse_row(row, line_number):
+    role = (row.get('role') or '').strip()
+    username = (row.get('username') or '').strip()
+    if not username:
+        raise ValueError(f'line {line_number}: missing username')
+    if role not in ROLE_PROFILES:
+        raise ValueError(f'line {line_number}: unknown role {role!r}')
+    values = {name: (row.get(name) or '').strip() or None for name in USER_FIELDS}
+    values['username'] = username
+    values['role'] = role
+    values['first_name'] = values['first_name'] or ''
+    values['last_name'] = values['last_name'] or ''
+    if values['date_of_birth']:
+        try:
+            values['date_of_birth'] = datetime.date.fromisoformat(values['date_of_birth'])
+        except ValueError:
+            raise ValueError(f'line {line_number}: invalid date_of_birth {values["date_of_birth"]!r}')
+    return values, row.get('password') or ''
+
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8-sig') as csv_file:
+        for line_number, row in enumerate(csv.DictReader(csv_file), start=2):
+            yield line_number, row
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _write_batch(users, groups):
+    with transaction.atomic(), profile_signal_suppressed():
+        # SQLite and PostgreSQL hand back primary keys from bulk_create
+        created = CustomUser.objects.bulk_create(users)
+
+        for role, (profile_model, _) in ROLE_PROFILES.items():
+            profiles = [profile_model(user=user) for user in created if user.role == role]
+            if profiles:
+                profile_model.objects.bulk_create(profiles)
+
+        Membership = CustomUser.groups.through
+        Membership.objects.bulk_create([
+            Membership(customuser_id=user.pk, group_id=groups[user.role].pk) for user in created
+        ])
+        # bulk_create skips the post_save that would index each user and fill their inbox
+        index_queryset('user', CustomUser.objects.filter(pk__in=[user.pk for user in created]))
+        schedule_inbox_sync([user.pk for user in created])
+        transaction.on_commit(
+            lambda: invalidate_counts(CustomUser, *(profile_model for profile_model, _ in ROLE_PROFILES.values()))
+        )
+    return len(created)
+
+
+def import_users(rows, batch_size=500, workers=None, progress=None):
+    """
+    Create users from ``(line_number, row)`` pairs of CSV dicts.
+
+    Rows whose username already exists are skipped; malformed rows are collected
+    in ``report.errors``. ``progress`` is called with the report after each batch.
+    """
+    report = ImportReport()
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    groups = {
+        role: Group.objects.get_or_create(name=group_name)[0]
+        for role, (_, group_name) in ROLE_PROFILES.items()
+    }
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for batch in _batches(rows, batch_size):
+            parsed = []
+            for line_number, row in batch:
+                try:
+                    parsed.append(_parse_row(row, line_number))
+                except ValueError as e:
+                    report.errors.append(str(e))
+
+            usernames = [values['username'] for values, _ in parsed]
+            existing = set(
+                CustomUser.objects.filter(username__in=usernames).values_list('username', flat=True)
+            )
+            seen = set()
+            fresh = []
+            for values, password in parsed:
+                if values['username'] in existing or values['username'] in seen:
+                    report.skipped.append(values['username'])
+                    continue
+                seen.add(values['username'])
+                fresh.append((values, password))
+
+            hash_started = time.perf_counter()
+            chunksize = max(1, len(fresh) // (4 * workers))
+            hashes = list(pool.map(_hash_password, [password for _, password in fresh], chunksize=chunksize))
+            report.hash_seconds += time.perf_counter() - hash_started
+
+            users = [CustomUser(password=hashed, **values) for (values, _), hashed in zip(fresh, hashes)]
+            write_started = time.perf_counter()
+            report.created += _write_batch(users, groups)
+            report.write_seconds += time.perf_counter() - write_started
+
+            report.total_seconds = time.perf_counter() - started
+            if progress is not None:
+                progress(report)
+
+    report.total_seconds = time.perf_counter() - started
+    return report
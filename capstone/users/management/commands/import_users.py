@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from core.jobs import enqueue
+from users.importer import USER_FIELDS, import_users, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-create users with their role profiles and groups from a CSV file. '
+        f'Columns: password plus {", ".join(USER_FIELDS)}.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, help='Password hashing processes (defaults to CPU count)')
+        parser.add_argument('--enqueue', action='store_true', help='Run on the background worker instead')
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            job = enqueue(
+                'users.import_users', options['csv_path'],
+                batch_size=options['batch_size'], workers=options['workers'],
+            )
+            self.stdout.write(f'Queued job {job.id}.')
+            return
+
+        def progress(report):
+            self.stdout.write(
+                f'{report.created} created, {len(report.skipped)} skipped, '
+                f'{report.users_per_second:.1f} users/s'
+            )
+
+        report = import_users(
+            read_rows(options['csv_path']),
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            progress=progress,
+        )
+
+        for error in report.errors:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {report.created} users in {report.total_seconds:.2f}s '
+            f'({report.users_per_second:.1f} users/s; hashing {report.hash_seconds:.2f}s, '
+            f'writes {report.write_seconds:.2f}s). Skipped {len(report.skipped)} existing usernames, '
+            f'{len(report.errors)} invalid rows.'
+        ))
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0002_payroll'),
+        ('users', '0002_directory_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salarypayment',
+            name='run',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payments', to='finance.payrollrun'),
+        ),
+        migrations.AddIndex(
+            model_name='salarypayment',
+            index=models.Index(fields=['profile', 'payment_date'], name='salary_profile_date_idx'),
+        ),
+    ]
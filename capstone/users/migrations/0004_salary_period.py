@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:14
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import TruncMonth
+
+
+def fill_periods(apps, schema_editor):
+    # Payroll payments are for their run's month, anything else for the month it
+    # was paid in; the monthly aggregates then move to the pay periods
+    SalaryPayment = apps.get_model('users', 'SalaryPayment')
+    PayrollRun = apps.get_model('finance', 'PayrollRun')
+    SalaryMonthly = apps.get_model('finance', 'SalaryMonthly')
+    SalaryPayment.objects.filter(run__isnull=False).update(
+        period=Subquery(PayrollRun.objects.filter(pk=OuterRef('run_id')).values('month')[:1])
+    )
+    SalaryPayment.objects.filter(period__isnull=True).update(period=TruncMonth('payment_date'))
+
+    SalaryMonthly.objects.all().delete()
+    SalaryMonthly.objects.bulk_create([
+        SalaryMonthly(**row) for row in SalaryPayment.objects
+        .values(month=F('period'), role=F('profile__role'))
+        .annotate(payment_count=Count('id'), total=Sum('amount_paid'))
+        .order_by()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_payroll'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salarypayment',
+            name='period',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(fill_periods, migrations.RunPython.noop),
+    ]
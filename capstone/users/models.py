@@ -48,6 +48,15 @@ class CustomUser(AbstractUser):
         verbose_name='user permissions',
     )
 
+    class Meta:
+        verbose_name = 'user'
+        verbose_name_plural = 'users'
+        indexes = [
+            # Directory keyset pagination, overall and per role
+            models.Index(fields=['last_name', 'id'], name='user_directory_idx'),
+            models.Index(fields=['role', 'last_name', 'id'], name='user_role_directory_idx'),
+        ]
+
     def __str__(self):
         return self.username
 
@@ -72,12 +81,25 @@ class TeacherProfile(models.Model):
 class SalaryPayment(models.Model):
     profile = models.ForeignKey(CustomUser, on_delete=models.CASCADE)  # Could be Staff or Teacher
     payment_date = models.DateField()
+    # First day of the month the payment is for; defaults to the payment date's month
+    period = models.DateField(blank=True, null=True)
     amount_paid = models.DecimalField(max_digits=10, decimal_places=2)
     notes = models.TextField(blank=True, null=True)  # Optional notes about the payment
+    run = models.ForeignKey('finance.PayrollRun', on_delete=models.SET_NULL, blank=True, null=True, related_name='payments')
+
+    class Meta:
+        indexes = [
+            # Payment history per person, newest first
+            models.Index(fields=['profile', 'payment_date'], name='salary_profile_date_idx'),
+        ]
 
     def __str__(self):
         return f'{self.profile.username} - {self.payment_date} - {self.amount_paid}'
 
+    def save(self, *args, **kwargs):
+        self.period = (self.period or self.payment_date).replace(day=1)
+        super().save(*args, **kwargs)
+
 # Profile model for Students
 class StudentProfile(models.Model):
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE)
@@ -1,13 +1,39 @@
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
 from django.contrib.auth.models import Group
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from .models import CustomUser, AdminProfile, StaffProfile, TeacherProfile, StudentProfile, ParentProfile
 
+logger = logging.getLogger(__name__)
+
+# Profile model and auth group for each CustomUser role
+ROLE_PROFILES = {
+    'admin': (AdminProfile, 'Admin'),
+    'staff': (StaffProfile, 'Staff'),
+    'teacher': (TeacherProfile, 'Teacher'),
+    'student': (StudentProfile, 'Student'),
+    'parent': (ParentProfile, 'Parent'),
+}
+
+_profile_signal_suppressed = ContextVar('profile_signal_suppressed', default=False)
+
+@contextmanager
+def profile_signal_suppressed():
+    # For bulk paths (see users.importer) that create profiles and group memberships themselves
+    token = _profile_signal_suppressed.set(True)
+    try:
+        yield
+    finally:
+        _profile_signal_suppressed.reset(token)
+
 # Signal to create a profile and assign the user to the appropriate group upon user creation
 @receiver(post_save, sender=CustomUser)
 def create_profile_and_assign_group(sender, instance, created, **kwargs):
-    if created:
-        print(f"User {instance.username} created with role {instance.role}")
+    if created and not _profile_signal_suppressed.get():
+        logger.debug("User %s created with role %s", instance.username, instance.role)
 
         # Checking password hash
         if not instance.password.startswith('pbkdf2_'):  # Django hashed passwords start with 'pbkdf2_'
@@ -15,32 +41,9 @@ def create_profile_and_assign_group(sender, instance, created, **kwargs):
             instance.save(update_fields=["password"])
         
         # Create profile based on role
-        if instance.role == 'admin':
-            AdminProfile.objects.create(user=instance)
-            print(f"Admin profile created for {instance.username}")
-            admin_group, _ = Group.objects.get_or_create(name='Admin')
-            instance.groups.add(admin_group)
-
-        elif instance.role == 'staff':
-            StaffProfile.objects.create(user=instance)
-            print(f"Staff profile created for {instance.username}")
-            staff_group, _ = Group.objects.get_or_create(name='Staff')
-            instance.groups.add(staff_group)
-
-        elif instance.role == 'teacher':
-            TeacherProfile.objects.create(user=instance)
-            print(f"Teacher profile created for {instance.username}")
-            teacher_group, _ = Group.objects.get_or_create(name='Teacher')
-            instance.groups.add(teacher_group)
-
-        elif instance.role == 'student':
-            StudentProfile.objects.create(user=instance)
-            print(f"Student profile created for {instance.username}")
-            student_group, _ = Group.objects.get_or_create(name='Student')
-            instance.groups.add(student_group)
-
-        elif instance.role == 'parent':
-            ParentProfile.objects.create(user=instance)
-            print(f"Parent profile created for {instance.username}")
-            parent_group, _ = Group.objects.get_or_create(name='Parent')
-            instance.groups.add(parent_group)
+        if instance.role in ROLE_PROFILES:
+            profile_model, group_name = ROLE_PROFILES[instance.role]
+            profile_model.objects.create(user=instance)
+            logger.debug("%s profile created for %s", group_name, instance.username)
+            group, _ = Group.objects.get_or_create(name=group_name)
+            instance.groups.add(group)
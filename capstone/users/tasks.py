@@ -0,0 +1,14 @@
+from core.jobs import task
+
+from .importer import import_users, read_rows
+
+
+@task('users.import_users')
+def import_users_from_csv(path, batch_size=500, workers=None):
+    report = import_users(read_rows(path), batch_size=batch_size, workers=workers)
+    return {
+        'created': report.created,
+        'skipped': len(report.skipped),
+        'errors': report.errors,
+        'users_per_second': round(report.users_per_second, 1),
+    }
@@ -1,3 +1,63 @@
-from django.test import TestCase
+from django.contrib.auth.models import Group
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from core.search import SearchDocument
+
+from .importer import import_users
+from .models import CustomUser, ParentProfile, StudentProfile, TeacherProfile
+from .signals import ROLE_PROFILES
+
+FAST_HASHER = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+def rows(prefix, count, role='student', start=2):
+    return [
+        (start + index, {'username': f'{prefix}{index}', 'role': role, 'last_name': 'Smith', 'password': 'secret'})
+        for index in range(count)
+    ]
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class ImportUsersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for _, group_name in ROLE_PROFILES.values():
+            Group.objects.get_or_create(name=group_name)
+
+    def test_users_get_profiles_groups_and_search_documents(self):
+        CustomUser.objects.create(username='taken', password='x', role='student')
+        report = import_users(
+            rows('student', 3) + rows('teacher', 2, 'teacher', 5) + rows('parent', 1, 'parent', 7) + [
+                (8, {'username': 'taken', 'role': 'student'}),
+                (9, {'username': 'student0', 'role': 'student'}),
+                (10, {'username': 'nobody', 'role': 'janitor'}),
+                (11, {'username': '', 'role': 'student'}),
+                (12, {'username': 'late', 'role': 'student', 'date_of_birth': 'soon'}),
+            ],
+            workers=1,
+        )
+        self.assertEqual(report.created, 6)
+        self.assertEqual(sorted(report.skipped), ['student0', 'taken'])
+        self.assertEqual(len(report.errors), 3)
+
+        imported = CustomUser.objects.exclude(username='taken')
+        self.assertEqual(StudentProfile.objects.filter(user__in=imported).count(), 3)
+        self.assertEqual(TeacherProfile.objects.filter(user__in=imported).count(), 2)
+        self.assertEqual(ParentProfile.objects.filter(user__in=imported).count(), 1)
+        memberships = CustomUser.groups.through.objects.filter(customuser__in=imported)
+        self.assertEqual(
+            sorted(memberships.values_list('customuser__username', 'group__name')),
+            sorted((user.username, user.role.title()) for user in imported),
+        )
+        self.assertEqual(SearchDocument.objects.filter(kind='user', object_id__in=imported).count(), 6)
+        self.assertTrue(imported.get(username='student1').check_password('secret'))
+
+    def test_queries_per_batch_do_not_grow_with_rows(self):
+        # The role groups, then per batch: the taken usernames, users, profiles,
+        # group memberships and search documents
+        with self.assertNumQueries(5 + 8):
+            import_users(rows('one', 1), workers=1)
+        with self.assertNumQueries(5 + 8):
+            self.assertEqual(import_users(rows('many', 50), workers=1).created, 50)
+        with self.assertNumQueries(5 + 2 * 8):
+            self.assertEqual(import_users(rows('batched', 50), batch_size=25, workers=1).created, 50)